@@ -0,0 +1,91 @@
+from config import ANIMATIONS, ANIM_SLIDE_MS, ANIM_POP_MS, ANIM_MAX_CHANGES
+
+
+def ease_out(t):
+    return 1 - (1 - t) * (1 - t)
+
+
+def ease_out_back(t, overshoot=1.70158):
+    # 先略微放大超过 1 再回落，用于弹出效果
+    t -= 1
+    return t * t * ((overshoot + 1) * t + overshoot) + 1
+
+
+class Tween:
+    """一个格子动画：slide 为旧道具 value 从 src 滑到 dst，pop 为 dst 上的新道具弹出"""
+
+    __slots__ = ("kind", "src", "dst", "value", "start", "duration")
+
+    def __init__(self, kind, src, dst, value, start, duration):
+        self.kind = kind
+        self.src = src
+        self.dst = dst
+        self.value = value
+        self.start = start
+        self.duration = duration
+
+    def progress(self, now):
+        return min(1.0, (now - self.start) / self.duration)
+
+
+class Animator:
+    """把模型的格子变化事件转换成补间动画。
+
+    模型照常立即更新，动画只影响显示：事件先攒在 pending 中，绘制时统一解释——
+    同一批里一个格子从 v 升到下一级、另一个同为 v 的格子被清空，视为一次合成；
+    空格出现道具视为生成。一批改动过多（重开、读档）时不播放。
+    """
+
+    def __init__(self, enabled=ANIMATIONS):
+        self.enabled = enabled
+        self.tweens = {}
+        self.pending = []
+        self.model = None
+
+    def watch(self, model):
+        old = getattr(self.model, "listeners", None)
+        if old is not None and self.on_change in old:
+            old.remove(self.on_change)
+        self.model = model
+        self.clear()
+        listeners = getattr(model, "listeners", None)
+        if listeners is not None:
+            listeners.append(self.on_change)
+
+    def on_change(self, idx, old, new):
+        self.pending.append((idx, old, new))
+
+    def clear(self):
+        # 跳到所有动画的结束状态
+        self.tweens.clear()
+        self.pending.clear()
+
+    def update(self, now):
+        pending, self.pending = self.pending, []
+        if pending and self.enabled:
+            if len(pending) > ANIM_MAX_CHANGES:
+                self.tweens.clear()
+            else:
+                self._start(pending, now)
+        for key in [k for k, tw in self.tweens.items() if now - tw.start >= tw.duration]:
+            del self.tweens[key]
+
+    def _start(self, pending, now):
+        cols = self.model.cols
+        cleared = {idx: old for idx, old, new in pending if old and not new}
+        for idx, old, new in pending:
+            pos = divmod(idx, cols)
+            # 格子又变了，之前落在它上面的动画作废
+            self.tweens.pop(("slide", pos), None)
+            self.tweens.pop(("pop", pos), None)
+            if new and old and new[0] == old[0] and new[1] == old[1] + 1:
+                src = next((i for i, v in cleared.items() if v == old), None)
+                if src is not None:
+                    del cleared[src]
+                    self.tweens[("slide", pos)] = Tween("slide", divmod(src, cols), pos, old, now, ANIM_SLIDE_MS)
+            elif new and not old:
+                self.tweens[("pop", pos)] = Tween("pop", pos, pos, new, now, ANIM_POP_MS)
+
+    def popping(self):
+        # 正在弹出的格子：底图先按空格绘制
+        return {tw.dst for tw in self.tweens.values() if tw.kind == "pop"}
@@ -0,0 +1,206 @@
+import os
+from collections import OrderedDict
+import pygame
+import atlas
+
+
+class SurfaceCache:
+    """按键缓存 Surface 的 LRU，超出条目数或字节数上限时淘汰最久未使用的项"""
+
+    def __init__(self, capacity=None, max_bytes=None):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        self._items.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, surf, nbytes=0):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[1]
+        self._items[key] = (surf, nbytes)
+        self.nbytes += nbytes
+        while self._items and (
+            (self.capacity is not None and len(self._items) > self.capacity)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes and len(self._items) > 1)
+        ):
+            _, (_, size) = self._items.popitem(last=False)
+            self.nbytes -= size
+        return surf
+
+    def keys(self):
+        return list(self._items)
+
+    def pop(self, key):
+        entry = self._items.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+    def clear(self):
+        self._items.clear()
+        self.nbytes = 0
+
+
+# mip 链的最大一级边长（更大的原图先缩到这里）与最小一级边长
+MIP_MAX_SIZE = 512
+MIP_MIN_SIZE = 16
+
+
+def surface_bytes(surf):
+    return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+
+def build_mip_chain(img):
+    # 逐级减半的缩略图列表，第 0 级最大
+    w, h = img.get_size()
+    if max(w, h) > MIP_MAX_SIZE:
+        ratio = MIP_MAX_SIZE / max(w, h)
+        img = pygame.transform.smoothscale(img, (max(1, round(w * ratio)), max(1, round(h * ratio))))
+    chain = [img]
+    while min(img.get_size()) // 2 >= MIP_MIN_SIZE:
+        img = pygame.transform.smoothscale(img, (img.get_width() // 2, img.get_height() // 2))
+        chain.append(img)
+    return chain
+
+
+def scale_from_chain(chain, size):
+    # 取不小于目标尺寸的最小一级，只做一次缩放（比目标大时不超过两倍）
+    src = chain[0]
+    for level in chain:
+        if level.get_width() < size[0] or level.get_height() < size[1]:
+            break
+        src = level
+    if src.get_size() == tuple(size):
+        return src
+    return pygame.transform.smoothscale(src, size)
+
+
+class AssetLibrary:
+    """按需加载道具图片。
+
+    道具列表和最高等级只靠扫描文件名得到；图片在第一次绘制时才解码，并预先生成
+    逐级减半的 mip 链，之后任何格子尺寸都从最接近的一级缩放一次得到。mip 链和
+    各尺寸的结果都放在有内存上限的 LRU 中。当前尺寸有新鲜且不超过上限的图集时直接整体使用图集。
+    """
+
+    def __init__(self, asset_dir, size, max_bytes, cache_dir=None):
+        self.asset_dir = asset_dir
+        self.sources = atlas.scan_sources(asset_dir)
+        self.cache = SurfaceCache(max_bytes=max_bytes)
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.missing = set()
+        self.packed = None
+        self._no_atlas = set()
+        self.size = None
+        self.set_size(size)
+        self.scan_levels()
+
+    def scan_levels(self):
+        self.item_levels = atlas.item_levels(self.sources)
+
+    def available_items(self):
+        return sorted(self.item_levels)
+
+    def item_max_levels(self):
+        return {item_id: max(levels) for item_id, levels in self.item_levels.items() if levels}
+
+    def item_image(self, item_id, level):
+        return self.get(f"item:{item_id}:{level}")
+
+    def level_image(self, level):
+        return self.get(f"lv:{level}")
+
+    def select_image(self):
+        return self.get("select")
+
+    def set_size(self, size):
+        # 切换目标格子尺寸（窗口缩放时调用）；只保留当前尺寸的图集
+        if size == self.size:
+            return
+        self.size = size
+        self.packed = None
+        if self.cache_dir is None or size in self._no_atlas:
+            return
+        path = atlas.atlas_path(self.cache_dir, size)
+        if os.path.isfile(path) and os.path.getsize(path) <= self.max_bytes:
+            self.packed = atlas.load_atlas(self.asset_dir, self.cache_dir, size, self.sources)
+        if self.packed is None:
+            self._no_atlas.add(size)
+
+    def get(self, key):
+        if self.packed is not None:
+            return self.packed.get(key)
+        ck = (key, self.size)
+        surf = self.cache.get(ck)
+        if surf is None:
+            chain = self.mip_chain(key)
+            if chain is None:
+                return None
+            surf = scale_from_chain(chain, atlas.scaled_size(key, self.size))
+            self.cache.put(ck, surf, surface_bytes(surf))
+        return surf
+
+    def mip_chain(self, key):
+        chain = self.cache.get(("mip", key))
+        if chain is None and key in self.sources and key not in self.missing:
+            img = self.load(key)
+            if img is None:
+                self.missing.add(key)
+                return None
+            chain = build_mip_chain(img)
+            self.cache.put(("mip", key), chain, sum(surface_bytes(s) for s in chain))
+        return chain
+
+    def reload(self, images):
+        # 热重载：images 为 {key: (文件信息, 已解码的 Surface)}，文件信息为 None 表示文件已删除。
+        # 只替换这些图片的 mip 链与各尺寸缓存；当前图集中的对应项原地换成新图，其余尺寸的图集因文件信息
+        # 变化自动失效
+        for key, (info, img) in images.items():
+            self.missing.discard(key)
+            for ck in self.cache.keys():
+                if ck[0] == key or ck == ("mip", key):
+                    self.cache.pop(ck)
+            if info is None:
+                self.sources.pop(key, None)
+                if self.packed is not None:
+                    self.packed.pop(key, None)
+                continue
+            self.sources[key] = info
+            if img is None:
+                self.missing.add(key)
+                chain = None
+            else:
+                if pygame.display.get_surface() is not None:
+                    img = img.convert_alpha()
+                chain = build_mip_chain(img)
+                self.cache.put(("mip", key), chain, sum(surface_bytes(s) for s in chain))
+            if self.packed is not None:
+                if chain is None:
+                    self.packed.pop(key, None)
+                else:
+                    self.packed[key] = scale_from_chain(chain, atlas.scaled_size(key, self.size))
+        self._no_atlas.clear()
+        self.scan_levels()
+        return list(images)
+
+    def load(self, key):
+        path = os.path.join(self.asset_dir, self.sources[key][0])
+        try:
+            img = pygame.image.load(path)
+        except Exception:
+            return None
+        # 没有窗口（离屏渲染）时无法转换像素格式，直接使用解码结果
+        return img.convert_alpha() if pygame.display.get_surface() is not None else img
@@ -0,0 +1,137 @@
+import json
+import math
+import os
+import re
+import struct
+import pygame
+
+# 图集文件格式：MAGIC | u32 索引长度 | JSON 索引 | RGBA 原始像素
+MAGIC = b"M2AT"
+VERSION = 1
+
+ITEM_PATTERN = re.compile(r"^item(\d+)_(\d+)\.png$", re.IGNORECASE)
+LEVEL_PATTERN = re.compile(r"^lv(\d+)\.png$", re.IGNORECASE)
+SELECT_NAME = "select.png"
+
+
+def atlas_path(cache_dir, size):
+    return os.path.join(cache_dir, f"atlas_{size}.bin")
+
+
+def scan_sources(asset_dir):
+    # 只看文件名和 stat，不解码图片：{key: (文件名, mtime_ns, 字节数)}
+    # key 形如 "item:1:2"、"lv:3"、"select"
+    sources = {}
+    if not os.path.isdir(asset_dir):
+        return sources
+    for entry in os.scandir(asset_dir):
+        name = entry.name
+        m = ITEM_PATTERN.match(name)
+        if m:
+            key = f"item:{int(m.group(1))}:{int(m.group(2))}"
+        else:
+            m = LEVEL_PATTERN.match(name)
+            if m:
+                key = f"lv:{int(m.group(1))}"
+            elif name.lower() == SELECT_NAME:
+                key = "select"
+            else:
+                continue
+        st = entry.stat()
+        sources[key] = (name, st.st_mtime_ns, st.st_size)
+    return sources
+
+
+def item_levels(sources):
+    # scan_sources 的结果 -> {道具 id: {有图片的等级...}}；道具列表与最高等级都由此得到
+    levels = {}
+    for key in sources:
+        parts = key.split(":")
+        if parts[0] == "item":
+            levels.setdefault(int(parts[1]), set()).add(int(parts[2]))
+    return levels
+
+
+def scaled_size(key, size):
+    # 与 GameView 一致：道具和等级图缩放到 size - 8，选中框缩放到 size
+    return (size, size) if key == "select" else (size - 8, size - 8)
+
+
+def save_atlas(path, size, sources, surfaces):
+    # surfaces: {key: 已缩放好的 Surface}
+    keys = sorted(surfaces)
+    cols = max(1, math.ceil(math.sqrt(len(keys))))
+    rows = max(1, math.ceil(len(keys) / cols))
+    sheet = pygame.Surface((cols * size, rows * size), pygame.SRCALPHA)
+    entries = {}
+    for i, key in enumerate(keys):
+        surf = surfaces[key]
+        x, y = (i % cols) * size, (i // cols) * size
+        sheet.blit(surf, (x, y))
+        entries[key] = [x, y, surf.get_width(), surf.get_height()]
+
+    index = {
+        "version": VERSION,
+        "tile_size": size,
+        "width": sheet.get_width(),
+        "height": sheet.get_height(),
+        "sources": {k: [v[1], v[2]] for k, v in sources.items()},
+        "entries": entries,
+    }
+    header = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        f.write(pygame.image.tostring(sheet, "RGBA"))
+    os.replace(tmp, path)
+
+
+def build_atlas(asset_dir, cache_dir, size):
+    # 解码并缩放 asset_dir 下的全部图片，写入图集；返回打包的图片数
+    sources = scan_sources(asset_dir)
+    surfaces = {}
+    for key, (name, _, _) in sources.items():
+        try:
+            img = pygame.image.load(os.path.join(asset_dir, name))
+        except Exception:
+            continue
+        surfaces[key] = pygame.transform.smoothscale(img, scaled_size(key, size))
+    save_atlas(atlas_path(cache_dir, size), size, sources, surfaces)
+    return len(surfaces)
+
+
+def load_atlas(asset_dir, cache_dir, size, sources=None):
+    # 一次读入整个图集并切成子 Surface；文件缺失或已过期时返回 None
+    path = atlas_path(cache_dir, size)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < 8 or data[:4] != MAGIC:
+        return None
+    (header_len,) = struct.unpack_from("<I", data, 4)
+    try:
+        index = json.loads(data[8:8 + header_len].decode("utf-8"))
+    except ValueError:
+        return None
+    if index.get("version") != VERSION or index.get("tile_size") != size:
+        return None
+
+    if sources is None:
+        sources = scan_sources(asset_dir)
+    current = {k: [v[1], v[2]] for k, v in sources.items()}
+    if current != index["sources"]:
+        return None
+
+    w, h = index["width"], index["height"]
+    pixels = data[8 + header_len:]
+    if len(pixels) != w * h * 4:
+        return None
+    sheet = pygame.image.frombuffer(pixels, (w, h), "RGBA")
+    if pygame.display.get_surface() is not None:
+        sheet = sheet.convert_alpha()
+    else:
+        sheet = sheet.copy()
+    return {key: sheet.subsurface(rect) for key, rect in index["entries"].items()}
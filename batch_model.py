@@ -0,0 +1,185 @@
+import numpy as np
+from board import LEVEL_BITS, LEVEL_MASK, encode, decode
+from config import ROWS, COLS
+from spawn import DEFAULT_SPAWN
+
+
+class BatchGameModel:
+    """同时推进 n 局棋盘的无界面模拟器，规则与 GameModel 一致。
+
+    所有棋盘保存在形状为 (n, rows * cols) 的 boards 数组中，
+    合成、生成、提示与结束判定都按整批数组运算完成。
+    """
+
+    def __init__(self, n, items_available=None, item_max_levels=None, seed=None,
+                 rows=ROWS, cols=COLS, spawn_params=None):
+        self.n = n
+        self.rows = rows
+        self.cols = cols
+        self.items_available = np.array(items_available or [1, 2, 3], dtype=np.int32)
+        self.item_max_levels = item_max_levels or {}
+        self.spawn_params = spawn_params or DEFAULT_SPAWN
+        self._level_rolls = np.array(self.spawn_params.level_rolls, dtype=np.float64)
+        self.rng = np.random.default_rng(seed)
+
+        max_item = int(self.items_available.max())
+        for item_id in self.item_max_levels:
+            max_item = max(max_item, int(item_id))
+        self.num_codes = (max_item + 1) << LEVEL_BITS
+
+        # 按道具查最高等级，按编码查是否还能继续合成
+        self._max_level = np.full(max_item + 1, 6, dtype=np.int32)
+        for item_id, max_lvl in self.item_max_levels.items():
+            if max_lvl > LEVEL_MASK:
+                raise ValueError(f"item {item_id} max level {max_lvl} exceeds {LEVEL_MASK}")
+            self._max_level[item_id] = max_lvl
+        codes = np.arange(self.num_codes)
+        lvls = codes & LEVEL_MASK
+        self._mergeable_code = (lvls > 0) & (lvls < self._max_level[codes >> LEVEL_BITS])
+
+        # 每个格子的上下左右邻居下标，越界为 -1
+        cells = np.arange(rows * cols)
+        r, c = cells // cols, cells % cols
+        self._neighbors = np.stack([
+            np.where(r > 0, cells - cols, -1),
+            np.where(r < rows - 1, cells + cols, -1),
+            np.where(c > 0, cells - 1, -1),
+            np.where(c < cols - 1, cells + 1, -1),
+        ], axis=1)
+
+        self.reset()
+
+    def reset(self):
+        n, cells = self.n, self.rows * self.cols
+        self.boards = np.zeros((n, cells), dtype=np.int32)
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.moves = np.zeros(n, dtype=np.int64)
+        # 等价于 random.sample：每局取随机排列的前 count 个格子
+        count = self.spawn_params.initial_count(cells)
+        order = np.argsort(self.rng.random((n, cells)), axis=1)[:, :count]
+        items = self.items_available[self.rng.integers(len(self.items_available), size=(n, count))]
+        np.put_along_axis(self.boards, order, encode(items, 1), axis=1)
+        self._counts = self._group_counts(self.boards)
+        self.game_over = ~self.can_merge()
+
+    def _group_counts(self, boards):
+        # 每局每种编码的数量，第 0 列即空格数
+        m = len(boards)
+        offsets = (np.arange(m) * self.num_codes)[:, None]
+        flat = np.bincount((boards + offsets).ravel(), minlength=m * self.num_codes)
+        return flat.reshape(m, self.num_codes)
+
+    def _random_pick(self, mask):
+        # 每行在 mask 为 True 的位置中等概率取一个下标
+        keys = self.rng.random(mask.shape)
+        keys[~mask] = -1.0
+        return keys.argmax(axis=1)
+
+    def _groups(self, rows=None):
+        counts = self._counts if rows is None else self._counts[rows]
+        return (counts >= 2) & self._mergeable_code
+
+    def can_merge(self):
+        return self._groups().any(axis=1)
+
+    def hints(self):
+        # 返回 (n, cells) 的提示序号数组，-1 表示无提示；同一局内同组同色
+        groups = self._groups()
+        rank = np.cumsum(groups, axis=1) - 1
+        hinted = np.take_along_axis(groups, self.boards, axis=1)
+        idx = np.take_along_axis(rank, self.boards, axis=1)
+        return np.where(hinted, idx, -1)
+
+    def random_moves(self):
+        # 为每个未结束的局随机挑一组可合并道具中的两个格子
+        rows = np.flatnonzero(~self.game_over)
+        if len(rows) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return rows, empty, empty
+        code = self._random_pick(self._groups(rows))
+        member = self.boards[rows] == code[:, None]
+        src = self._random_pick(member)
+        member[np.arange(len(rows)), src] = False
+        dst = self._random_pick(member)
+        return rows, src, dst
+
+    def merge(self, rows, src, dst):
+        # 在 rows 这些局上把 src 合成到 dst，返回每一步是否成功
+        rows = np.asarray(rows)
+        src = np.asarray(src)
+        dst = np.asarray(dst)
+        v1 = self.boards[rows, src]
+        v2 = self.boards[rows, dst]
+        ok = (v1 == v2) & (src != dst) & self._mergeable_code[v2] & ~self.game_over[rows]
+        rows, src, dst, code = rows[ok], src[ok], dst[ok], v2[ok]
+
+        self.boards[rows, dst] = code + 1
+        self.boards[rows, src] = 0
+        self.scores[rows] += ((code & LEVEL_MASK) + 1) * 10
+        self.moves[rows] += 1
+        self._counts[rows, code] -= 2
+        self._counts[rows, code + 1] += 1
+        self._counts[rows, 0] += 1
+
+        self.spawn(rows)
+        self.game_over[rows] = ~self._groups(rows).any(axis=1)
+        return ok
+
+    def spawn(self, rows):
+        # 与 spawn_smart_items(1) 相同：危险时优先复制邻居/场上的低级道具
+        rows = rows[self._counts[rows, 0] > 0]
+        if len(rows) == 0:
+            return
+        params = self.spawn_params
+        m = len(rows)
+        idx = np.arange(m)
+        boards = self.boards[rows]
+        n_empty = self._counts[rows, 0]
+        danger = (n_empty < params.danger_empty) | ~self._groups(rows).any(axis=1)
+
+        pos = self._random_pick(boards == 0)
+
+        nb = self._neighbors[pos]
+        nb_vals = np.where(nb >= 0, boards[idx[:, None], nb], 0)
+        nb_ok = (nb_vals > 0) & ((nb_vals & LEVEL_MASK) <= params.copy_max_level)
+        nb_val = nb_vals[idx, self._random_pick(nb_ok)]
+        pool_ok = (boards > 0) & ((boards & LEVEL_MASK) <= params.copy_max_level)
+        pool_val = boards[idx, self._random_pick(pool_ok)]
+        has_nb = nb_ok.any(axis=1)
+        use_danger = danger & (has_nb | pool_ok.any(axis=1))
+        danger_val = np.where(has_nb, nb_val, pool_val)
+
+        item = self.items_available[self.rng.integers(len(self.items_available), size=m)]
+        roll = self.rng.random(m)
+        lvl = 1 + np.searchsorted(self._level_rolls, roll, side="right")
+        lvl = np.minimum(lvl, np.minimum(self._max_level[item], params.max_roll_level))
+        val = np.where(use_danger, danger_val, encode(item, lvl))
+
+        self.boards[rows, pos] = val
+        self._counts[rows, 0] -= 1
+        self._counts[rows, val] += 1
+
+    def step(self):
+        # 所有未结束的局各随机合成一次，返回本步推进的局数
+        rows, src, dst = self.random_moves()
+        if len(rows) == 0:
+            return 0
+        return int(self.merge(rows, src, dst).sum())
+
+    def run(self, max_moves=10000):
+        for _ in range(max_moves):
+            if not self.step():
+                break
+        return {
+            "scores": self.scores.copy(),
+            "moves": self.moves.copy(),
+            "game_over": self.game_over.copy(),
+        }
+
+    def grid(self, i):
+        # 把第 i 局还原成 GameModel.grid 的格式，便于对照调试
+        out = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
+        for cell, code in enumerate(self.boards[i].tolist()):
+            if code:
+                out[cell // self.cols][cell % self.cols] = decode(code)
+        return out
@@ -0,0 +1,207 @@
+import hashlib
+import sys
+from array import array
+
+# 紧凑编码：item << LEVEL_BITS | level，0 表示空格
+LEVEL_BITS = 4
+LEVEL_MASK = (1 << LEVEL_BITS) - 1
+MAX_ITEM_ID = (1 << (16 - LEVEL_BITS)) - 1
+
+
+def encode(item_id, level):
+    return (item_id << LEVEL_BITS) | level
+
+
+def decode(code):
+    return code >> LEVEL_BITS, code & LEVEL_MASK
+
+
+# 编码 -> (item, level) 元组的缓存，避免每次读格子都新建元组
+_decoded = {0: 0}
+
+
+def to_value(code):
+    v = _decoded.get(code)
+    if v is None:
+        v = _decoded[code] = decode(code)
+    return v
+
+
+def to_code(v):
+    if not v:
+        return 0
+    item_id, level = v
+    if not (0 <= item_id <= MAX_ITEM_ID and 0 < level <= LEVEL_MASK):
+        raise ValueError(f"cell value {v!r} does not fit the packed encoding")
+    return (item_id << LEVEL_BITS) | level
+
+
+_MASK64 = (1 << 64) - 1
+_zobrist = {}
+
+
+def zobrist_key(idx, v):
+    # 格子 idx 上放着 v 时的 64 位随机键（splitmix64，按需缓存）；棋盘哈希为各格键的异或
+    key = (idx << 32) | (v[0] << 8) | v[1]
+    z = _zobrist.get(key)
+    if z is None:
+        x = (key + 0x9E3779B97F4A7C15) & _MASK64
+        x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+        z = _zobrist[key] = x ^ (x >> 31)
+    return z
+
+
+def _digest(data):
+    # 统一按小端序计算，保证不同平台得到相同结果
+    if sys.byteorder != "little":
+        data = array("H", data)
+        data.byteswap()
+    return hashlib.blake2b(data.tobytes(), digest_size=16).digest()
+
+
+class ListBoard:
+    """原始的列表套列表棋盘：空格为 0，其余为 (item, level)"""
+
+    __slots__ = ("rows", "cols", "cells")
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.cells = [[0 for _ in range(cols)] for _ in range(rows)]
+
+    def __getitem__(self, r):
+        return self.cells[r]
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __len__(self):
+        return self.rows
+
+    def __eq__(self, other):
+        return isinstance(other, ListBoard) and self.cells == other.cells
+
+    def __hash__(self):
+        return hash(tuple(map(tuple, self.cells)))
+
+    def get(self, r, c):
+        return self.cells[r][c]
+
+    def set(self, r, c, v):
+        self.cells[r][c] = v
+
+    def codes(self):
+        return array("H", [to_code(v) for row in self.cells for v in row])
+
+    @classmethod
+    def from_codes(cls, rows, cols, codes):
+        if len(codes) != rows * cols:
+            raise ValueError(f"expected {rows * cols} cells, got {len(codes)}")
+        board = cls(rows, cols)
+        for i, code in enumerate(codes):
+            if code:
+                board.cells[i // cols][i % cols] = to_value(code)
+        return board
+
+    def digest(self):
+        return _digest(self.codes())
+
+    def copy(self):
+        board = ListBoard.__new__(ListBoard)
+        board.rows = self.rows
+        board.cols = self.cols
+        board.cells = [row[:] for row in self.cells]
+        return board
+
+
+class _PackedRow:
+    __slots__ = ("data", "offset", "cols")
+
+    def __init__(self, data, offset, cols):
+        self.data = data
+        self.offset = offset
+        self.cols = cols
+
+    def __getitem__(self, c):
+        if not 0 <= c < self.cols:
+            raise IndexError(c)
+        return to_value(self.data[self.offset + c])
+
+    def __setitem__(self, c, v):
+        if not 0 <= c < self.cols:
+            raise IndexError(c)
+        self.data[self.offset + c] = to_code(v)
+
+    def __len__(self):
+        return self.cols
+
+    def __iter__(self):
+        for code in self.data[self.offset:self.offset + self.cols]:
+            yield to_value(code)
+
+
+class PackedBoard:
+    """每格一个 16 位整数的扁平棋盘。
+
+    读写接口与 ListBoard 相同（board[r][c] 仍返回 0 或 (item, level)），
+    复制、比较和哈希都直接作用在底层 array 上。
+    """
+
+    __slots__ = ("rows", "cols", "data")
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.data = array("H", bytes(2 * rows * cols))
+
+    def __getitem__(self, r):
+        if not 0 <= r < self.rows:
+            raise IndexError(r)
+        return _PackedRow(self.data, r * self.cols, self.cols)
+
+    def __iter__(self):
+        for r in range(self.rows):
+            yield self[r]
+
+    def __len__(self):
+        return self.rows
+
+    def __eq__(self, other):
+        return isinstance(other, PackedBoard) and self.cols == other.cols and self.data == other.data
+
+    def __hash__(self):
+        return hash(self.data.tobytes())
+
+    def get(self, r, c):
+        return to_value(self.data[r * self.cols + c])
+
+    def set(self, r, c, v):
+        self.data[r * self.cols + c] = to_code(v)
+
+    def codes(self):
+        return array("H", self.data)
+
+    @classmethod
+    def from_codes(cls, rows, cols, codes):
+        if len(codes) != rows * cols:
+            raise ValueError(f"expected {rows * cols} cells, got {len(codes)}")
+        board = cls(rows, cols)
+        board.data = array("H", codes)
+        return board
+
+    def digest(self):
+        return _digest(self.data)
+
+    def copy(self):
+        board = PackedBoard.__new__(PackedBoard)
+        board.rows = self.rows
+        board.cols = self.cols
+        board.data = array("H", self.data)
+        return board
+
+
+BOARD_BACKENDS = {
+    "list": ListBoard,
+    "packed": PackedBoard,
+}
@@ -1,8 +1,11 @@
+import os
 import pygame
 
 # 游戏配置
 ROWS = 6
 COLS = 6
+# 棋盘存储方式："list"（列表套列表）或 "packed"（扁平 16 位数组，适合大棋盘）
+BOARD_BACKEND = "list"
 TILE_SIZE = 60
 MARGIN = 12
 HEADER = 110
@@ -13,6 +16,11 @@ GRID_AREA_H = ROWS * TILE_SIZE + (ROWS + 1) * MARGIN
 WIDTH = GRID_AREA_W + 2 * MARGIN
 HEIGHT = HEADER + GRID_AREA_H + MARGIN
 FPS = 60
+# 空闲时阻塞等待事件的超时（毫秒），超时后仍会检查一次是否需要重绘
+IDLE_TIMEOUT_MS = 500
+# 单帧渲染预算（毫秒），超出后跳过下一帧渲染；最多连续跳过 MAX_FRAME_SKIP 帧
+FRAME_BUDGET_MS = 1000 / FPS
+MAX_FRAME_SKIP = 1
 
 # 颜色配置
 BG_COLOR = (250, 248, 239)
@@ -62,3 +70,60 @@ HINT_COLORS = [
     (255, 160, 122),
 ]
 HINT_ALPHA = 90
+
+# 道具生成参数（见 spawn.py）：
+#   SPAWN_LEVEL_ROLLS   随机生成时的等级分界，roll < 0.6 为 1 级、< 0.9 为 2 级，其余为 3 级
+#   SPAWN_DANGER_EMPTY  空格少于该数（或已无可合并）时进入危险模式，优先复制附近的低级道具；
+#                       每次合成空出一格又生成一格，空格数在开局后不变，需结合 INITIAL_FILL 调整
+#   SPAWN_COPY_MAX_LEVEL 危险模式下可被复制的最高等级
+#   INITIAL_FILL        开局时填入 1 级道具的格子比例
+SPAWN_LEVEL_ROLLS = (0.6, 0.9)
+SPAWN_DANGER_EMPTY = 5
+SPAWN_COPY_MAX_LEVEL = 3
+INITIAL_FILL = 1 / 3
+
+# 动画：合成时源道具滑向目标格、生成时弹出的时长（毫秒）；一次改动超过 ANIM_MAX_CHANGES 个格子
+# （重开、读档等）时不播放动画；渲染一帧超过 FRAME_BUDGET_MS 时直接跳到动画结束
+ANIMATIONS = True
+ANIM_SLIDE_MS = 120
+ANIM_POP_MS = 160
+ANIM_MAX_CHANGES = 8
+
+# 撤销历史每隔多少步保存一个完整棋盘关键帧；存档默认路径
+HISTORY_KEYFRAME_INTERVAL = 256
+SAVE_PATH = "save.m2s"
+
+# 自动对局（MCTS）每步的模拟次数与时间上限（秒）、单次模拟的最大步数、并行进程数
+SOLVER_ROLLOUTS = 400
+SOLVER_TIME_LIMIT = 0.3
+SOLVER_DEPTH = 40
+SOLVER_WORKERS = 1
+
+# 会话服务（server.py）：监听地址、空闲多久（秒）后回收会话、回收后保留复用的会话数、会话数上限
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SESSION_IDLE_TIMEOUT = 300
+SESSION_POOL_SIZE = 1024
+MAX_SESSIONS = 100000
+
+# 格子数达到该值的棋盘改用 NumPy 数组维护提示索引并批量比较渲染状态（需要 numpy，未安装时仍走逐格路径）
+HINT_ARRAY_MIN_CELLS = 1024
+
+# 对局结果存储（results.py）：每次整块写出的行数；max_level 列为道具 id 0..RESULTS_ITEM_SLOTS-1 预留的槽位数
+RESULTS_CHUNK_ROWS = 65536
+RESULTS_ITEM_SLOTS = 16
+
+# 热重载（main.py --watch）轮询素材目录与配置文件的间隔（秒）
+HOT_RELOAD_INTERVAL = 0.5
+
+# 渲染缓存容量（预合成的格子图 / 文字）
+TILE_CACHE_SIZE = 256
+TEXT_CACHE_SIZE = 64
+
+# 预缩放图集的缓存目录，由 tools/build_atlas.py 生成
+ATLAS_CACHE_DIR = os.path.join("assets", ".cache")
+# 界面字体按顺序查找，第一个存在的生效；解析出的字体文件路径缓存在 FONT_CACHE_PATH
+FONT_NAMES = ("microsoftyahei", "pingfangsc", "notosanscjksc", "wenquanyimicrohei", "simhei")
+FONT_CACHE_PATH = os.path.join(ATLAS_CACHE_DIR, "font.json")
+# 道具图片占用内存上限（字节）；图集超过上限时改为按需逐个加载
+ASSET_MEMORY_CAP = 64 * 1024 * 1024
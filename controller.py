@@ -1,42 +1,314 @@
+import os
 import sys
 import pygame
+import config
 from model import GameModel
 from view import GameView
-from config import FPS, ITEM_MAX_LEVELS
+from profiler import Profiler, StartupTimer
+from replay import ReplayRecorder
+from history import save_game, load_game
+from config import SAVE_PATH, FPS, IDLE_TIMEOUT_MS, FRAME_BUDGET_MS, MAX_FRAME_SKIP
+
+# 开启性能分析时计时的模型方法
+PROFILED_MODEL_METHODS = ("toggle_select", "merge", "spawn_smart_items", "update_hints")
 
 class GameController:
-    def __init__(self):
-        self.view = GameView()
+    def __init__(self, profile=False, trace_path=None, seed=None, record_path=None, connect=None, startup=None,
+                 results_path=None, watch=False):
+        # startup：启动计时，首帧画完后输出分解（--startup-profile）
+        self.startup = startup or StartupTimer()
+        self.view = GameView(startup=self.startup)
         # Initialize model with items found by view
         items = self.view.get_available_items()
-        detected_max = self.view.get_item_max_levels()
-        # 合并配置：优先生效 config 中的指定项
-        max_levels = dict(detected_max)
-        for k, v in ITEM_MAX_LEVELS.items():
-            max_levels[k] = v
-        self.model = GameModel(items_available=items, item_max_levels=max_levels)
+        max_levels = self.item_max_levels()
+        # 远程模式：游戏逻辑在会话服务上运行，本地只保留显示用的副本
+        self.remote = connect is not None
+        if self.remote:
+            # 远程与 AI 模块只在用到时导入，不拖慢普通启动
+            from remote import RemoteModel
+            host, _, port = connect.rpartition(":")
+            self.model = RemoteModel(host or "127.0.0.1", int(port), seed=seed)
+        else:
+            self.model = GameModel(items_available=items, item_max_levels=max_levels, seed=seed)
+            self.model.enable_history()
+        self.watch(self.model)
+        self.startup.mark("model")
         self.clock = pygame.time.Clock()
         self.running = True
+        # 游戏不使用鼠标移动事件，屏蔽后空闲时不会被频繁唤醒
+        pygame.event.set_blocked(pygame.MOUSEMOTION)
+        self.skipped_frames = 0
+        # 自上一帧以来模型是否有格子变化；有变化的帧不能跳过
+        self.model_changed = False
+
+        # 性能分析：F3 切换浮层，退出时可导出 Chrome trace
+        self.trace_path = trace_path
+        self.profiler = Profiler()
+        self.view.profiler = self.profiler
+        if profile or trace_path:
+            self.set_profiling(True)
+
+        # 回放录制：记录种子与每次点击，退出时写入文件
+        self.record_path = record_path
+        self.recorder = ReplayRecorder(self.model) if record_path and not self.remote else None
+
+        # 对局结果：每局结束（重开、读档、退出）时追加一行到列式结果存储
+        self.results = None
+        if results_path and not self.remote:
+            from results import ResultStore
+            self.results = ResultStore(results_path, "a")
+
+        # AI：H 键提示一步，A 键切换自动对局；首次使用时才创建。
+        # 搜索在后台线程里进行，search 为进行中的 (用途, 模型, 局面哈希, future)
+        self.solver = None
+        self.search_pool = None
+        self.search = None
+        self.autoplay = False
+
+        # 热重载：后台线程监视素材与配置文件，改动在两帧之间应用
+        self.watcher = None
+        if watch:
+            from hotreload import Watcher
+            config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.py")
+            self.watcher = Watcher(self.view.assets.asset_dir, config_path, self.view.assets.sources).start()
+
+    def item_max_levels(self):
+        # 从素材检测到的最高等级，config 中的指定项优先
+        max_levels = dict(self.view.get_item_max_levels())
+        max_levels.update(config.ITEM_MAX_LEVELS)
+        return max_levels
+
+    def watch(self, model):
+        self.view.watch(model)
+        getattr(model, "listeners", []).append(self.on_model_change)
+
+    def on_model_change(self, idx, old, new):
+        self.model_changed = True
+
+    def apply_reload(self):
+        # 返回是否应用了改动
+        images, values = self.watcher.take()
+        if images:
+            self.view.refresh_assets(self.view.assets.reload(images))
+            print("reloaded: " + ", ".join(sorted(images)))
+        if values:
+            for k, v in values.items():
+                setattr(config, k, v)
+            self.view.apply_config(values)
+            print("config reloaded: " + ", ".join(sorted(values)))
+        # 最高等级变化时原地更新模型并重建提示，棋盘与分数保持不变
+        if (images or "ITEM_MAX_LEVELS" in values) and not self.remote:
+            max_levels = self.item_max_levels()
+            if max_levels != self.model.item_max_levels:
+                # 回放头部记录的是开局时的最高等级，之后的点击在新规则下无法复现：
+                # 先把到目前为止的回放写出，然后停止录制
+                if self.recorder is not None:
+                    self.recorder.finish(self.model).save(self.record_path)
+                    print(f"replay recording stopped: item max levels changed (saved to {self.record_path})")
+                    self.recorder = None
+                self.model.item_max_levels = max_levels
+                self.model.update_hints()
+                self.model.game_over = not self.model.can_merge()
+        return bool(images or values)
+
+    def set_profiling(self, enabled):
+        if enabled == self.profiler.enabled:
+            return
+        self.profiler.enabled = enabled
+        if enabled:
+            self.profiler.instrument(GameModel, PROFILED_MODEL_METHODS)
+        else:
+            self.profiler.uninstrument()
+
+    def load(self, path):
+        try:
+            model = load_game(path)
+        except (OSError, ValueError) as e:
+            print("load failed:", e)
+            return
+        # 回放只能从种子开局重放，读档后无法继续录制
+        if self.recorder is not None:
+            print("replay recording stopped: a saved game was loaded")
+            self.recorder = None
+        self.record_result("quit")
+        self.model = model
+        self.watch(model)
+
+    def record_result(self, cause=None):
+        # 没走过一步的局不记录；cause 省略时按是否已结束取 no_merge / quit
+        if self.results is None or self.model.moves == 0:
+            return
+        from results import record_model
+        if self.model.game_over:
+            cause = None
+        record_model(self.results, self.model, cause, player="human")
+
+    def get_solver(self):
+        if self.solver is None:
+            from solver import Solver
+            self.solver = Solver()
+        return self.solver
+
+    def pick(self, pos):
+        if self.recorder is not None:
+            self.recorder.pick(pos)
+        self.model.toggle_select(pos)
+
+    def clear_selection(self):
+        # 通过点击取消选中，保证录制的回放能复现
+        for pos in list(self.model.selected):
+            self.pick(pos)
+
+    def start_search(self, kind):
+        # 在后台线程里搜索当前局面的副本，搜索期间照常处理输入与绘制；结果由之后的帧里的 poll_search 应用
+        if self.search is not None:
+            return
+        if self.search_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.search_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="solver")
+        state = self.model.clone()
+        future = self.search_pool.submit(self.get_solver().best_move, state)
+        self.search = (kind, self.model, state.zhash, future)
+
+    def poll_search(self):
+        kind, model, zhash, future = self.search
+        if not future.done():
+            return
+        self.search = None
+        move = future.result()
+        # 搜索期间局面变了（点击、撤销、重开或读档）：结果作废，自动对局下一帧重新搜索
+        if model is not self.model or model.zhash != zhash:
+            return
+        if kind == "hint":
+            # 选中最佳走法的第一个格子，玩家再点第二个即可合成
+            if move is not None:
+                self.clear_selection()
+                self.pick(move[0])
+        elif self.autoplay:
+            # 走法经 pick 执行，因此同样会被录制
+            if move is None:
+                self.autoplay = False
+                return
+            self.clear_selection()
+            for pos in move:
+                self.pick(pos)
+
+    def hint(self):
+        self.start_search("hint")
+
+    def auto_step(self):
+        # 自动对局每次搜索完成后走一步
+        if self.model.game_over:
+            self.autoplay = False
+            return
+        self.start_search("auto")
+
+    def wait_events(self):
+        # 有动画、自动对局、进行中的搜索或上一帧被跳过时按帧率轮询；否则阻塞等待输入，超时后也会刷新一次
+        # （动画只在 draw 中推进，跳过的帧必须尽快补画，不能等到输入超时）
+        if self.view.is_animating() or self.autoplay or self.search is not None or self.skipped_frames:
+            return pygame.event.get()
+        event = pygame.event.wait(IDLE_TIMEOUT_MS)
+        events = pygame.event.get()
+        if event.type != pygame.NOEVENT:
+            events.insert(0, event)
+        return events
 
     def run(self):
+        late = False
+        prof = self.profiler
         while self.running:
-            self.handle_events()
-            self.view.draw(self.model)
+            events = self.wait_events()
+            prof.frame_begin()
+            with prof.section("controller.handle_events"):
+                self.handle_events(events)
+            changed = bool(events)
+            if self.watcher is not None:
+                changed = self.apply_reload() or changed
+            if self.search is not None:
+                with prof.section("controller.poll_search"):
+                    self.poll_search()
+            if self.autoplay:
+                with prof.section("controller.auto_step"):
+                    self.auto_step()
+            changed = changed or self.model_changed
+            self.model_changed = False
+            frame_start = pygame.time.get_ticks()
+            # 上一帧超出预算时跳过本帧渲染，但连续跳帧不超过 MAX_FRAME_SKIP；
+            # 处理了输入或模型有变化的帧总是渲染，否则改动要等下一次唤醒才显示
+            if late and not changed and self.skipped_frames < MAX_FRAME_SKIP:
+                self.skipped_frames += 1
+            else:
+                self.skipped_frames = 0
+                self.view.draw(self.model)
+                if self.startup.enabled:
+                    self.startup.mark("first frame")
+                    self.startup.detail("font resolve", self.view.fonts.resolve_time)
+                    print(self.startup.report())
+                    self.startup.enabled = False
+            late = pygame.time.get_ticks() - frame_start > FRAME_BUDGET_MS
+            prof.frame_end()
             self.clock.tick(FPS)
         
+        if self.trace_path:
+            self.profiler.export_trace(self.trace_path)
+        if self.recorder is not None:
+            self.recorder.finish(self.model).save(self.record_path)
+        if self.results is not None:
+            self.record_result()
+            self.results.close()
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self.search_pool is not None:
+            self.search_pool.shutdown()
+        if self.solver is not None:
+            self.solver.close()
+        if self.remote:
+            self.model.close()
         pygame.quit()
         sys.exit()
 
-    def handle_events(self):
-        for event in pygame.event.get():
+    def handle_events(self, events=None):
+        if events is None:
+            events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.running = False
                 elif event.key == pygame.K_r:
+                    if self.recorder is not None:
+                        self.recorder.reset()
+                    self.record_result("reset")
                     self.model.reset()
+                elif event.key == pygame.K_z:
+                    if self.recorder is not None:
+                        self.recorder.undo()
+                    self.model.undo()
+                elif event.key == pygame.K_y:
+                    if self.recorder is not None:
+                        self.recorder.redo()
+                    self.model.redo()
+                elif event.key in (pygame.K_F5, pygame.K_F9, pygame.K_h, pygame.K_a) and self.remote:
+                    print("not available when connected to a server")
+                elif event.key == pygame.K_F5:
+                    save_game(self.model, SAVE_PATH)
+                elif event.key == pygame.K_F9:
+                    self.load(SAVE_PATH)
+                elif event.key == pygame.K_F3:
+                    if not self.profiler.enabled:
+                        self.set_profiling(True)
+                    self.view.toggle_profiler()
+                elif event.key == pygame.K_h:
+                    self.hint()
+                elif event.key == pygame.K_a:
+                    self.autoplay = not self.autoplay
+            elif event.type == pygame.VIDEORESIZE:
+                self.view.resize(event.w, event.h)
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.view.invalidate()
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 pos = self.view.cell_at(*event.pos)
                 if pos is not None:
-                    self.model.toggle_select(pos)
+                    self.pick(pos)
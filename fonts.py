@@ -0,0 +1,59 @@
+import json
+import os
+import time
+import pygame
+from config import FONT_NAMES, FONT_CACHE_PATH
+
+
+def resolve_font(names=FONT_NAMES, bold=True, cache_path=FONT_CACHE_PATH):
+    # 返回 (字体文件路径或 None, 是否需要模拟粗体)。
+    # 查找系统字体要枚举全部字体（Linux 上调用 fc-list），结果写入磁盘缓存，之后启动直接读取；
+    # 缓存的文件不存在或字体名单改变时重新查找，安装新字体后删除缓存文件即可
+    key = ",".join(names) + (":bold" if bold else "")
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        path = cached["path"]
+        if cached["key"] == key and (path is None or os.path.isfile(path)):
+            return path, cached["synthetic_bold"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    path = pygame.font.match_font(names, bold=bold)
+    # 找到的是常规字重时与 SysFont 一样用模拟粗体
+    synthetic_bold = bold and (path is None or path == pygame.font.match_font(names))
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp = cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "path": path, "synthetic_bold": synthetic_bold}, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass
+    return path, synthetic_bold
+
+
+class FontSource:
+    """按像素大小创建并缓存字体对象；字体文件在第一次创建字体时才解析"""
+
+    def __init__(self, names=FONT_NAMES, bold=True):
+        self.names = names
+        self.bold = bold
+        self.path = None
+        self.synthetic_bold = False
+        self.resolved = False
+        self.resolve_time = 0.0
+        self._fonts = {}
+
+    def get(self, size):
+        f = self._fonts.get(size)
+        if f is None:
+            if not self.resolved:
+                start = time.perf_counter()
+                self.path, self.synthetic_bold = resolve_font(self.names, self.bold)
+                self.resolve_time = time.perf_counter() - start
+                self.resolved = True
+            f = self._fonts[size] = pygame.font.Font(self.path, size)
+            if self.synthetic_bold:
+                f.set_bold(True)
+        return f
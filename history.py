@@ -0,0 +1,245 @@
+import struct
+import sys
+from array import array
+from board import to_code, to_value
+from config import HISTORY_KEYFRAME_INTERVAL
+
+
+class History:
+    """按步记录每次合成改动过的格子，支持撤销、重做与跳转。
+
+    每个改动存为三个整数（格子下标、旧编码、新编码），第 i 步的改动位于
+    cells[offsets[i]:offsets[i + 1]]，分数变化存在 score_deltas[i]。
+    每隔 interval 步另存一份完整棋盘作为关键帧，用于快速跳转。
+    """
+
+    def __init__(self, model, interval=HISTORY_KEYFRAME_INTERVAL):
+        self.interval = interval
+        self.clear(model)
+
+    def clear(self, model):
+        self.cells = array("i")
+        self.offsets = array("i", [0])
+        self.score_deltas = array("i")
+        self.keyframes = {0: (model.score, model.grid.codes())}
+        self.pos = 0
+        self._open = False
+        self._applying = False
+
+    def __len__(self):
+        return len(self.score_deltas)
+
+    def can_undo(self):
+        return self.pos > 0
+
+    def can_redo(self):
+        return self.pos < len(self.score_deltas)
+
+    def record(self, idx, old, new):
+        # 由 GameModel._set_cell 调用；撤销/重做自身的写入不记录
+        if self._applying:
+            return
+        if not self._open:
+            self._begin()
+        self.cells.extend((idx, to_code(old), to_code(new)))
+
+    def _begin(self):
+        # 新的一步开始时丢弃可重做的部分
+        if self.pos < len(self.score_deltas):
+            del self.cells[self.offsets[self.pos]:]
+            del self.offsets[self.pos + 1:]
+            del self.score_deltas[self.pos:]
+            for k in [k for k in self.keyframes if k > self.pos]:
+                del self.keyframes[k]
+        self._open = True
+
+    def commit(self, model, score_delta):
+        if not self._open:
+            self._begin()
+        self._open = False
+        self.offsets.append(len(self.cells))
+        self.score_deltas.append(score_delta)
+        self.pos += 1
+        if self.pos % self.interval == 0:
+            self.keyframes[self.pos] = (model.score, model.grid.codes())
+
+    def _apply(self, model, step, forward):
+        start, end = self.offsets[step], self.offsets[step + 1]
+        cols = model.cols
+        self._applying = True
+        try:
+            if forward:
+                for i in range(start, end, 3):
+                    idx = self.cells[i]
+                    model._set_cell(idx // cols, idx % cols, to_value(self.cells[i + 2]))
+                model.score += self.score_deltas[step]
+                model.moves += 1
+            else:
+                for i in range(end - 3, start - 3, -3):
+                    idx = self.cells[i]
+                    model._set_cell(idx // cols, idx % cols, to_value(self.cells[i + 1]))
+                model.score -= self.score_deltas[step]
+                model.moves -= 1
+        finally:
+            self._applying = False
+        model.selected = []
+        model.game_over = not model.can_merge()
+
+    def undo(self, model):
+        if not self.can_undo():
+            return False
+        self.pos -= 1
+        self._apply(model, self.pos, False)
+        return True
+
+    def redo(self, model):
+        if not self.can_redo():
+            return False
+        self._apply(model, self.pos, True)
+        self.pos += 1
+        return True
+
+    def seek(self, model, step):
+        # 跳到第 step 步之后的局面；距离较远时先载入最近的关键帧
+        step = max(0, min(step, len(self.score_deltas)))
+        key = max(k for k in self.keyframes if k <= step)
+        if step - key + model.rows * model.cols // 16 < abs(self.pos - step):
+            score, codes = self.keyframes[key]
+            model.grid = model.board_cls.from_codes(model.rows, model.cols, codes)
+            model.update_hints()
+            model.score = score
+            model.moves -= self.pos - key
+            model.selected = []
+            model.game_over = not model.can_merge()
+            self.pos = key
+        while self.pos < step:
+            self.redo(model)
+        while self.pos > step:
+            self.undo(model)
+
+
+# 存档格式（小端序）：
+#   MAGIC | u8 版本 | u16 行 | u16 列 | u64 种子 | u64 分数
+#   u16 道具数 | u16 道具 id... | u16 最高等级项数 | (u16 道具 id, u8 等级)...
+#   生成参数（SpawnParams.pack，版本 2 起；版本 1 的存档按默认参数读入）
+#   随机数状态：u8 版本 | 625 × u32 | u8 是否有 gauss | f64 gauss
+#   当前棋盘：rows × cols 个 u16 编码
+#   历史：u32 关键帧间隔 | u32 当前步 | u32 步数 | u32 改动数
+#         (步数 + 1) × u32 偏移 | 步数 × i32 分数变化 | 改动数 × i32
+#         u32 关键帧数 | (u32 步, u64 分数, rows × cols × u16)...
+SAVE_MAGIC = b"M2SV"
+SAVE_VERSION = 2
+
+
+def _le(data):
+    if sys.byteorder != "little":
+        data = array(data.typecode, data)
+        data.byteswap()
+    return data.tobytes()
+
+
+def _read_array(typecode, data, off, count):
+    arr = array(typecode)
+    size = arr.itemsize * count
+    arr.frombytes(data[off:off + size])
+    if sys.byteorder != "little":
+        arr.byteswap()
+    if len(arr) != count:
+        raise ValueError("truncated save file")
+    return arr, off + size
+
+
+def save_game(model, path):
+    history = model.history
+    parts = [SAVE_MAGIC, struct.pack("<BHHQQ", SAVE_VERSION, model.rows, model.cols, model.seed, model.score)]
+    parts.append(struct.pack(f"<H{len(model.items_available)}H", len(model.items_available), *model.items_available))
+    parts.append(struct.pack("<H", len(model.item_max_levels)))
+    for item_id, lvl in sorted(model.item_max_levels.items()):
+        parts.append(struct.pack("<HB", item_id, lvl))
+    parts.append(model.spawn_params.pack())
+    version, state, gauss = model.rng.getstate()
+    parts.append(struct.pack(f"<B{len(state)}IBd", version, *state, gauss is not None, gauss or 0.0))
+    parts.append(_le(model.grid.codes()))
+    if history is None:
+        parts.append(struct.pack("<IIII", HISTORY_KEYFRAME_INTERVAL, 0, 0, 0))
+        parts.append(_le(array("i", [0])))
+        parts.append(struct.pack("<I", 0))
+    else:
+        parts.append(struct.pack("<IIII", history.interval, history.pos, len(history), len(history.cells)))
+        parts.append(_le(history.offsets))
+        parts.append(_le(history.score_deltas))
+        parts.append(_le(history.cells))
+        parts.append(struct.pack("<I", len(history.keyframes)))
+        for step, (score, codes) in sorted(history.keyframes.items()):
+            parts.append(struct.pack("<IQ", step, score))
+            parts.append(_le(codes))
+    with open(path, "wb") as f:
+        f.write(b"".join(parts))
+
+
+def load_game(path, backend=None):
+    from model import GameModel
+    from spawn import SpawnParams
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != SAVE_MAGIC:
+        raise ValueError("not a save file")
+    version, rows, cols, seed, score = struct.unpack_from("<BHHQQ", data, 4)
+    if version not in (1, SAVE_VERSION):
+        raise ValueError(f"unsupported save version {version}")
+    off = 4 + struct.calcsize("<BHHQQ")
+    (n_items,) = struct.unpack_from("<H", data, off)
+    items = list(struct.unpack_from(f"<{n_items}H", data, off + 2))
+    off += 2 + 2 * n_items
+    (n_levels,) = struct.unpack_from("<H", data, off)
+    off += 2
+    max_levels = {}
+    for _ in range(n_levels):
+        item_id, lvl = struct.unpack_from("<HB", data, off)
+        max_levels[item_id] = lvl
+        off += 3
+    spawn_params = None
+    if version >= 2:
+        spawn_params, off = SpawnParams.unpack_from(data, off)
+    rng_fmt = "<B625IBd"
+    rng_fields = struct.unpack_from(rng_fmt, data, off)
+    off += struct.calcsize(rng_fmt)
+    cells = rows * cols
+    codes, off = _read_array("H", data, off, cells)
+
+    model = GameModel(items, max_levels, rows=rows, cols=cols, backend=backend, seed=seed,
+                      spawn_params=spawn_params)
+    model.grid = model.board_cls.from_codes(rows, cols, codes)
+    model.update_hints()
+    # 存档不单独保存各道具达到过的最高等级，取当前棋盘与历史中写入过的值
+    model.peak_levels = model.board_max_levels()
+    model.score = score
+    model.game_over = not model.can_merge()
+    gauss = rng_fields[-1] if rng_fields[-2] else None
+    model.rng.setstate((rng_fields[0], tuple(rng_fields[1:626]), gauss))
+
+    interval, pos, n_steps, n_cells = struct.unpack_from("<IIII", data, off)
+    off += 16
+    history = History(model, interval)
+    history.offsets, off = _read_array("i", data, off, n_steps + 1)
+    if n_steps:
+        history.score_deltas, off = _read_array("i", data, off, n_steps)
+        history.cells, off = _read_array("i", data, off, n_cells)
+    (n_keyframes,) = struct.unpack_from("<I", data, off)
+    off += 4
+    if n_keyframes:
+        history.keyframes = {}
+    for _ in range(n_keyframes):
+        step, kf_score = struct.unpack_from("<IQ", data, off)
+        kf_codes, off = _read_array("H", data, off + 12, cells)
+        history.keyframes[step] = (kf_score, kf_codes)
+    history.pos = pos
+    for code in history.cells[2::3]:
+        v = to_value(code)
+        if v and v[1] > model.peak_levels.get(v[0], 0):
+            model.peak_levels[v[0]] = v[1]
+    # 存档不单独保存步数；历史从开局记录，步数即历史位置
+    model.moves = pos
+    model.history = history
+    return model
@@ -0,0 +1,114 @@
+import os
+import runpy
+import threading
+import pygame
+import atlas
+from config import HOT_RELOAD_INTERVAL
+
+# 修改后可以直接生效的配置项：颜色、等级名称与道具最高等级；其余配置项（棋盘尺寸等）仍需重启
+CONFIG_KEYS = (
+    "ITEM_MAX_LEVELS", "TILE_COLORS", "HINT_COLORS", "HINT_ALPHA", "LEVEL_NAMES",
+    "BG_COLOR", "GRID_BG", "EMPTY_COLOR", "TEXT_COLOR_DARK", "TEXT_COLOR_LIGHT", "SCORE_BG",
+    "SELECTED_BORDER_COLOR", "OVERLAY_COLOR", "MAXED_TILE_BG",
+)
+# 有改动待应用时投递的事件，唤醒空闲中的主循环
+RELOAD_EVENT = pygame.event.custom_type()
+
+
+def _simple_values(namespace):
+    # 配置文件中可比较的大写常量
+    return {k: v for k, v in namespace.items()
+            if k.isupper() and isinstance(v, (int, float, str, tuple, list, dict, bool))}
+
+
+class Watcher:
+    """后台线程轮询素材目录与配置文件的修改时间，只重新读取变化的部分。
+
+    线程里完成扫描、图片解码和配置文件执行；结果交给主线程在两帧之间用 take() 取走应用，
+    主线程不会被文件读取阻塞。
+    """
+
+    def __init__(self, asset_dir, config_path, sources, interval=HOT_RELOAD_INTERVAL):
+        self.asset_dir = asset_dir
+        self.config_path = config_path
+        self.interval = interval
+        self.sources = dict(sources)
+        self.config_mtime = self._config_mtime()
+        self.config_values = _simple_values(runpy.run_path(config_path)) if self.config_mtime else {}
+        self._lock = threading.Lock()
+        self._images = {}
+        self._config = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hot-reload", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _config_mtime(self):
+        try:
+            return os.stat(self.config_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            changed = self.poll()
+            if changed:
+                # 主线程可能正阻塞在 event.wait 上，投递一个事件让它尽快应用改动
+                pygame.event.post(pygame.event.Event(RELOAD_EVENT))
+
+    def poll(self):
+        # 检查一次；返回是否有新的改动待应用
+        found = False
+        sources = atlas.scan_sources(self.asset_dir)
+        if sources != self.sources:
+            images = {}
+            for key, info in sources.items():
+                if self.sources.get(key) != info:
+                    images[key] = (info, self._decode(info[0]))
+            for key in self.sources.keys() - sources.keys():
+                images[key] = (None, None)
+            self.sources = sources
+            with self._lock:
+                self._images.update(images)
+            found = True
+
+        mtime = self._config_mtime()
+        if mtime != self.config_mtime:
+            self.config_mtime = mtime
+            try:
+                values = _simple_values(runpy.run_path(self.config_path))
+            except Exception as e:
+                # 编辑到一半的配置文件可能无法执行，保存下一版时再试
+                print(f"config reload failed: {e}")
+                return found
+            changed = {k: v for k, v in values.items() if self.config_values.get(k) != v}
+            self.config_values = values
+            ignored = sorted(k for k in changed if k not in CONFIG_KEYS)
+            if ignored:
+                print("config changed, restart to apply: " + ", ".join(ignored))
+            changed = {k: v for k, v in changed.items() if k in CONFIG_KEYS}
+            if changed:
+                with self._lock:
+                    self._config.update(changed)
+                found = True
+        return found
+
+    def _decode(self, name):
+        # 只解码，不 convert：convert_alpha 需要在主线程调用
+        try:
+            return pygame.image.load(os.path.join(self.asset_dir, name))
+        except Exception:
+            return None
+
+    def take(self):
+        # 取走已准备好的改动：({key: (文件信息或 None, Surface 或 None)}, {配置项: 新值})
+        with self._lock:
+            images, self._images = self._images, {}
+            config, self._config = self._config, {}
+        return images, config
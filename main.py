@@ -1,5 +1,28 @@
+import time
+# 启动计时从导入模块之前开始
+START = time.perf_counter()
+
+import argparse
 from controller import GameController
+from profiler import StartupTimer
 
 if __name__ == "__main__":
-    controller = GameController()
+    parser = argparse.ArgumentParser(description="二合")
+    parser.add_argument("--profile", action="store_true", help="启动时开启性能分析（F3 显示浮层）")
+    parser.add_argument("--trace", metavar="FILE", help="退出时把性能分析结果导出为 Chrome trace JSON")
+    parser.add_argument("--seed", type=int, help="随机种子，相同种子和操作可复现整局")
+    parser.add_argument("--record", metavar="FILE", help="退出时把本局写成回放文件")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="连接 server.py 会话服务，游戏逻辑在服务端运行")
+    parser.add_argument("--results", metavar="DIR", help="每局结束时把结果追加到列式结果存储（tools/query.py 查询）")
+    parser.add_argument("--watch", action="store_true", help="热重载：assets/ 中的图片与 config.py 的颜色、最高等级修改后立即生效")
+    parser.add_argument("--startup-profile", action="store_true", help="输出启动到首帧的各阶段耗时")
+    args = parser.parse_args()
+
+    startup = StartupTimer(args.startup_profile, START)
+    startup.mark("imports")
+
+    controller = GameController(profile=args.profile, trace_path=args.trace,
+                                seed=args.seed, record_path=args.record, connect=args.connect,
+                                startup=startup, results_path=args.results,
+                                watch=args.watch)
     controller.run()
@@ -1,73 +1,271 @@
 import random
-from config import ROWS, COLS
+from bisect import bisect_left, insort
+from board import BOARD_BACKENDS, LEVEL_BITS, LEVEL_MASK, to_code, zobrist_key
+from history import History
+from spawn import DEFAULT_SPAWN
+from config import ROWS, COLS, BOARD_BACKEND, HINT_ARRAY_MIN_CELLS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class CellSet:
+    """按坐标排序的格子集合：二分查找定位增删，随机抽取 O(1)。
+
+    抽取结果只取决于集合的内容，与增删的先后无关；读档、撤销或跳转后得到同样的棋盘时，
+    从同一随机数状态继续生成的结果也相同。
+    """
+
+    __slots__ = ("items", "members")
+
+    def __init__(self, cells=()):
+        self.members = set(cells)
+        self.items = sorted(self.members)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, pos):
+        return pos in self.members
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, pos):
+        if pos not in self.members:
+            self.members.add(pos)
+            insort(self.items, pos)
+
+    def discard(self, pos):
+        if pos in self.members:
+            self.members.remove(pos)
+            del self.items[bisect_left(self.items, pos)]
+
+    def choice(self, rng):
+        return rng.choice(self.items)
+
+    def copy(self):
+        other = CellSet.__new__(CellSet)
+        other.items = list(self.items)
+        other.members = set(self.members)
+        return other
+
 
 class GameModel:
-    def __init__(self, items_available=None, item_max_levels=None):
-        self.grid = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+    __slots__ = (
+        "rows", "cols", "board_cls", "grid", "score", "moves", "game_over", "selected", "seed", "rng",
+        "items_available", "item_max_levels", "spawn_params", "hints",
+        "_groups", "_mergeable", "_hint_slots", "_empty", "_low", "history",
+        "zhash", "listeners", "code_array", "hint_array", "peak_levels",
+    )
+
+    def __init__(self, items_available=None, item_max_levels=None, rows=ROWS, cols=COLS, backend=None,
+                 seed=None, spawn_params=None):
+        # 每个模型使用自己的随机数发生器，给定种子即可完整复现一局
+        self.seed = random.randrange(2 ** 63) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.rows = rows
+        self.cols = cols
+        # 棋盘存储方式："list" 为列表套列表，"packed" 为扁平 16 位数组
+        self.board_cls = BOARD_BACKENDS[backend or BOARD_BACKEND]
+        self.grid = self.board_cls(rows, cols)
         self.score = 0
+        # 成功合成的步数（撤销时回退）
+        self.moves = 0
         self.game_over = False
         self.selected = []
         self.items_available = items_available or [1, 2, 3]
         self.item_max_levels = item_max_levels or {}
-        self.hints = {}
+        self.spawn_params = spawn_params or DEFAULT_SPAWN
+        self.history = None
+        # 本局每种道具出现过的最高等级；只在写格子时增大，撤销不会降低
+        self.peak_levels = {}
+        # 格子变化回调 fn(idx, old, new)，供网络会话计算差量等外部观察者使用
+        self.listeners = []
+        # 大棋盘额外维护扁平的编码数组与提示序号数组（-1 为无提示），全量重建索引与渲染时按数组批量处理
+        if np is not None and rows * cols >= HINT_ARRAY_MIN_CELLS:
+            self.code_array = np.zeros(rows * cols, dtype=np.uint16)
+            self.hint_array = np.full(rows * cols, -1, dtype=np.int16)
+        else:
+            self.code_array = self.hint_array = None
+        self.update_hints()
         self._init_grid()
 
     def _init_grid(self):
-        all_cells = [(r, c) for r in range(ROWS) for c in range(COLS)]
-        count = (ROWS * COLS) // 3
-        for r, c in random.sample(all_cells, count):
-            item = random.choice(self.items_available)
-            self.grid[r][c] = (item, 1)
-        self.update_hints()
+        all_cells = [(r, c) for r in range(self.rows) for c in range(self.cols)]
+        count = self.spawn_params.initial_count(len(all_cells))
+        for r, c in self.rng.sample(all_cells, count):
+            item = self.rng.choice(self.items_available)
+            self._set_cell(r, c, (item, 1))
+
+    def _set_cell(self, r, c, v):
+        # 所有写格子的操作都经过这里，保证索引与 grid 同步
+        old = self.grid.get(r, c)
+        if old == v:
+            return
+        pos = (r, c)
+        idx = r * self.cols + c
+        if old:
+            self._index_remove(pos, old)
+            self.zhash ^= zobrist_key(idx, old)
+        else:
+            self._empty.discard(pos)
+        self.grid.set(r, c, v)
+        if v:
+            self._index_add(pos, v)
+            self.zhash ^= zobrist_key(idx, v)
+            if v[1] > self.peak_levels.get(v[0], 0):
+                self.peak_levels[v[0]] = v[1]
+        else:
+            self._empty.add(pos)
+        if self.code_array is not None:
+            self.code_array[idx] = to_code(v)
+        if self.history is not None:
+            self.history.record(idx, old, v)
+        for fn in self.listeners:
+            fn(idx, old, v)
+
+    def _index_add(self, pos, v):
+        if v[1] <= self.spawn_params.copy_max_level:
+            self._low.add(pos)
+        cells = self._groups.get(v)
+        if cells is None:
+            cells = self._groups[v] = set()
+        cells.add(pos)
+        idx = self._mergeable.get(v)
+        if idx is not None:
+            self.hints[pos] = idx
+            if self.hint_array is not None:
+                self.hint_array[pos[0] * self.cols + pos[1]] = idx
+        elif len(cells) >= 2 and v[1] < self.item_max_levels.get(v[0], 6):
+            self._mark_mergeable(v, cells)
+
+    def _index_remove(self, pos, v):
+        if v[1] <= self.spawn_params.copy_max_level:
+            self._low.discard(pos)
+        cells = self._groups[v]
+        cells.discard(pos)
+        if v in self._mergeable:
+            self.hints.pop(pos, None)
+            if self.hint_array is not None:
+                self.hint_array[pos[0] * self.cols + pos[1]] = -1
+            if len(cells) < 2:
+                self._unmark_mergeable(v, cells)
+        if not cells:
+            del self._groups[v]
+
+    def _mark_mergeable(self, v, cells):
+        # 复用最小的空闲颜色序号，已有组的颜色保持不变
+        slots = self._hint_slots
+        try:
+            idx = slots.index(None)
+            slots[idx] = v
+        except ValueError:
+            idx = len(slots)
+            slots.append(v)
+        self._mergeable[v] = idx
+        for pos in cells:
+            self.hints[pos] = idx
+        if self.hint_array is not None:
+            self.hint_array[[r * self.cols + c for r, c in cells]] = idx
+
+    def _unmark_mergeable(self, v, cells):
+        idx = self._mergeable.pop(v)
+        self._hint_slots[idx] = None
+        while self._hint_slots and self._hint_slots[-1] is None:
+            self._hint_slots.pop()
+        for pos in cells:
+            self.hints.pop(pos, None)
+        if self.hint_array is not None and cells:
+            self.hint_array[[r * self.cols + c for r, c in cells]] = -1
 
     def empty_cells(self):
-        return [(r, c) for r in range(ROWS) for c in range(COLS) if self.grid[r][c] == 0]
+        # 空格列表（按坐标排序）
+        return list(self._empty.items)
 
     def can_merge(self):
-        counts = {}
-        for r in range(ROWS):
-            for c in range(COLS):
-                v = self.grid[r][c]
-                if isinstance(v, tuple):
-                    item_id, lvl = v
-                    max_lvl = self.item_max_levels.get(item_id, 6)
-                    # 只有当道具未达到最高等级时，才考虑是否可以合并
-                    if lvl < max_lvl:
-                        counts[v] = counts.get(v, 0) + 1
-        # 如果有任何一种可合并的道具数量大于等于2，则返回True
-        return any(cnt >= 2 for cnt in counts.values())
+        # 只要存在一种未满级且数量>=2的道具即可合并
+        return bool(self._mergeable)
 
     def update_hints(self):
-        groups = {}
-        # 先统计所有可合并的道具（未达到最高等级且数量>=2）
-        for r in range(ROWS):
-            for c in range(COLS):
-                v = self.grid[r][c]
-                if isinstance(v, tuple):
-                    item_id, lvl = v
-                    max_lvl = self.item_max_levels.get(item_id, 6)
-                    if lvl < max_lvl:
-                        groups[v] = groups.get(v, 0) + 1
-        
-        # 只保留可以合并的道具组
-        keys = [k for k, cnt in groups.items() if cnt >= 2]
-        key_to_idx = {}
-        for i, k in enumerate(keys):
-            key_to_idx[k] = i
-        
-        hints = {}
-        if keys:
-            # 为每个可以合并的道具标记提示颜色
-            for r in range(ROWS):
-                for c in range(COLS):
-                    v = self.grid[r][c]
-                    if isinstance(v, tuple) and v in key_to_idx:
-                        item_id, lvl = v
-                        max_lvl = self.item_max_levels.get(item_id, 6)
-                        if lvl < max_lvl:
-                            hints[(r, c)] = key_to_idx[v]
-        
-        self.hints = hints
+        # 全量重建索引；仅在外部修改了 grid 或 item_max_levels 后需要调用
+        # 增量索引：(item, lvl) -> 所在格子集合；可合并组 -> 提示颜色序号；
+        # 空格集合与可被复制的低级道具所在格子集合（供生成时 O(1) 抽取）
+        self._groups = {}
+        self._mergeable = {}
+        self._hint_slots = []
+        self._empty = CellSet()
+        self._low = CellSet()
+        self.hints = {}
+        # 棋盘的 Zobrist 哈希，之后由 _set_cell 增量维护
+        self.zhash = 0
+        if self.code_array is not None:
+            self._rebuild_arrays()
+            return
+        get = self.grid.get
+        for r in range(self.rows):
+            for c in range(self.cols):
+                v = get(r, c)
+                if v:
+                    self._index_add((r, c), v)
+                    self.zhash ^= zobrist_key(r * self.cols + c, v)
+                else:
+                    self._empty.add((r, c))
+
+    def _rebuild_arrays(self):
+        # update_hints 的 NumPy 版本：按编码排序分组，一次算出全部索引，结果（含分组与提示序号的顺序）
+        # 与逐格扫描完全相同
+        cols = self.cols
+        codes = self.code_array
+        codes[:] = self.grid.codes()
+        self.hint_array.fill(-1)
+        levels = codes & LEVEL_MASK
+        flat = np.arange(len(codes))
+        rows_of, cols_of = (flat // cols).tolist(), (flat % cols).tolist()
+
+        def cells(idxs):
+            return [(rows_of[i], cols_of[i]) for i in idxs.tolist()]
+
+        filled = codes != 0
+        self._empty = CellSet(cells(np.flatnonzero(~filled)))
+        self._low = CellSet(cells(np.flatnonzero(filled & (levels <= self.spawn_params.copy_max_level))))
+
+        nz = np.flatnonzero(filled)
+        if not len(nz):
+            return
+        order = nz[np.argsort(codes[nz], kind="stable")]
+        uniq, starts, counts = np.unique(codes[order], return_index=True, return_counts=True)
+        # 每种道具的最高等级查表
+        items = uniq >> LEVEL_BITS
+        max_levels = np.full(int(items.max()) + 1, 6, dtype=np.int64)
+        for item, lvl in self.item_max_levels.items():
+            if item < len(max_levels):
+                max_levels[item] = lvl
+        mergeable = (counts >= 2) & ((uniq & LEVEL_MASK) < max_levels[items])
+
+        members = np.split(order, starts[1:])
+        values = [(int(code) >> LEVEL_BITS, int(code) & LEVEL_MASK) for code in uniq.tolist()]
+        # 分组按首次出现的顺序插入；可合并组按第二个成员出现的顺序分配提示序号
+        for i in np.argsort(order[starts], kind="stable").tolist():
+            self._groups[values[i]] = set(cells(members[i]))
+        merge_ids = np.flatnonzero(mergeable)
+        for slot, i in enumerate(merge_ids[np.argsort(order[starts[merge_ids] + 1], kind="stable")].tolist()):
+            v = values[i]
+            self._mergeable[v] = slot
+            self._hint_slots.append(v)
+            self.hint_array[members[i]] = slot
+            for pos in self._groups[v]:
+                self.hints[pos] = slot
+
+        # Zobrist 哈希：与 board.zobrist_key 相同的 splitmix64，按 uint64 回绕运算
+        key = (nz.astype(np.uint64) << np.uint64(32)) | ((codes[nz] >> LEVEL_BITS).astype(np.uint64) << np.uint64(8)) \
+            | levels[nz].astype(np.uint64)
+        x = key + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+        self.zhash = int(np.bitwise_xor.reduce(x))
 
     def toggle_select(self, pos):
         r, c = pos
@@ -94,13 +292,12 @@ class GameModel:
     def merge(self, a, b):
         r1, c1 = a
         r2, c2 = b
-        v1 = self.grid[r1][c1]
-        v2 = self.grid[r2][c2]
+        v1 = self.grid.get(r1, c1)
+        v2 = self.grid.get(r2, c2)
         
-        if isinstance(v1, tuple) and isinstance(v2, tuple):
-            item1, lvl1 = v1
+        if v1 and v2:
             item2, lvl2 = v2
-            if item1 == item2 and lvl1 == lvl2:
+            if v1 == v2:
                 next_lvl = lvl2 + 1
                 max_lvl = self.item_max_levels.get(item2, 6)
                 if next_lvl > max_lvl:
@@ -108,25 +305,27 @@ class GameModel:
                     self.selected = [b]
                     return False
                 new_v = (item2, next_lvl)
-                self.grid[r2][c2] = new_v
-                self.grid[r1][c1] = 0
+                self._set_cell(r2, c2, new_v)
+                self._set_cell(r1, c1, 0)
                 self.score += next_lvl * 10
+                self.moves += 1
                 self.spawn_smart_items(1)
                 self.selected = []
                 self.game_over = not self.can_merge()
-                self.update_hints()
+                if self.history is not None:
+                    self.history.commit(self, next_lvl * 10)
                 return True
         return False
 
     def spawn_smart_items(self, count=1):
+        params = self.spawn_params
         for _ in range(count):
-            empties = self.empty_cells()
-            if not empties:
+            if not self._empty:
                 break
             
-            is_danger = len(empties) < 5 or not self.can_merge()
+            is_danger = len(self._empty) < params.danger_empty or not self.can_merge()
             
-            spawn_pos = random.choice(empties)
+            spawn_pos = self._empty.choice(self.rng)
             spawn_val = None
             
             if is_danger:
@@ -134,41 +333,124 @@ class GameModel:
                 neighbors = []
                 for dr, dc in [(-1,0), (1,0), (0,-1), (0,1)]:
                     nr, nc = r + dr, c + dc
-                    if 0 <= nr < ROWS and 0 <= nc < COLS:
-                        nv = self.grid[nr][nc]
-                        if isinstance(nv, tuple) and nv[1] in (1, 2, 3):
+                    if 0 <= nr < self.rows and 0 <= nc < self.cols:
+                        nv = self.grid.get(nr, nc)
+                        if nv and nv[1] <= params.copy_max_level:
                             neighbors.append(nv)
-                if not neighbors:
-                    pool = []
-                    for rr in range(ROWS):
-                        for cc in range(COLS):
-                            vv = self.grid[rr][cc]
-                            if isinstance(vv, tuple) and vv[1] in (1, 2, 3):
-                                pool.append(vv)
-                    neighbors = pool
                 if neighbors:
-                    spawn_val = random.choice(neighbors)
+                    spawn_val = self.rng.choice(neighbors)
+                elif self._low:
+                    # 邻居没有可用道具时，从全场可复制的低级道具中等概率挑一个
+                    rr, cc = self._low.choice(self.rng)
+                    spawn_val = self.grid.get(rr, cc)
             
             if spawn_val is None:
-                item = random.choice(self.items_available)
-                roll = random.random()
-                if roll < 0.6:
-                    lvl = 1
-                elif roll < 0.9:
-                    lvl = 2
-                else:
-                    lvl = 3
+                item = self.rng.choice(self.items_available)
+                lvl = params.roll_level(self.rng.random())
                 max_lvl = self.item_max_levels.get(item, 6)
-                lvl = min(lvl, max_lvl, 3)
+                lvl = min(lvl, max_lvl, params.max_roll_level)
                 spawn_val = (item, lvl)
             
-            self.grid[spawn_pos[0]][spawn_pos[1]] = spawn_val
-        self.update_hints()
+            self._set_cell(spawn_pos[0], spawn_pos[1], spawn_val)
+
+    def enable_history(self):
+        # 开启撤销/重做：之后每步只记录改动过的格子
+        if self.history is None:
+            self.history = History(self)
+        return self.history
 
-    def reset(self):
-        self.grid = [[0 for _ in range(COLS)] for _ in range(ROWS)]
+    def undo(self):
+        return self.history is not None and self.history.undo(self)
+
+    def redo(self):
+        return self.history is not None and self.history.redo(self)
+
+    def digest(self):
+        # 与存储方式无关的棋盘摘要，用于回放校验
+        return self.grid.digest()
+
+    def random_move(self, rng=None):
+        # 随机挑一组可合并道具中的两个格子；无可合并时返回 None
+        if not self._mergeable:
+            return None
+        rng = rng or self.rng
+        v = rng.choice(list(self._mergeable))
+        a, b = rng.sample(list(self._groups[v]), 2)
+        return a, b
+
+    def board_max_levels(self):
+        # 当前棋盘上每种道具的最高等级
+        levels = {}
+        get = self.grid.get
+        for r in range(self.rows):
+            for c in range(self.cols):
+                v = get(r, c)
+                if v and v[1] > levels.get(v[0], 0):
+                    levels[v[0]] = v[1]
+        return levels
+
+    def hint_groups(self):
+        # 可合并的 (item, level) -> 提示颜色序号；只读
+        return self._mergeable
+
+    def mergeable_groups(self):
+        # 当前可合并的各组道具：[(value, [格子...]), ...]
+        return [(v, sorted(self._groups[v])) for v in self._mergeable]
+
+    def clone(self, seed=None):
+        # 复制棋盘与索引，不重新扫描；用于快照、搜索与模拟
+        # 给出 seed 时副本使用新的随机数序列，否则与原模型后续生成完全相同
+        other = GameModel.__new__(GameModel)
+        other.rows = self.rows
+        other.cols = self.cols
+        other.board_cls = self.board_cls
+        other.grid = self.grid.copy()
+        other.score = self.score
+        other.moves = self.moves
+        other.game_over = self.game_over
+        other.selected = list(self.selected)
+        other.zhash = self.zhash
+        if seed is None:
+            other.seed = self.seed
+            other.rng = random.Random()
+            other.rng.setstate(self.rng.getstate())
+        else:
+            other.seed = seed
+            other.rng = random.Random(seed)
+        other.items_available = self.items_available
+        other.item_max_levels = self.item_max_levels
+        other.spawn_params = self.spawn_params
+        other.hints = dict(self.hints)
+        other._groups = {v: set(cells) for v, cells in self._groups.items()}
+        other._mergeable = dict(self._mergeable)
+        other._hint_slots = list(self._hint_slots)
+        other._empty = self._empty.copy()
+        other._low = self._low.copy()
+        other.history = None
+        other.peak_levels = dict(self.peak_levels)
+        other.listeners = []
+        if self.code_array is None:
+            other.code_array = other.hint_array = None
+        else:
+            other.code_array = self.code_array.copy()
+            other.hint_array = self.hint_array.copy()
+        return other
+
+    def reset(self, seed=None):
+        # 给出 seed 时换成新种子开局，结果与 GameModel(seed=seed) 相同
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed)
+        self.grid = self.board_cls(self.rows, self.cols)
         self.score = 0
+        self.moves = 0
         self.game_over = False
         self.selected = []
-        self._init_grid()
+        self.peak_levels = {}
+        history, self.history = self.history, None
         self.update_hints()
+        self._init_grid()
+        # 重开后历史从新局面开始
+        if history is not None:
+            history.clear(self)
+            self.history = history
@@ -0,0 +1,184 @@
+import functools
+import json
+import threading
+import time
+from collections import deque
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Profiler:
+    """帧与模型操作计时器。
+
+    关闭时 section() 返回共享的空上下文，几乎没有开销；开启后每个区段保留最近
+    window 次耗时用于统计，并按 Chrome trace 格式记录事件供导出。
+    """
+
+    def __init__(self, enabled=False, window=600, max_events=200000):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.events = deque(maxlen=max_events)
+        self.frames = deque(maxlen=window)
+        self._origin = time.perf_counter()
+        self._frame_start = None
+        self._patched = []
+
+    def section(self, name):
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def record(self, name, start, end):
+        hist = self.samples.get(name)
+        if hist is None:
+            hist = self.samples[name] = deque(maxlen=self.window)
+        hist.append((end - start) * 1000)
+        self.events.append((name, start, end))
+
+    def frame_begin(self):
+        if self.enabled:
+            self._frame_start = time.perf_counter()
+
+    def frame_end(self):
+        if self.enabled and self._frame_start is not None:
+            end = time.perf_counter()
+            self.frames.append((self._frame_start, end))
+            self.record("frame", self._frame_start, end)
+            self._frame_start = None
+
+    def instrument(self, cls, names, prefix=None):
+        # 在类上包一层计时；关闭分析时 uninstrument() 恢复原方法，不留任何开销
+        prefix = prefix or cls.__name__
+        for name in names:
+            original = cls.__dict__[name]
+            setattr(cls, name, self._wrap(original, f"{prefix}.{name}"))
+            self._patched.append((cls, name, original))
+
+    def _wrap(self, original, label):
+        # 只记录调用 instrument 的线程：后台搜索在模型副本上的调用不计入帧统计与 trace
+        owner = threading.get_ident()
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            if threading.get_ident() != owner:
+                return original(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(label, start, time.perf_counter())
+        return wrapper
+
+    def uninstrument(self):
+        for cls, name, original in reversed(self._patched):
+            setattr(cls, name, original)
+        self._patched = []
+
+    def fps(self):
+        if len(self.frames) < 2:
+            return 0.0
+        span = self.frames[-1][1] - self.frames[0][0]
+        return (len(self.frames) - 1) / span if span > 0 else 0.0
+
+    def percentile(self, name, q):
+        hist = self.samples.get(name)
+        if not hist:
+            return 0.0
+        ordered = sorted(hist)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def slowest(self):
+        # 平均耗时最高的区段（不含整帧）
+        best, best_mean = None, 0.0
+        for name, hist in self.samples.items():
+            if name == "frame" or not hist:
+                continue
+            mean = sum(hist) / len(hist)
+            if mean > best_mean:
+                best, best_mean = name, mean
+        return best, best_mean
+
+    def summary(self):
+        out = {}
+        for name, hist in self.samples.items():
+            if hist:
+                out[name] = {
+                    "count": len(hist),
+                    "mean_ms": sum(hist) / len(hist),
+                    "p50_ms": self.percentile(name, 50),
+                    "p99_ms": self.percentile(name, 99),
+                }
+        return out
+
+    def export_trace(self, path):
+        # Chrome trace 格式（chrome://tracing 或 Perfetto 可直接打开）
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": 1,
+                "tid": 1,
+            }
+            for name, start, end in self.events
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "summary": self.summary()}, f)
+
+
+class StartupTimer:
+    """启动阶段计时：mark(name) 记录自上一个标记以来的耗时，首帧后用 report() 输出分解"""
+
+    def __init__(self, enabled=False, start=None):
+        self.enabled = enabled
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, name):
+        if self.enabled:
+            now = time.perf_counter()
+            self.phases.append((name, now - self.last))
+            self.last = now
+
+    def detail(self, name, seconds):
+        # 上一阶段内部的一部分耗时，缩进显示，不计入总时间
+        if self.enabled:
+            self.phases.append(("  " + name, seconds))
+
+    def report(self):
+        total = self.last - self.start
+        lines = [f"startup: {total * 1000:.1f} ms to first frame"]
+        for name, seconds in self.phases:
+            share = seconds / total * 100 if total > 0 else 0.0
+            lines.append(f"  {name:<22}{seconds * 1000:8.1f} ms {share:5.1f}%")
+        return "\n".join(lines)
@@ -0,0 +1,132 @@
+from board import ListBoard, to_code, to_value
+
+# 会话服务的行协议（UTF-8，每条请求/响应一行，字段以空格分隔）
+#
+# 请求：
+#   new [seed]                  新建会话，返回完整状态
+#   state <sid>                 返回完整状态
+#   sel <sid> <idx>             点击格子 idx = r * cols + c（等同 toggle_select）
+#   merge <sid> <src> <dst>     直接把 src 合成到 dst
+#   reset <sid> [seed]          重开，返回完整状态
+#   close <sid>                 结束会话
+#   info                        服务器统计
+#
+# 响应：
+#   ok <sid> full rows=R cols=C score=S over=0|1 sel=i,j cells=c0,c1,... groups=code:slot,... levels=item:lvl,...
+#   ok <sid> diff score=S over=0|1 sel=i,j [cells=idx:code,...] [groups=code:slot,...]
+#   ok <sid> closed
+#   ok info key=value ...
+#   err <原因>
+#
+# 格子内容使用 board 的紧凑编码（item << 4 | level，0 为空）；groups 为可合并的编码及提示颜色序号，
+# 客户端据此自行标记提示。diff 只带本次改动的格子，groups 只在变化时发送。
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def _join_pairs(pairs):
+    return ",".join(f"{k}:{v}" for k, v in pairs)
+
+
+def _split_pairs(text):
+    if not text:
+        return {}
+    out = {}
+    for part in text.split(","):
+        k, _, v = part.partition(":")
+        out[int(k)] = int(v)
+    return out
+
+
+def _split_ints(text):
+    return [int(x) for x in text.split(",")] if text else []
+
+
+def encode_groups(groups):
+    return _join_pairs(sorted((to_code(v), slot) for v, slot in groups.items()))
+
+
+def encode_full(sid, model):
+    cols = model.cols
+    get = model.grid.get
+    cells = ",".join(str(to_code(get(r, c))) for r in range(model.rows) for c in range(cols))
+    sel = ",".join(str(r * cols + c) for r, c in model.selected)
+    levels = _join_pairs(sorted(model.item_max_levels.items()))
+    return (
+        f"ok {sid} full rows={model.rows} cols={cols} score={model.score} over={int(model.game_over)} "
+        f"sel={sel} cells={cells} groups={encode_groups(model.hint_groups())} levels={levels}\n"
+    )
+
+
+def encode_diff(sid, model, changed, groups=None):
+    # changed：{idx: 新值}；groups 为 None 表示提示分组没有变化
+    cols = model.cols
+    sel = ",".join(str(r * cols + c) for r, c in model.selected)
+    parts = [f"ok {sid} diff score={model.score} over={int(model.game_over)} sel={sel}"]
+    if changed:
+        parts.append("cells=" + _join_pairs((idx, to_code(v)) for idx, v in changed.items()))
+    if groups is not None:
+        parts.append("groups=" + encode_groups(groups))
+    return " ".join(parts) + "\n"
+
+
+def parse_response(line):
+    # 返回 (sid, kind, fields)；err 响应抛出 ProtocolError
+    parts = line.split()
+    if not parts:
+        raise ProtocolError("empty response")
+    if parts[0] == "err":
+        raise ProtocolError(" ".join(parts[1:]))
+    if parts[0] != "ok" or len(parts) < 3:
+        raise ProtocolError(f"bad response: {line.strip()}")
+    if parts[1] == "info":
+        return None, "info", dict(p.partition("=")[::2] for p in parts[2:])
+    fields = {}
+    for p in parts[3:]:
+        k, _, v = p.partition("=")
+        fields[k] = v
+    return int(parts[1]), parts[2], fields
+
+
+class BoardMirror:
+    """客户端侧的会话状态副本，按 full / diff 响应更新"""
+
+    def __init__(self):
+        self.rows = 0
+        self.cols = 0
+        self.codes = []
+        self.score = 0
+        self.game_over = False
+        self.selected = []
+        self.groups = {}
+        self.item_max_levels = {}
+
+    def apply(self, kind, fields):
+        # 返回本次改动的格子下标列表；full 时为 None 表示全部
+        if kind == "full":
+            self.rows = int(fields["rows"])
+            self.cols = int(fields["cols"])
+            self.codes = _split_ints(fields["cells"])
+            self.item_max_levels = _split_pairs(fields.get("levels", ""))
+        self.score = int(fields["score"])
+        self.game_over = fields["over"] == "1"
+        self.selected = _split_ints(fields["sel"])
+        if "groups" in fields:
+            self.groups = _split_pairs(fields["groups"])
+        if kind == "full":
+            return None
+        changed = _split_pairs(fields.get("cells", ""))
+        for idx, code in changed.items():
+            self.codes[idx] = code
+        return list(changed)
+
+    def hint_of(self, idx):
+        return self.groups.get(self.codes[idx])
+
+    def board(self):
+        return ListBoard.from_codes(self.rows, self.cols, self.codes)
+
+    def value(self, idx):
+        return to_value(self.codes[idx])
@@ -0,0 +1,108 @@
+import socket
+from protocol import BoardMirror, ProtocolError, parse_response
+
+
+class RemoteModel:
+    """连接会话服务的模型替身，提供 GameView / GameController 用到的那部分 GameModel 接口。
+
+    每次操作同步发送一条请求并按响应更新本地副本；撤销、存档、AI 等需要完整
+    模型的功能在远程模式下不可用。
+    """
+
+    def __init__(self, host, port, seed=None, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.file = self.sock.makefile("rb")
+        self.mirror = BoardMirror()
+        self.history = None
+        self.sid = None
+        self.grid = None
+        self.hints = {}
+        # 与 GameModel 相同的格子变化回调 fn(idx, old, new)，按 diff 响应触发
+        self.listeners = []
+        self._request("new" if seed is None else f"new {seed}")
+
+    def _request(self, line):
+        self.sock.sendall(line.encode() + b"\n")
+        reply = self.file.readline()
+        if not reply:
+            raise ConnectionError("server closed the connection")
+        sid, kind, fields = parse_response(reply.decode())
+        self.sid = sid
+        if kind not in ("full", "diff"):
+            return kind
+        changed = self.mirror.apply(kind, fields)
+        if changed is None:
+            self.grid = self.mirror.board()
+        else:
+            cols = self.cols
+            for idx in changed:
+                r, c = divmod(idx, cols)
+                old, new = self.grid.get(r, c), self.mirror.value(idx)
+                self.grid.set(r, c, new)
+                for fn in self.listeners:
+                    fn(idx, old, new)
+        self._update_hints()
+        return kind
+
+    def _update_hints(self):
+        m = self.mirror
+        self.hints = {}
+        if m.groups:
+            for idx, code in enumerate(m.codes):
+                slot = m.groups.get(code)
+                if slot is not None:
+                    self.hints[divmod(idx, m.cols)] = slot
+
+    @property
+    def rows(self):
+        return self.mirror.rows
+
+    @property
+    def cols(self):
+        return self.mirror.cols
+
+    @property
+    def score(self):
+        return self.mirror.score
+
+    @property
+    def game_over(self):
+        return self.mirror.game_over
+
+    @property
+    def selected(self):
+        return [divmod(idx, self.mirror.cols) for idx in self.mirror.selected]
+
+    @property
+    def item_max_levels(self):
+        return self.mirror.item_max_levels
+
+    def can_merge(self):
+        return bool(self.mirror.groups)
+
+    def toggle_select(self, pos):
+        before = self.mirror.score
+        self._request(f"sel {self.sid} {pos[0] * self.cols + pos[1]}")
+        return self.mirror.score != before
+
+    def merge(self, a, b):
+        before = self.mirror.score
+        self._request(f"merge {self.sid} {a[0] * self.cols + a[1]} {b[0] * self.cols + b[1]}")
+        return self.mirror.score != before
+
+    def reset(self, seed=None):
+        self._request(f"reset {self.sid}" if seed is None else f"reset {self.sid} {seed}")
+
+    def undo(self):
+        return False
+
+    def redo(self):
+        return False
+
+    def close(self):
+        try:
+            self._request(f"close {self.sid}")
+        except (OSError, ProtocolError):
+            pass
+        self.file.close()
+        self.sock.close()
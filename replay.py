@@ -0,0 +1,186 @@
+import struct
+import sys
+from array import array
+from model import GameModel
+from spawn import DEFAULT_SPAWN, SpawnParams
+
+# 回放文件格式（小端序）：
+#   头部  MAGIC | u8 版本 | u16 行 | u16 列 | u64 种子
+#         u16 道具数 | u16 道具 id...
+#         u16 最高等级项数 | (u16 道具 id, u8 等级)...
+#         生成参数（SpawnParams.pack）
+#   事件  u32 事件数 | u16 事件...（格子下标 r * cols + c，或 RESET/UNDO/REDO）
+#   结尾  u64 最终分数 | 16 字节棋盘摘要
+MAGIC = b"M2RP"
+VERSION = 3
+# 版本 3 起生成位置按空格的坐标顺序抽取；更早的回放按旧的抽取顺序录制，无法重放
+MIN_VERSION = 3
+RESET = 0xFFFF
+UNDO = 0xFFFE
+REDO = 0xFFFD
+
+
+class ReplayError(Exception):
+    pass
+
+
+def _u16_array(events):
+    data = array("H", events)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data
+
+
+class Replay:
+    def __init__(self, seed, rows, cols, items, max_levels, events=None, score=0, digest=b"", spawn_params=None):
+        self.seed = seed
+        self.rows = rows
+        self.cols = cols
+        self.items = list(items)
+        self.max_levels = dict(max_levels)
+        self.spawn_params = spawn_params or DEFAULT_SPAWN
+        self.events = array("H", events or [])
+        self.score = score
+        self.digest = digest
+
+    @classmethod
+    def for_model(cls, model):
+        return cls(model.seed, model.rows, model.cols, model.items_available, model.item_max_levels,
+                   spawn_params=model.spawn_params)
+
+    def new_model(self, backend=None):
+        return GameModel(
+            items_available=list(self.items),
+            item_max_levels=dict(self.max_levels),
+            rows=self.rows,
+            cols=self.cols,
+            backend=backend,
+            seed=self.seed,
+            spawn_params=self.spawn_params,
+        )
+
+    def to_bytes(self):
+        parts = [MAGIC, struct.pack("<BHHQ", VERSION, self.rows, self.cols, self.seed)]
+        parts.append(struct.pack(f"<H{len(self.items)}H", len(self.items), *self.items))
+        parts.append(struct.pack("<H", len(self.max_levels)))
+        for item_id, lvl in sorted(self.max_levels.items()):
+            parts.append(struct.pack("<HB", item_id, lvl))
+        parts.append(self.spawn_params.pack())
+        parts.append(struct.pack("<I", len(self.events)))
+        parts.append(_u16_array(self.events).tobytes())
+        parts.append(struct.pack("<Q", self.score))
+        parts.append(self.digest.ljust(16, b"\0"))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ReplayError("not a replay file")
+        try:
+            version, rows, cols, seed = struct.unpack_from("<BHHQ", data, 4)
+            if version < MIN_VERSION:
+                raise ReplayError(f"replay version {version} was recorded with an older spawn order "
+                                  "and cannot be replayed")
+            if version != VERSION:
+                raise ReplayError(f"unsupported replay version {version}")
+            off = 4 + struct.calcsize("<BHHQ")
+            (n_items,) = struct.unpack_from("<H", data, off)
+            items = struct.unpack_from(f"<{n_items}H", data, off + 2)
+            off += 2 + 2 * n_items
+            (n_levels,) = struct.unpack_from("<H", data, off)
+            off += 2
+            max_levels = {}
+            for _ in range(n_levels):
+                item_id, lvl = struct.unpack_from("<HB", data, off)
+                max_levels[item_id] = lvl
+                off += 3
+            spawn_params, off = SpawnParams.unpack_from(data, off)
+            (n_events,) = struct.unpack_from("<I", data, off)
+            off += 4
+            events = array("H")
+            events.frombytes(data[off:off + 2 * n_events])
+            if sys.byteorder != "little":
+                events.byteswap()
+            off += 2 * n_events
+            (score,) = struct.unpack_from("<Q", data, off)
+            digest = data[off + 8:off + 24]
+        except struct.error as e:
+            raise ReplayError(f"truncated replay: {e}") from None
+        except ValueError as e:
+            raise ReplayError(f"bad spawn parameters: {e}") from None
+        if len(events) != n_events or len(digest) != 16:
+            raise ReplayError("truncated replay")
+        return cls(seed, rows, cols, items, max_levels, events, score, digest, spawn_params)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayRecorder:
+    """记录一局的种子、道具配置和每次点击的格子"""
+
+    def __init__(self, model):
+        self.replay = Replay.for_model(model)
+
+    def pick(self, pos):
+        r, c = pos
+        self.replay.events.append(r * self.replay.cols + c)
+
+    def reset(self):
+        self.replay.events.append(RESET)
+
+    def undo(self):
+        self.replay.events.append(UNDO)
+
+    def redo(self):
+        self.replay.events.append(REDO)
+
+    def finish(self, model):
+        self.replay.score = model.score
+        self.replay.digest = model.digest()
+        return self.replay
+
+
+def start_model(replay, backend=None):
+    # 回放的开局模型；记录中有撤销/重做时开启历史
+    model = replay.new_model(backend)
+    if UNDO in replay.events or REDO in replay.events:
+        model.enable_history()
+    return model
+
+
+def run_replay(replay, backend=None):
+    # 不经过界面，按记录的点击全速重放，返回最终的模型
+    model = start_model(replay, backend)
+    events = replay.events
+    cols = replay.cols
+    toggle = model.toggle_select
+    for event in events:
+        if event < REDO:
+            toggle(divmod(event, cols))
+        else:
+            apply_event(model, event)
+    return model
+
+
+def apply_event(model, event):
+    # 对模型执行一个回放事件
+    if event < REDO:
+        model.toggle_select(divmod(event, model.cols))
+    elif event == RESET:
+        model.reset()
+    elif event == UNDO:
+        model.undo()
+    else:
+        model.redo()
+
+
+def verify(replay, backend=None):
+    model = run_replay(replay, backend)
+    return model.score == replay.score and model.digest() == replay.digest, model
@@ -0,0 +1,250 @@
+import json
+import os
+import numpy as np
+from board import LEVEL_BITS, LEVEL_MASK
+from config import RESULTS_CHUNK_ROWS, RESULTS_ITEM_SLOTS
+
+# 对局结果的列式存储（一个目录）：
+#   meta.json          版本、每列的类型、道具槽位数、配置表
+#   <列名>.bin         该列全部行的定长值依次排列（小端序），只追加
+# 行数由各列文件长度决定（取最小值），写到一半中断的尾部会被忽略。
+# max_level 为二维列，第 i 个槽位是道具 i 在这一局达到的最高等级（0 表示未出现）。
+VERSION = 1
+META_NAME = "meta.json"
+COLUMNS = (
+    ("seed", "<u8"),
+    ("game", "<u4"),        # 批量模拟中该局在批内的序号，单局为 0；与 seed 一起确定一局
+    ("config", "<u4"),      # 配置表下标
+    ("moves", "<u4"),
+    ("score", "<i8"),
+    ("cause", "u1"),        # CAUSES 下标
+    ("max_level", "u1"),    # 每行 item_slots 个值
+)
+# 结束原因：无可合成 / 达到步数上限 / 玩家退出 / 玩家重开
+CAUSES = ("no_merge", "move_limit", "quit", "reset")
+
+
+class ResultStore:
+    """追加式的列式结果存储；写入先攒在内存块里，满 chunk_rows 行整块追加到各列文件。
+
+    读取时各列以只读 memmap 打开，只有访问到的部分才会读入内存。同一目录同时只能有一个写入者。
+    """
+
+    def __init__(self, path, mode="r", item_slots=RESULTS_ITEM_SLOTS, chunk_rows=RESULTS_CHUNK_ROWS):
+        if mode not in ("r", "a"):
+            raise ValueError(f"mode must be 'r' or 'a', got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.chunk_rows = chunk_rows
+        meta_path = os.path.join(path, META_NAME)
+        if os.path.isfile(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                self.meta = json.load(f)
+            if self.meta.get("version") != VERSION:
+                raise ValueError(f"unsupported result store version {self.meta.get('version')}")
+        elif mode == "a":
+            os.makedirs(path, exist_ok=True)
+            self.meta = {
+                "version": VERSION,
+                "item_slots": item_slots,
+                "columns": {name: dtype for name, dtype in COLUMNS},
+                "causes": list(CAUSES),
+                "configs": [],
+            }
+            self._save_meta()
+        else:
+            raise FileNotFoundError(f"no result store at {path}")
+        self.item_slots = self.meta["item_slots"]
+        self._config_ids = {self._config_key(c): i for i, c in enumerate(self.meta["configs"])}
+        self._buffer = None
+        self._pending = 0
+        self.rows = self._stored_rows()
+        if mode == "a":
+            # 截掉上次中断留下的不完整尾部，保证各列按行对齐
+            for name, dtype in COLUMNS:
+                file = self._file(name)
+                with open(file, "ab") as f:
+                    f.truncate(self.rows * np.dtype(dtype).itemsize * self._width(name))
+
+    def _file(self, name):
+        return os.path.join(self.path, name + ".bin")
+
+    def _width(self, name):
+        return self.item_slots if name == "max_level" else 1
+
+    def _stored_rows(self):
+        rows = None
+        for name, dtype in COLUMNS:
+            file = self._file(name)
+            size = os.path.getsize(file) if os.path.isfile(file) else 0
+            n = size // (np.dtype(dtype).itemsize * self._width(name))
+            rows = n if rows is None else min(rows, n)
+        return rows
+
+    def __len__(self):
+        return self.rows + self._pending
+
+    def _save_meta(self):
+        tmp = os.path.join(self.path, META_NAME + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f, indent=1, sort_keys=True)
+        os.replace(tmp, os.path.join(self.path, META_NAME))
+
+    @staticmethod
+    def _config_key(config):
+        return json.dumps(config, sort_keys=True)
+
+    def config_id(self, config):
+        # 相同的配置只登记一次
+        key = self._config_key(config)
+        cid = self._config_ids.get(key)
+        if cid is None:
+            cid = self._config_ids[key] = len(self.meta["configs"])
+            self.meta["configs"].append(json.loads(key))
+            self._save_meta()
+        return cid
+
+    def _reserve(self, n):
+        # 返回缓冲区中接下来 n 行的切片起点；缓冲区满时先写出
+        if self.mode != "a":
+            raise ValueError("result store opened read-only")
+        if self._buffer is None:
+            self._buffer = {
+                name: np.zeros((self.chunk_rows, self._width(name)) if name == "max_level" else self.chunk_rows,
+                               dtype=dtype)
+                for name, dtype in COLUMNS
+            }
+        if self._pending + n > self.chunk_rows:
+            self.flush()
+        return self._pending
+
+    def append(self, seed, config, moves, score, cause, max_levels, game=0):
+        # 单局结果；config 为 config_id() 的返回值，max_levels 为 {道具: 最高等级}
+        i = self._reserve(1)
+        buf = self._buffer
+        buf["seed"][i] = seed
+        buf["game"][i] = game
+        buf["config"][i] = config
+        buf["moves"][i] = moves
+        buf["score"][i] = score
+        buf["cause"][i] = CAUSES.index(cause)
+        row = buf["max_level"][i]
+        row[:] = 0
+        for item, lvl in max_levels.items():
+            if not 0 <= item < self.item_slots:
+                raise ValueError(f"item {item} does not fit in {self.item_slots} item slots")
+            row[item] = lvl
+        self._pending += 1
+
+    def extend(self, seed, config, moves, scores, causes, max_level, games=None):
+        # 一批结果；除 seed、config 外均为等长数组，max_level 形状为 (n, item_slots)，causes 为 CAUSES 下标
+        n = len(scores)
+        if n > self.chunk_rows:
+            for start in range(0, n, self.chunk_rows):
+                part = slice(start, start + self.chunk_rows)
+                self.extend(seed if np.isscalar(seed) else seed[part], config, moves[part], scores[part],
+                            causes[part], max_level[part],
+                            np.arange(start, min(n, start + self.chunk_rows)) if games is None else games[part])
+            return
+        i = self._reserve(n)
+        buf = self._buffer
+        rows = slice(i, i + n)
+        buf["seed"][rows] = seed
+        buf["game"][rows] = np.arange(n) if games is None else games
+        buf["config"][rows] = config
+        buf["moves"][rows] = moves
+        buf["score"][rows] = scores
+        buf["cause"][rows] = causes
+        buf["max_level"][rows] = max_level
+        self._pending += n
+
+    def flush(self):
+        if not self._pending:
+            return
+        n = self._pending
+        for name, _ in COLUMNS:
+            with open(self._file(name), "ab") as f:
+                f.write(self._buffer[name][:n].tobytes())
+        self.rows += n
+        self._pending = 0
+
+    def close(self):
+        if self.mode == "a":
+            self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def column(self, name):
+        # 只读 memmap；没有数据时返回空数组
+        dtype = self.meta["columns"][name]
+        width = self._width(name)
+        shape = (self.rows, width) if name == "max_level" else (self.rows,)
+        if self.rows == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode="r", shape=shape)
+
+    def chunks(self, names, chunk_rows=None):
+        # 按块遍历若干列，每次产出 {列名: 该块的数组}，内存占用与总行数无关
+        step = chunk_rows or self.chunk_rows
+        cols = {name: self.column(name) for name in names}
+        for start in range(0, self.rows, step):
+            yield {name: col[start:start + step] for name, col in cols.items()}
+
+
+def model_config(model, player=None):
+    # 结果所属的配置：棋盘尺寸、道具、最高等级、生成参数，以及可选的玩家类型（human / mcts / random ...）
+    config = {
+        "rows": model.rows,
+        "cols": model.cols,
+        "items": sorted(model.items_available),
+        "max_levels": {str(k): v for k, v in sorted(model.item_max_levels.items())},
+        "spawn": model.spawn_params.to_dict(),
+    }
+    if player is not None:
+        config["player"] = player
+    return config
+
+
+def model_max_levels(model):
+    # 本局每种道具达到过的最高等级；撤销掉的合成也算（GameModel.peak_levels 只增不减）
+    return dict(model.peak_levels)
+
+
+def record_model(store, model, cause=None, player=None):
+    # 记录一局 GameModel；cause 省略时按是否已结束取 no_merge / quit
+    if cause is None:
+        cause = "no_merge" if model.game_over else "quit"
+    store.append(model.seed, store.config_id(model_config(model, player)), model.moves, model.score,
+                 cause, model_max_levels(model))
+
+
+def batch_max_levels(boards, item_slots):
+    # BatchGameModel.boards -> (n, item_slots) 的最高等级矩阵
+    items = boards >> LEVEL_BITS
+    levels = (boards & LEVEL_MASK).astype(np.uint8)
+    out = np.zeros((len(boards), item_slots), dtype=np.uint8)
+    for item in np.unique(items[boards != 0]).tolist():
+        if item >= item_slots:
+            raise ValueError(f"item {item} does not fit in {item_slots} item slots")
+        out[:, item] = np.where(items == item, levels, 0).max(axis=1)
+    return out
+
+
+def record_batch(store, sim, seed, player="random"):
+    # 记录一批 BatchGameModel 对局；未结束的局视为达到步数上限
+    config = {
+        "rows": sim.rows,
+        "cols": sim.cols,
+        "items": sorted(int(i) for i in sim.items_available),
+        "max_levels": {str(k): v for k, v in sorted(sim.item_max_levels.items())},
+        "spawn": sim.spawn_params.to_dict(),
+        "player": player,
+    }
+    causes = np.where(sim.game_over, CAUSES.index("no_merge"), CAUSES.index("move_limit")).astype(np.uint8)
+    store.extend(seed, store.config_id(config), sim.moves, sim.scores, causes,
+                 batch_max_levels(sim.boards, store.item_slots))
@@ -0,0 +1,33 @@
+import os
+import atlas
+from config import ITEM_MAX_LEVELS
+
+# 道具规则的公共写法：服务端与 tools/ 下的工具共用，保证默认规则与本地游戏一致
+
+# 游戏使用的素材目录；按模块位置定位，从其他目录运行时也能找到
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+
+def parse_levels(text):
+    # 命令行的最高等级写法 "1:6,2:5,3:8" -> {1: 6, 2: 5, 3: 8}；空串或 None 为 {}
+    levels = {}
+    for part in (text or "").split(","):
+        part = part.strip()
+        if part:
+            k, sep, v = part.partition(":")
+            if not sep:
+                raise ValueError(f"bad level spec {part!r}, expected item:level")
+            levels[int(k)] = int(v)
+    return levels
+
+
+def asset_rules(asset_dir=ASSET_DIR, items="", max_levels=""):
+    # 与本地游戏相同的规则：道具与最高等级由素材目录的文件名决定，config 的 ITEM_MAX_LEVELS 优先，
+    # 命令行给出的再覆盖；否则按素材显示的规则与实际的合成规则不一致
+    levels = atlas.item_levels(atlas.scan_sources(asset_dir))
+    item_list = [int(x) for x in items.split(",") if x] if items else sorted(levels)
+    rules = {item_id: max(lvls) for item_id, lvls in levels.items()}
+    rules.update(ITEM_MAX_LEVELS)
+    rules.update(parse_levels(max_levels))
+    # 没有素材时与 GameModel 的默认道具相同
+    return item_list or [1, 2, 3], rules
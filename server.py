@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from model import GameModel
+from protocol import encode_full, encode_diff
+from config import (
+    SERVER_HOST, SERVER_PORT, SESSION_IDLE_TIMEOUT, SESSION_POOL_SIZE, MAX_SESSIONS,
+)
+from rules import ASSET_DIR, asset_rules
+
+# 单行请求的长度上限，超出视为非法连接
+MAX_LINE = 4096
+
+
+class Session:
+    """一个会话对应一个 GameModel；通过模型的格子回调收集本次请求改动的格子"""
+
+    __slots__ = ("sid", "model", "changed", "groups", "last_active")
+
+    def __init__(self, model):
+        self.sid = 0
+        self.model = model
+        self.changed = {}
+        self.groups = {}
+        self.last_active = 0.0
+        model.listeners.append(self.on_change)
+
+    def on_change(self, idx, old, new):
+        self.changed[idx] = new
+
+    def begin(self, sid, now):
+        self.sid = sid
+        self.last_active = now
+        self.changed.clear()
+        self.groups = dict(self.model.hint_groups())
+
+    def full(self):
+        self.changed.clear()
+        self.groups = dict(self.model.hint_groups())
+        return encode_full(self.sid, self.model)
+
+    def diff(self):
+        groups = self.model.hint_groups()
+        sent = None
+        if groups != self.groups:
+            self.groups = sent = dict(groups)
+        out = encode_diff(self.sid, self.model, self.changed, sent)
+        self.changed.clear()
+        return out
+
+
+class SessionManager:
+    """按 id 管理会话。
+
+    sessions 按最近活动时间排序（OrderedDict），回收空闲会话只需从头部弹出；
+    回收的会话连同 GameModel 放入空闲池，新会话优先复用，只需 reset 换种子。
+    """
+
+    def __init__(self, items, max_levels, rows=None, cols=None, idle_timeout=SESSION_IDLE_TIMEOUT,
+                 pool_size=SESSION_POOL_SIZE, max_sessions=MAX_SESSIONS, seed=None):
+        self.items = list(items)
+        self.max_levels = dict(max_levels)
+        self.board_size = {k: v for k, v in (("rows", rows), ("cols", cols)) if v}
+        self.idle_timeout = idle_timeout
+        self.pool_size = pool_size
+        self.max_sessions = max_sessions
+        self.rng = random.Random(seed)
+        self.sessions = OrderedDict()
+        self.free = []
+        self.next_id = 1
+        self.stats = {"created": 0, "reused": 0, "evicted": 0, "requests": 0, "moves": 0}
+
+    def create(self, seed=None, now=None):
+        if len(self.sessions) >= self.max_sessions:
+            # 满员时回收最久未活动的会话
+            self.release(next(iter(self.sessions)))
+        if seed is None:
+            seed = self.rng.getrandbits(63)
+        if self.free:
+            session = self.free.pop()
+            session.model.reset(seed)
+            self.stats["reused"] += 1
+        else:
+            session = Session(GameModel(list(self.items), dict(self.max_levels), seed=seed, **self.board_size))
+            self.stats["created"] += 1
+        sid = self.next_id
+        self.next_id += 1
+        session.begin(sid, time.monotonic() if now is None else now)
+        self.sessions[sid] = session
+        return session
+
+    def get(self, sid, now=None):
+        session = self.sessions[sid]
+        self.sessions.move_to_end(sid)
+        session.last_active = time.monotonic() if now is None else now
+        return session
+
+    def release(self, sid):
+        session = self.sessions.pop(sid, None)
+        if session is not None and len(self.free) < self.pool_size:
+            session.model.selected = []
+            self.free.append(session)
+
+    def evict_idle(self, now=None):
+        now = time.monotonic() if now is None else now
+        deadline = now - self.idle_timeout
+        evicted = 0
+        while self.sessions:
+            sid, session = next(iter(self.sessions.items()))
+            if session.last_active > deadline:
+                break
+            self.release(sid)
+            evicted += 1
+        self.stats["evicted"] += evicted
+        return evicted
+
+    def info(self):
+        fields = dict(self.stats, sessions=len(self.sessions), pooled=len(self.free))
+        return "ok info " + " ".join(f"{k}={v}" for k, v in fields.items()) + "\n"
+
+    def dispatch(self, line):
+        # 处理一行请求并返回响应行（str）
+        parts = line.split()
+        if not parts:
+            return "err empty request\n"
+        self.stats["requests"] += 1
+        cmd = parts[0]
+        try:
+            if cmd == b"sel":
+                session = self.get(int(parts[1]))
+                model = session.model
+                idx = int(parts[2])
+                if not 0 <= idx < model.rows * model.cols:
+                    return "err cell out of range\n"
+                if model.toggle_select(divmod(idx, model.cols)):
+                    self.stats["moves"] += 1
+                return session.diff()
+            if cmd == b"merge":
+                session = self.get(int(parts[1]))
+                model = session.model
+                src, dst = int(parts[2]), int(parts[3])
+                cells = model.rows * model.cols
+                if not (0 <= src < cells and 0 <= dst < cells) or src == dst:
+                    return "err bad merge\n"
+                if model.merge(divmod(src, model.cols), divmod(dst, model.cols)):
+                    self.stats["moves"] += 1
+                return session.diff()
+            if cmd == b"new":
+                seed = int(parts[1]) if len(parts) > 1 else None
+                return self.create(seed).full()
+            if cmd == b"state":
+                return self.get(int(parts[1])).full()
+            if cmd == b"reset":
+                session = self.get(int(parts[1]))
+                session.model.reset(int(parts[2]) if len(parts) > 2 else None)
+                return session.full()
+            if cmd == b"close":
+                sid = int(parts[1])
+                if sid not in self.sessions:
+                    return "err unknown session\n"
+                self.release(sid)
+                return f"ok {sid} closed\n"
+            if cmd == b"info":
+                return self.info()
+        except KeyError:
+            return "err unknown session\n"
+        except (ValueError, IndexError):
+            return "err bad request\n"
+        return "err unknown command\n"
+
+
+class GameServer:
+    """asyncio 行协议服务；同一连接上可以流水线发送多条请求，响应按请求顺序返回"""
+
+    def __init__(self, manager, host=SERVER_HOST, port=SERVER_PORT, evict_interval=1.0):
+        self.manager = manager
+        self.host = host
+        self.port = port
+        self.evict_interval = evict_interval
+        self.server = None
+
+    async def handle(self, reader, writer):
+        dispatch = self.manager.dispatch
+        pending = b""
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                *lines, pending = (pending + data).split(b"\n")
+                if len(pending) > MAX_LINE:
+                    writer.write(b"err line too long\n")
+                    break
+                if lines:
+                    # 一次读到的多条请求合并成一次写出
+                    writer.write("".join([dispatch(line) for line in lines]).encode())
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def evict_loop(self):
+        while True:
+            await asyncio.sleep(self.evict_interval)
+            self.manager.evict_idle()
+
+    async def serve(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        evictor = asyncio.ensure_future(self.evict_loop())
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            evictor.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="二合会话服务")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--assets", default=ASSET_DIR, help="按该目录的素材检测道具与最高等级，与本地游戏一致")
+    parser.add_argument("--items", default="", help="道具列表，例如 1,2,3；默认按素材检测")
+    parser.add_argument("--max-levels", default="", help="覆盖检测到的最高等级，例如 1:6,2:5,3:8")
+    parser.add_argument("--idle-timeout", type=float, default=SESSION_IDLE_TIMEOUT, help="空闲多少秒后回收会话")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--pool-size", type=int, default=SESSION_POOL_SIZE)
+    args = parser.parse_args()
+
+    items, max_levels = asset_rules(args.assets, args.items, args.max_levels)
+    manager = SessionManager(
+        items, max_levels,
+        idle_timeout=args.idle_timeout, pool_size=args.pool_size, max_sessions=args.max_sessions,
+    )
+    server = GameServer(manager, args.host, args.port)
+    print(f"listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
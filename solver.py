@@ -0,0 +1,178 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from config import SOLVER_ROLLOUTS, SOLVER_TIME_LIMIT, SOLVER_DEPTH, SOLVER_WORKERS
+
+
+def legal_moves(model, max_pairs=6):
+    # 每组可合并道具最多取 max_pairs 对格子，(a, b) 表示 a 合到 b 上
+    moves = []
+    for _, cells in model.mergeable_groups():
+        n = 0
+        for i in range(len(cells) - 1):
+            for j in range(i + 1, len(cells)):
+                moves.append((cells[i], cells[j]))
+                n += 1
+                if n >= max_pairs:
+                    break
+            if n >= max_pairs:
+                break
+    return moves
+
+
+class _Node:
+    __slots__ = ("visits", "edges", "untried")
+
+    def __init__(self, moves, rng):
+        self.visits = 0
+        # move -> [访问次数, 累计收益]
+        self.edges = {}
+        self.untried = moves
+        rng.shuffle(self.untried)
+
+
+class MCTS:
+    """对随机生成做开环蒙特卡洛树搜索。
+
+    每次模拟都克隆根局面并用新的随机种子推进，节点按棋盘的 Zobrist 哈希存入置换表，
+    不同走法到达同一局面时共享统计。收益为模拟结束时相对根局面增加的分数。
+    """
+
+    def __init__(self, rollouts=SOLVER_ROLLOUTS, time_limit=SOLVER_TIME_LIMIT, depth=SOLVER_DEPTH,
+                 c=1.0, max_pairs=6, seed=None):
+        self.rollouts = rollouts
+        self.time_limit = time_limit
+        self.depth = depth
+        self.c = c
+        self.max_pairs = max_pairs
+        self.rng = random.Random(seed)
+        self.table = {}
+        self._scale = 1.0
+
+    def search(self, model):
+        # 返回根局面每个走法的 (访问次数, 累计收益)
+        self.table = {}
+        deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        for i in range(self.rollouts):
+            if deadline is not None and i and time.perf_counter() > deadline:
+                break
+            self._simulate(model.clone(seed=self.rng.getrandbits(63)), model.score)
+        root = self.table.get(model.zhash)
+        if root is None:
+            return {}
+        return {move: (e[0], e[1]) for move, e in root.edges.items()}
+
+    def _select(self, node):
+        if node.untried:
+            move = node.untried.pop()
+            node.edges[move] = [0, 0.0]
+            return move
+        log_n = math.log(node.visits + 1)
+        best, best_ucb = None, -1.0
+        for move, (n, total) in node.edges.items():
+            ucb = total / n / self._scale + self.c * math.sqrt(log_n / n)
+            if ucb > best_ucb:
+                best, best_ucb = move, ucb
+        return best
+
+    def _simulate(self, sim, root_score):
+        path = []
+        steps = 0
+        while not sim.game_over and steps < self.depth:
+            node = self.table.get(sim.zhash)
+            expanded = node is None
+            if expanded:
+                node = self.table[sim.zhash] = _Node(legal_moves(sim, self.max_pairs), self.rng)
+            if not node.edges and not node.untried:
+                break
+            move = self._select(node)
+            path.append((node, move))
+            sim.merge(*move)
+            steps += 1
+            if expanded:
+                break
+
+        # 随机走子直到结束或步数用完
+        rng = sim.rng
+        while not sim.game_over and steps < self.depth:
+            move = sim.random_move(rng)
+            if move is None:
+                break
+            sim.merge(*move)
+            steps += 1
+
+        value = sim.score - root_score
+        if value > self._scale:
+            self._scale = float(value)
+        for node, move in path:
+            node.visits += 1
+            edge = node.edges[move]
+            edge[0] += 1
+            edge[1] += value
+
+
+def _search_worker(model, params, seed):
+    return MCTS(seed=seed, **params).search(model)
+
+
+def best_of(stats):
+    # 访问次数最多的走法，次数相同时取平均收益高的
+    if not stats:
+        return None
+    return max(stats, key=lambda m: (stats[m][0], stats[m][1] / max(1, stats[m][0])))
+
+
+class Solver:
+    """给 GameModel 挑选合成走法；workers > 1 时在进程池中做根并行搜索并汇总统计"""
+
+    def __init__(self, rollouts=SOLVER_ROLLOUTS, time_limit=SOLVER_TIME_LIMIT, depth=SOLVER_DEPTH,
+                 workers=SOLVER_WORKERS, seed=None, **kwargs):
+        self.params = dict(rollouts=rollouts, time_limit=time_limit, depth=depth, **kwargs)
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def analyze(self, model):
+        if model.game_over or not model.can_merge():
+            return {}
+        if self.pool is None:
+            return MCTS(seed=self.rng.getrandbits(63), **self.params).search(model)
+        # 每个进程各自跑一份预算，根节点统计相加
+        state = model.clone()
+        state.history = None
+        futures = [
+            self.pool.submit(_search_worker, state, self.params, self.rng.getrandbits(63))
+            for _ in range(self.workers)
+        ]
+        merged = {}
+        for f in futures:
+            for move, (n, total) in f.result().items():
+                acc = merged.get(move, (0, 0.0))
+                merged[move] = (acc[0] + n, acc[1] + total)
+        return merged
+
+    def best_move(self, model):
+        return best_of(self.analyze(model))
+
+    def play(self, model, max_moves=None):
+        # 无界面自动下完一局，返回走的步数
+        moves = 0
+        while not model.game_over and (max_moves is None or moves < max_moves):
+            move = self.best_move(model)
+            if move is None:
+                break
+            model.merge(*move)
+            moves += 1
+        return moves
@@ -0,0 +1,87 @@
+import struct
+from config import SPAWN_LEVEL_ROLLS, SPAWN_DANGER_EMPTY, SPAWN_COPY_MAX_LEVEL, INITIAL_FILL
+
+FIELDS = ("level_rolls", "danger_empty", "copy_max_level", "initial_fill")
+
+
+class SpawnParams:
+    """道具生成的可调参数，GameModel 与 BatchGameModel 共用。
+
+    level_rolls 为递增的分界值，随机数落在第 k 个区间时生成 k + 1 级道具，
+    因此随机生成的最高等级为 len(level_rolls) + 1。
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, level_rolls=SPAWN_LEVEL_ROLLS, danger_empty=SPAWN_DANGER_EMPTY,
+                 copy_max_level=SPAWN_COPY_MAX_LEVEL, initial_fill=INITIAL_FILL):
+        self.level_rolls = tuple(float(x) for x in level_rolls)
+        self.danger_empty = int(danger_empty)
+        self.copy_max_level = int(copy_max_level)
+        self.initial_fill = float(initial_fill)
+        if any(b < a for a, b in zip(self.level_rolls, self.level_rolls[1:])):
+            raise ValueError(f"level_rolls must be increasing: {self.level_rolls}")
+        if not 0.0 <= self.initial_fill <= 1.0:
+            raise ValueError(f"initial_fill must be within [0, 1]: {self.initial_fill}")
+
+    @property
+    def max_roll_level(self):
+        return len(self.level_rolls) + 1
+
+    def roll_level(self, roll):
+        lvl = 1
+        for t in self.level_rolls:
+            if roll < t:
+                break
+            lvl += 1
+        return lvl
+
+    def initial_count(self, cells):
+        # 加一点余量，避免 1/3 这类比例因浮点误差少放一格
+        return min(cells, int(cells * self.initial_fill + 1e-9))
+
+    def to_dict(self):
+        return {
+            "level_rolls": list(self.level_rolls),
+            "danger_empty": self.danger_empty,
+            "copy_max_level": self.copy_max_level,
+            "initial_fill": self.initial_fill,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        unknown = set(data) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"unknown spawn parameters: {sorted(unknown)}")
+        return cls(**data)
+
+    def pack(self):
+        # 回放与存档中的二进制形式（小端序）：u8 分界值个数 | f64 分界值... | u16 danger_empty | u8 copy_max_level | f64 initial_fill
+        n = len(self.level_rolls)
+        return struct.pack(f"<B{n}dHBd", n, *self.level_rolls, self.danger_empty, self.copy_max_level,
+                           self.initial_fill)
+
+    @classmethod
+    def unpack_from(cls, data, off):
+        # 返回 (SpawnParams, 之后的偏移)
+        (n,) = struct.unpack_from("<B", data, off)
+        fmt = f"<B{n}dHBd"
+        fields = struct.unpack_from(fmt, data, off)
+        return cls(fields[1:n + 1], *fields[n + 1:]), off + struct.calcsize(fmt)
+
+    def replace(self, **changes):
+        data = self.to_dict()
+        data.update(changes)
+        return SpawnParams.from_dict(data)
+
+    def __eq__(self, other):
+        return isinstance(other, SpawnParams) and self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        return hash((self.level_rolls, self.danger_empty, self.copy_max_level, self.initial_fill))
+
+    def __repr__(self):
+        return "SpawnParams(" + ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items()) + ")"
+
+
+DEFAULT_SPAWN = SpawnParams()
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# 无界面运行：窗口与音频都用 SDL 的 dummy 驱动
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+@pytest.fixture(autouse=True)
+def repo_cwd(monkeypatch):
+    # 素材、缓存等路径都相对仓库根目录
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+import bench
+
+
+def test_frame_percentiles_catch_tail_regression():
+    # 均值几乎不变、只多出几个慢帧时，由 p99 报出退化
+    frames = [0.001] * 200
+    slow = frames[:-4] + [0.02] * 4
+    base = {"case": {"draw_changed": bench.summarize([0.001], frames)}}
+    now = {"case": {"draw_changed": bench.summarize([0.001], slow)}}
+    assert base["case"]["draw_changed"]["p50_us"] == 1000
+    regressions = bench.compare(now, base, threshold=0.15)
+    assert [key for _, key, _, _ in regressions] == ["draw_changed.p99_us"]
+
+
+def test_measure_drops_warmup_frames():
+    frames = []
+    calls = []
+
+    def batch():
+        calls.append(1)
+        frames.append(len(calls))
+        return 0.01, 1
+
+    per_op = bench.measure(batch, repeat=2, min_time=0, frames=frames)
+    assert per_op == [0.01, 0.01]
+    assert frames == [2, 3]
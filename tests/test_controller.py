@@ -0,0 +1,133 @@
+import threading
+
+import pygame
+import pytest
+
+import controller
+from controller import GameController
+
+
+class FakeEvents:
+    """每次 event.get 返回下一轮的事件，事件用完后返回 QUIT；log 记录 wait/get 的调用顺序"""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.log = []
+
+    def wait(self, timeout=0):
+        self.log.append(("wait", timeout))
+        return pygame.event.Event(pygame.NOEVENT)
+
+    def get(self):
+        self.log.append(("get",))
+        return self.batches.pop(0) if self.batches else [pygame.event.Event(pygame.QUIT)]
+
+    def rounds(self):
+        return sum(1 for entry in self.log if entry[0] == "get")
+
+
+class FakeClock:
+    def tick(self, fps=0):
+        return 0
+
+
+def run_controller(monkeypatch, make_batches, late_draws):
+    # 运行主循环直到事件用完；第 late_draws 中的各次绘制耗时超出帧预算。返回控制器、事件源与每次绘制所在的轮次
+    ctl = GameController(seed=1)
+    events = FakeEvents(make_batches(ctl))
+    monkeypatch.setattr(pygame.event, "wait", events.wait)
+    monkeypatch.setattr(pygame.event, "get", events.get)
+    ticks = [0]
+    monkeypatch.setattr(pygame.time, "get_ticks", lambda: ticks[0])
+    monkeypatch.setattr(ctl, "clock", FakeClock())
+    draws = []
+    draw = ctl.view.draw
+
+    def timed_draw(model, now=None):
+        draws.append(events.rounds())
+        if len(draws) in late_draws:
+            ticks[0] += controller.FRAME_BUDGET_MS + 10
+        return draw(model, now)
+
+    monkeypatch.setattr(ctl.view, "draw", timed_draw)
+    with pytest.raises(SystemExit):
+        ctl.run()
+    return ctl, events, draws
+
+
+def click(ctl, pos):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=ctl.view.cell_rect(*pos).center)
+
+
+def test_click_after_late_frame_is_drawn(monkeypatch):
+    def make_batches(ctl):
+        a, b = ctl.model.mergeable_groups()[0][1][:2]
+        return [[], [click(ctl, a), click(ctl, b)]]
+
+    ctl, events, draws = run_controller(monkeypatch, make_batches, late_draws={1})
+    # 第一帧超出预算；第二轮处理了点击，仍要在这一轮渲染
+    assert draws[:2] == [1, 2]
+    assert ctl.model.moves == 1
+
+
+def test_poll_after_skipped_frame(monkeypatch):
+    ctl, events, draws = run_controller(monkeypatch, lambda ctl: [[], []], late_draws={1})
+    # 第二轮没有输入，跳过渲染；第三轮不能阻塞等待输入
+    assert draws[0] == 1 and 2 not in draws
+    gets = [i for i, entry in enumerate(events.log) if entry[0] == "get"]
+    third = events.log[gets[1] + 1:gets[2]]
+    assert all(entry[1] == 0 for entry in third)
+
+
+class BlockingSolver:
+    """best_move 阻塞到 release 被设置，返回第一组可合并的两个格子"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.models = []
+
+    def best_move(self, model):
+        self.models.append(model)
+        self.release.wait(5)
+        return tuple(model.mergeable_groups()[0][1][:2])
+
+    def close(self):
+        pass
+
+
+def finish_search(ctl):
+    ctl.solver.release.set()
+    ctl.search[3].result(timeout=5)
+    ctl.solver.release.clear()
+    ctl.poll_search()
+
+
+def test_hint_searches_in_background():
+    ctl = GameController(seed=1)
+    ctl.solver = BlockingSolver()
+    ctl.hint()
+    # 搜索未完成时主循环不等待，也不改动棋盘
+    ctl.poll_search()
+    assert ctl.search is not None and ctl.model.selected == []
+    move = tuple(ctl.model.mergeable_groups()[0][1][:2])
+    finish_search(ctl)
+    assert ctl.search is None
+    assert ctl.model.selected == [move[0]]
+    assert ctl.solver.models[0] is not ctl.model
+    ctl.search_pool.shutdown()
+
+
+def test_stale_search_result_is_dropped():
+    ctl = GameController(seed=1)
+    ctl.solver = BlockingSolver()
+    ctl.autoplay = True
+    ctl.auto_step()
+    ctl.model.reset(seed=2)
+    finish_search(ctl)
+    # 搜索的是重开前的局面，不能走到新局面上；下一次 auto_step 重新搜索
+    assert ctl.model.moves == 0
+    ctl.auto_step()
+    assert ctl.search is not None
+    finish_search(ctl)
+    assert len(ctl.solver.models) == 2 and ctl.model.moves == 1
+    ctl.search_pool.shutdown()
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+import crop
+
+COMMITTED = ("assets/select.png", "assets/item2_4.png")
+
+
+def digest(path):
+    with open(path, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+def run_batch(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["crop.py", "--batch", "--workers", "1", *argv])
+    with pytest.raises(SystemExit) as exit_info:
+        crop.main()
+    return exit_info.value.code
+
+
+def corners(img):
+    n, _, stats, _ = cv2.connectedComponentsWithStats((img[:, :, 3] > 127).astype(np.uint8))
+    area = stats[1:, cv2.CC_STAT_AREA]
+    return int((area >= area.max() * 0.5).sum())
+
+
+def test_default_batch_keeps_committed_assets(monkeypatch):
+    before = {path: digest(path) for path in COMMITTED}
+    listing = sorted(os.listdir("assets"))
+    assert run_batch(monkeypatch) == 0
+    assert {path: digest(path) for path in COMMITTED} == before
+    assert sorted(os.listdir("assets")) == listing
+
+
+def test_frame_keeps_every_ornament(monkeypatch, tmp_path):
+    assert run_batch(monkeypatch, "--out", str(tmp_path)) == 0
+    out = cv2.imread(str(tmp_path / "select.png"), cv2.IMREAD_UNCHANGED)
+    src = cv2.imread("source_pic/select.png", cv2.IMREAD_UNCHANGED)
+    assert out.shape == (crop.OUTPUT_SIZE, crop.OUTPUT_SIZE, 4)
+    # 四个角饰都在（透明通道中的大块部件数与原图相同）
+    assert corners(out) == corners(src) == 4
+
+
+def test_single_keeps_all_parts(tmp_path):
+    # 两个不相连、面积相近的部件组成一个道具
+    img = np.full((100, 200, 3), 255, dtype=np.uint8)
+    cv2.circle(img, (50, 50), 30, (0, 0, 200), -1)
+    cv2.circle(img, (150, 50), 25, (0, 200, 0), -1)
+    src = tmp_path / "item5_2.png"
+    cv2.imwrite(str(src), img)
+    opts = {"threshold": 240, "min_frac": 0.2, "padding": 0, "size": 200, "max_levels": {}}
+    os.makedirs(tmp_path / "out")
+    rel, outputs, _ = crop.process_source((str(src), "item5_2.png", str(tmp_path / "out"), opts))
+    assert outputs == ["item5_2.png"]
+    out = cv2.imread(str(tmp_path / "out" / "item5_2.png"), cv2.IMREAD_UNCHANGED)
+    n, _, _, _ = cv2.connectedComponentsWithStats((out[:, :, 3] > 127).astype(np.uint8))
+    assert n - 1 == 2
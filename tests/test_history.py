@@ -0,0 +1,65 @@
+import random
+import struct
+
+import pytest
+
+from history import History, load_game, save_game
+from model import GameModel
+from replay import MAGIC, Replay, ReplayError
+
+
+def play(model, moves, seed=5):
+    # 走法只取决于局面，与提示分组的顺序无关
+    rng = random.Random(seed)
+    for _ in range(moves):
+        groups = sorted(cells for _, cells in model.mergeable_groups())
+        if not groups:
+            break
+        for pos in rng.sample(rng.choice(groups), 2):
+            model.toggle_select(pos)
+
+
+def board(model):
+    return [model.grid.get(r, c) for r in range(model.rows) for c in range(model.cols)]
+
+
+@pytest.mark.parametrize("size", [6, 40])
+def test_load_continues_like_unsaved_game(tmp_path, size):
+    # 40x40 走 NumPy 的全量重建路径
+    saved = GameModel(seed=21, rows=size, cols=size)
+    saved.enable_history()
+    never = GameModel(seed=21, rows=size, cols=size)
+    play(saved, 25)
+    play(never, 25)
+    path = tmp_path / "save.m2s"
+    save_game(saved, path)
+    loaded = load_game(path)
+    assert loaded.rng.getstate() == never.rng.getstate()
+    play(loaded, 40, seed=6)
+    play(never, 40, seed=6)
+    assert board(loaded) == board(never)
+    assert loaded.score == never.score
+
+
+def test_seek_and_undo_continue_alike():
+    # 经关键帧跳转与逐步撤销回到同一步，随机数状态相同时后续生成相同
+    jumped = GameModel(seed=8)
+    jumped.history = History(jumped, interval=4)
+    stepped = GameModel(seed=8)
+    stepped.enable_history()
+    play(jumped, 40)
+    play(stepped, 40)
+    jumped.history.seek(jumped, 9)
+    for _ in range(jumped.history.pos, stepped.history.pos):
+        stepped.undo()
+    assert stepped.history.pos == jumped.history.pos == 9
+    assert board(jumped) == board(stepped)
+    play(jumped, 30, seed=6)
+    play(stepped, 30, seed=6)
+    assert board(jumped) == board(stepped)
+
+
+def test_old_replay_rejected():
+    data = MAGIC + struct.pack("<BHHQ", 2, 6, 6, 1) + bytes(64)
+    with pytest.raises(ReplayError, match="older spawn order"):
+        Replay.from_bytes(data)
@@ -0,0 +1,53 @@
+import config
+import view
+from controller import GameController
+from replay import Replay, verify
+
+
+class FakeWatcher:
+    def __init__(self, images=None, values=None):
+        self.images = images or {}
+        self.values = values or {}
+
+    def take(self):
+        images, values = self.images, self.values
+        self.images, self.values = {}, {}
+        return images, values
+
+
+def test_reload_max_levels_stops_recording(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "ITEM_MAX_LEVELS", {})
+    monkeypatch.setattr(view, "ITEM_MAX_LEVELS", {}, raising=False)
+    path = tmp_path / "game.m2r"
+    ctl = GameController(seed=4, record_path=str(path))
+    model = ctl.model
+    for _ in range(5):
+        a, b = model.mergeable_groups()[0][1][:2]
+        ctl.pick(a)
+        ctl.pick(b)
+    board = [model.grid.get(r, c) for r in range(model.rows) for c in range(model.cols)]
+    score = model.score
+
+    # 道具 1 的最高等级改为 1：棋盘与分数不变，道具 1 不再有提示
+    ctl.watcher = FakeWatcher(values={"ITEM_MAX_LEVELS": {1: 1}})
+    assert ctl.apply_reload()
+    assert model.item_max_levels[1] == 1
+    assert all(item != 1 for item, _ in model.hint_groups())
+    assert [model.grid.get(r, c) for r in range(model.rows) for c in range(model.cols)] == board
+    assert model.score == score
+
+    # 改动前的回放已经写出并能通过校验，之后不再录制
+    assert ctl.recorder is None
+    replay = Replay.load(path)
+    assert replay.max_levels[1] != 1
+    ok, _ = verify(replay)
+    assert ok
+
+
+def test_reload_without_level_change_keeps_recording(monkeypatch, tmp_path):
+    ctl = GameController(seed=4, record_path=str(tmp_path / "game.m2r"))
+    ctl.watcher = FakeWatcher(values={"BG_COLOR": (1, 2, 3)})
+    monkeypatch.setattr(config, "BG_COLOR", config.BG_COLOR)
+    monkeypatch.setattr(view, "BG_COLOR", view.BG_COLOR)
+    assert ctl.apply_reload()
+    assert ctl.recorder is not None
@@ -0,0 +1,56 @@
+import random
+
+from history import load_game, save_game
+from model import GameModel
+from results import ResultStore, model_max_levels, record_model
+
+
+def play(model, moves):
+    rng = random.Random(5)
+    for _ in range(moves):
+        groups = sorted(cells for _, cells in model.mergeable_groups())
+        if not groups:
+            break
+        for pos in rng.sample(rng.choice(groups), 2):
+            model.toggle_select(pos)
+
+
+def test_max_levels_survive_undo():
+    model = GameModel(seed=9)
+    model.enable_history()
+    play(model, 30)
+    reached = model_max_levels(model)
+    assert reached == model.board_max_levels()
+    while model.undo():
+        pass
+    assert model.moves == 0
+    assert model_max_levels(model) == reached
+    assert model.board_max_levels() != reached
+
+
+def test_max_levels_reset_and_load(tmp_path):
+    model = GameModel(seed=9)
+    model.enable_history()
+    play(model, 30)
+    reached = model_max_levels(model)
+    for _ in range(10):
+        model.undo()
+    path = tmp_path / "save.m2s"
+    save_game(model, path)
+    # 读档后从历史中恢复撤销前达到的等级
+    assert model_max_levels(load_game(path)) == reached
+
+    model.reset()
+    assert model_max_levels(model) == model.board_max_levels()
+
+
+def test_record_model_after_undo(tmp_path):
+    model = GameModel(seed=9)
+    model.enable_history()
+    play(model, 30)
+    reached = model_max_levels(model)
+    model.undo()
+    with ResultStore(str(tmp_path / "runs"), "a") as store:
+        record_model(store, model, "quit")
+    row = ResultStore(str(tmp_path / "runs")).column("max_level")[0]
+    assert {item: int(row[item]) for item in reached} == reached
@@ -0,0 +1,27 @@
+import pytest
+
+from rules import asset_rules, parse_levels
+
+
+def test_parse_levels():
+    assert parse_levels("1:6,2:5, 3:8") == {1: 6, 2: 5, 3: 8}
+    assert parse_levels("") == {}
+    assert parse_levels(None) == {}
+
+
+def test_parse_levels_rejects_bad_spec():
+    with pytest.raises(ValueError):
+        parse_levels("1=6")
+
+
+def test_asset_rules_match_assets(tmp_path, monkeypatch):
+    # 从其他目录运行时仍按仓库的素材检测
+    monkeypatch.chdir(tmp_path)
+    items, levels = asset_rules()
+    assert items == [1, 2, 3]
+    assert levels == {1: 6, 2: 5, 3: 8}
+    assert asset_rules(items="2", max_levels="2:4") == ([2], {1: 6, 2: 4, 3: 8})
+
+
+def test_asset_rules_without_assets(tmp_path):
+    assert asset_rules(str(tmp_path)) == ([1, 2, 3], {})
@@ -0,0 +1,63 @@
+import asyncio
+import random
+import threading
+
+import pytest
+
+from controller import GameController
+from rules import asset_rules
+from server import GameServer, SessionManager
+
+
+@pytest.fixture
+def server_port():
+    # 在后台线程里运行会话服务，端口由系统分配
+    manager = SessionManager(*asset_rules())
+    server = GameServer(manager, "127.0.0.1", 0)
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    tasks = []
+
+    async def serve():
+        tasks.append(asyncio.ensure_future(server.serve()))
+        while server.server is None or not server.server.sockets:
+            await asyncio.sleep(0.01)
+        ready.set()
+        try:
+            await tasks[0]
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=lambda: loop.run_until_complete(serve()), daemon=True)
+    thread.start()
+    assert ready.wait(5)
+    yield server.server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(tasks[0].cancel)
+    thread.join(5)
+    loop.close()
+
+
+def board(model):
+    return [[model.grid.get(r, c) for c in range(model.cols)] for r in range(model.rows)]
+
+
+def test_remote_game_matches_local(server_port):
+    local = GameController(seed=42)
+    remote = GameController(seed=42, connect=f"127.0.0.1:{server_port}")
+    try:
+        assert remote.model.item_max_levels == local.model.item_max_levels
+        assert board(remote.model) == board(local.model)
+        rng = random.Random(1)
+        for _ in range(300):
+            if local.model.game_over:
+                break
+            # 走法只取决于局面，两边选出同样的格子
+            groups = sorted(cells for _, cells in local.model.mergeable_groups())
+            for pos in rng.sample(rng.choice(groups), 2):
+                local.pick(pos)
+                remote.pick(pos)
+            assert board(remote.model) == board(local.model)
+        assert remote.model.score == local.model.score
+        assert remote.model.game_over == local.model.game_over
+    finally:
+        remote.model.close()
@@ -0,0 +1,55 @@
+import random
+
+from history import load_game, save_game
+from model import GameModel
+from replay import Replay, ReplayRecorder, verify
+from spawn import SpawnParams
+
+CUSTOM = SpawnParams(level_rolls=(0.3, 0.6, 0.9), danger_empty=5, copy_max_level=2, initial_fill=0.5)
+
+
+def play(model, moves, recorder=None):
+    # 走法只取决于局面，与提示分组的顺序无关
+    rng = random.Random(7)
+    for _ in range(moves):
+        groups = sorted(cells for _, cells in model.mergeable_groups())
+        if not groups:
+            break
+        for pos in rng.sample(rng.choice(groups), 2):
+            if recorder is not None:
+                recorder.pick(pos)
+            model.toggle_select(pos)
+
+
+def test_pack_roundtrip():
+    data = b"xx" + CUSTOM.pack() + b"yy"
+    params, off = SpawnParams.unpack_from(data, 2)
+    assert params == CUSTOM
+    assert data[off:] == b"yy"
+
+
+def test_replay_keeps_spawn_params(tmp_path):
+    model = GameModel(seed=3, spawn_params=CUSTOM)
+    recorder = ReplayRecorder(model)
+    play(model, 40, recorder)
+    path = tmp_path / "game.m2r"
+    recorder.finish(model).save(path)
+
+    replay = Replay.load(path)
+    assert replay.spawn_params == CUSTOM
+    ok, replayed = verify(replay)
+    assert ok
+    assert replayed.digest() == model.digest()
+
+
+def test_save_keeps_spawn_params(tmp_path):
+    model = GameModel(seed=3, spawn_params=CUSTOM)
+    model.enable_history()
+    play(model, 20)
+    path = tmp_path / "save.m2s"
+    save_game(model, path)
+
+    loaded = load_game(path)
+    assert loaded.spawn_params == CUSTOM
+    assert loaded.digest() == model.digest()
+    assert loaded.moves == model.moves
@@ -0,0 +1,75 @@
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model import GameModel
+from solver import Solver
+from results import ResultStore, model_config, model_max_levels
+from rules import ASSET_DIR, asset_rules
+
+
+def play_game(job):
+    # 单局无界面对局；搜索在本进程内完成，并行度放在对局之间
+    seed, items, max_levels, params, max_moves = job
+    model = GameModel(items, max_levels, seed=seed)
+    solver = Solver(workers=1, seed=seed, **params)
+    moves = solver.play(model, max_moves)
+    return seed, model.score, moves, model.game_over, model_max_levels(model), model_config(model, "mcts")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用 MCTS 自动对局，估计某套道具配置可达到的分数")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--assets", default=ASSET_DIR, help="按该目录的素材检测道具与最高等级，与游戏一致")
+    parser.add_argument("--items", default="", help="道具列表，例如 1,2,3；默认按素材检测")
+    parser.add_argument("--max-levels", default="", help="覆盖检测到的最高等级，例如 1:6,2:5,3:8")
+    parser.add_argument("--rollouts", type=int, default=200, help="每步的模拟次数")
+    parser.add_argument("--time-limit", type=float, default=0, help="每步的时间上限（秒），0 表示只按次数")
+    parser.add_argument("--depth", type=int, default=40, help="单次模拟的最大步数")
+    parser.add_argument("--max-moves", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="进程数，1 表示单进程")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--results", metavar="DIR", help="把每局结果追加到列式结果存储（tools/query.py 查询）")
+    args = parser.parse_args()
+
+    items, max_levels = asset_rules(args.assets, args.items, args.max_levels)
+    params = dict(rollouts=args.rollouts, time_limit=args.time_limit or None, depth=args.depth)
+    rng = random.Random(args.seed)
+    jobs = [(rng.getrandbits(63), items, max_levels, params, args.max_moves) for _ in range(args.games)]
+
+    start = time.perf_counter()
+    if args.workers == 1:
+        results = list(map(play_game, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(play_game, jobs))
+    elapsed = time.perf_counter() - start
+    if args.results:
+        with ResultStore(args.results, "a") as store:
+            for seed, score, n_moves, over, levels, config in results:
+                store.append(seed, store.config_id(config), n_moves, score,
+                             "no_merge" if over else "move_limit", levels)
+
+    scores = [r[1] for r in results]
+    moves = [r[2] for r in results]
+    print(f"games: {len(results)}  time: {elapsed:.2f}s  ({len(results) / elapsed:.2f} games/s)")
+    for name, values in (("score", scores), ("moves", moves)):
+        mean = sum(values) / len(values)
+        print(f"{name}: mean {mean:.1f}  p50 {percentile(values, 50)}  p90 {percentile(values, 90)}  "
+              f"p99 {percentile(values, 99)}  max {max(values)}")
+    best = max(results, key=lambda r: r[1])
+    print(f"best: score {best[1]} in {best[2]} moves (seed {best[0]})")
+
+
+if __name__ == "__main__":
+    main()
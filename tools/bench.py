@@ -0,0 +1,333 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from model import GameModel
+
+# 每个用例的计时方式与 timeit 相同：一批调用整体计时，批次累计到 --min-time 秒算一次重复，
+# 取 --repeat 次重复中的最小值与中位数。单次调用往往不到 1 微秒，逐次计时只会量到计时器本身的噪声。
+# 绘制一帧远长于计时器精度，逐帧计时，另外给出所有帧的 p50 / p99，用来发现偶发的慢帧
+TIME_KEYS = ("min_us", "median_us", "p50_us", "p99_us")
+# 采样局面的个数（can_merge / update_hints / spawn 在这些局面上计时）
+STATE_SAMPLES = 16
+# can_merge 之类的快操作在每个局面上连续调用的次数
+FAST_LOOPS = 64
+# 每个副本上连续生成的次数（分摊复制副本的开销）
+SPAWN_LOOPS = 8
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def measure(batch, repeat, min_time, frames=None):
+    # batch() 执行一批调用并自己计时，返回 (耗时, 调用数)；先预热一批，再做 repeat 次重复，返回每次重复的单次耗时（秒）。
+    # 与 timeit 一样计时期间关闭垃圾回收，避免回收的时机落在哪一批上造成抖动。
+    # frames 不为 None 时 batch 还把每帧的耗时追加到其中，预热的帧不计入
+    batch()
+    if frames is not None:
+        frames.clear()
+    per_op = []
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            elapsed = calls = 0
+            while elapsed < min_time or not calls:
+                t, n = batch()
+                elapsed += t
+                calls += n
+            per_op.append(elapsed / calls)
+    finally:
+        if enabled:
+            gc.enable()
+    return per_op
+
+
+def summarize(per_op, frames=None):
+    best = min(per_op)
+    summary = {
+        "ops_per_sec": 1 / best if best > 0 else 0.0,
+        "min_us": best * 1e6,
+        "median_us": percentile(per_op, 50) * 1e6,
+    }
+    if frames:
+        summary["p50_us"] = percentile(frames, 50) * 1e6
+        summary["p99_us"] = percentile(frames, 99) * 1e6
+    return summary
+
+
+def new_model(size, items, backend, seed):
+    return GameModel(list(range(1, items + 1)), {}, rows=size, cols=size, backend=backend, seed=seed)
+
+
+def pick_move(model, rng):
+    # 脚本化走法：在可合并的组里随机选一组，再随机选其中两个格子
+    groups = {}
+    for pos, idx in model.hints.items():
+        groups.setdefault(idx, []).append(pos)
+    if not groups:
+        return None
+    cells = groups[rng.choice(sorted(groups))]
+    cells.sort()
+    return tuple(rng.sample(cells, 2))
+
+
+def make_script(size, items, moves, seed, backend):
+    # 按脚本走 moves 步，局面结束时重开；返回走法列表（None 表示重开）。
+    # 模型和走法使用固定种子，在 new_model 上按脚本重放得到完全相同的局面
+    rng = random.Random(seed)
+    model = new_model(size, items, backend, seed)
+    script = []
+    for _ in range(moves):
+        move = None if model.game_over else pick_move(model, rng)
+        if move is None:
+            model.reset()
+        else:
+            model.merge(*move)
+        script.append(move)
+    return script
+
+
+def run_script(model, script, on_move):
+    # 按脚本重放；on_move 负责执行走法（并计时），返回它的耗时之和
+    elapsed = 0.0
+    for move in script:
+        if move is None:
+            model.reset()
+        else:
+            elapsed += on_move(move)
+    return elapsed
+
+
+def sample_states(size, items, script, seed, backend):
+    # 沿脚本均匀取 STATE_SAMPLES 个局面的副本
+    model = new_model(size, items, backend, seed)
+    step = max(1, len(script) // STATE_SAMPLES)
+    states = []
+    for i, move in enumerate(script):
+        if move is None:
+            model.reset()
+        else:
+            model.merge(*move)
+        if i % step == step - 1 and len(states) < STATE_SAMPLES:
+            states.append(model.clone())
+    return states or [model]
+
+
+def bench_model(size, items, moves, seed, backend, repeat, min_time):
+    script = make_script(size, items, moves, seed, backend)
+    merges = sum(1 for move in script if move is not None)
+    states = sample_states(size, items, script, seed, backend)
+    perf = time.perf_counter
+
+    def merge_batch():
+        # 一段连续走法整体计时，重开不计入
+        model = new_model(size, items, backend, seed)
+        elapsed = 0.0
+        start = perf()
+        for move in script:
+            if move is None:
+                elapsed += perf() - start
+                model.reset()
+                start = perf()
+            else:
+                model.merge(*move)
+        return elapsed + perf() - start, merges
+
+    def loop_batch(method, loops):
+        def batch():
+            start = perf()
+            for model in states:
+                fn = getattr(model, method)
+                for _ in range(loops):
+                    fn()
+            return perf() - start, len(states) * loops
+        return batch
+
+    def spawn_batch():
+        # spawn 会改变局面，每批在新的副本上生成；复制不计入
+        clones = [model.clone() for model in states]
+        start = perf()
+        for model in clones:
+            for _ in range(SPAWN_LOOPS):
+                model.spawn_smart_items(1)
+        return perf() - start, len(clones) * SPAWN_LOOPS
+
+    result = {
+        "merge": summarize(measure(merge_batch, repeat, min_time)),
+        "can_merge": summarize(measure(loop_batch("can_merge", FAST_LOOPS), repeat, min_time)),
+        "spawn_smart_items": summarize(measure(spawn_batch, repeat, min_time)),
+        "update_hints": summarize(measure(loop_batch("update_hints", 1), repeat, min_time)),
+    }
+
+    # 分配统计单独跑一遍，tracemalloc 会拖慢计时
+    model = new_model(size, items, backend, seed)
+    tracemalloc.start()
+    base = tracemalloc.take_snapshot()
+    for move in script:
+        if move is None:
+            model.reset()
+        else:
+            model.merge(*move)
+    stats = tracemalloc.take_snapshot().compare_to(base, "filename")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = sum(s.size_diff for s in stats if s.size_diff > 0)
+    result["merge"]["alloc_kb_per_op"] = allocated / 1024 / max(1, merges)
+    result["merge"]["peak_kb"] = peak / 1024
+    return result
+
+
+def bench_render(size, items, frames, seed, backend, repeat, min_time):
+    import pygame
+    from view import GameView
+
+    script = make_script(size, items, frames, seed, backend)
+    view = GameView(rows=size, cols=size)
+    perf = time.perf_counter
+    changed_frames = []
+    idle_frames = []
+
+    def changed_batch():
+        # 每步合成后画一帧，逐帧计时；合成与重开不计入
+        model = new_model(size, items, backend, seed)
+        view.draw(model)
+
+        def on_move(move):
+            model.merge(*move)
+            start = perf()
+            view.draw(model)
+            t = perf() - start
+            changed_frames.append(t)
+            return t
+
+        return run_script(model, script, on_move), sum(1 for move in script if move is not None)
+
+    idle_model = new_model(size, items, backend, seed)
+
+    def idle_batch():
+        # 局面不变时的一帧
+        view.draw(idle_model)
+        elapsed = 0.0
+        for _ in range(FAST_LOOPS):
+            start = perf()
+            view.draw(idle_model)
+            t = perf() - start
+            idle_frames.append(t)
+            elapsed += t
+        return elapsed, FAST_LOOPS
+
+    result = {
+        "draw_changed": summarize(measure(changed_batch, repeat, min_time, changed_frames), changed_frames),
+        "draw_idle": summarize(measure(idle_batch, repeat, min_time, idle_frames), idle_frames),
+    }
+    pygame.display.quit()
+    return result
+
+
+def compare(results, baseline, threshold, floor_ns=100, floor_alloc_kb=0.1):
+    # 返回 (用例, 指标, 基线值, 当前值) 的退化列表；
+    # 相对变慢超过 threshold 且绝对变慢超过 floor_ns 纳秒（分配多出 floor_alloc_kb）才算退化
+    regressions = []
+    for case, ops in results.items():
+        for op, metrics in ops.items():
+            base = baseline.get(case, {}).get(op)
+            if not base:
+                continue
+            for key, value in metrics.items():
+                ref = base.get(key)
+                if not ref:
+                    continue
+                if key in TIME_KEYS:
+                    floor = floor_ns / 1000
+                elif key == "alloc_kb_per_op":
+                    floor = floor_alloc_kb
+                else:
+                    continue
+                if value > ref * (1 + threshold) and value - ref > floor:
+                    regressions.append((case, f"{op}.{key}", ref, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模型热点与无界面渲染的性能基准")
+    parser.add_argument("--sizes", default="6,16,32,64", help="棋盘边长列表")
+    parser.add_argument("--items", default="3,8", help="道具种类数列表")
+    parser.add_argument("--moves", type=int, default=2000)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--backend", default="list", choices=["list", "packed"])
+    parser.add_argument("--no-render", action="store_true", help="跳过渲染基准")
+    parser.add_argument("--out", help="结果 JSON 输出路径，默认打印到标准输出")
+    parser.add_argument("--baseline", help="与该基线 JSON 比较")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的重复次数，取最小值与中位数")
+    parser.add_argument("--min-time", type=float, default=0.2, help="每次重复至少计时的秒数")
+    parser.add_argument("--threshold", type=float, default=0.15, help="允许的相对退化比例")
+    parser.add_argument("--floor-ns", type=float, default=100, help="单次调用至少变慢这么多纳秒才算退化")
+    parser.add_argument("--save-baseline", help="把本次结果另存为基线")
+    args = parser.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",")]
+    item_counts = [int(x) for x in args.items.split(",")]
+
+    results = {}
+    for size in sizes:
+        for items in item_counts:
+            case = f"{size}x{size}/items{items}"
+            print(f"running {case} ...", file=sys.stderr)
+            ops = bench_model(size, items, args.moves, args.seed, args.backend, args.repeat, args.min_time)
+            if not args.no_render:
+                ops.update(bench_render(size, items, args.frames, args.seed, args.backend,
+                                        args.repeat, args.min_time))
+            results[case] = ops
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "backend": args.backend,
+            "seed": args.seed,
+            "moves": args.moves,
+            "frames": args.frames,
+            "repeat": args.repeat,
+            "min_time": args.min_time,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.floor_ns)
+        for case, key, ref, value in regressions:
+            print(f"REGRESSION {case} {key}: {ref:.4g} -> {value:.4g}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("no regressions", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
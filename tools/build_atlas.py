@@ -0,0 +1,27 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import atlas
+from config import ATLAS_CACHE_DIR, TILE_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把 assets 中的图片预缩放并打包成图集")
+    parser.add_argument("--assets", default="assets")
+    parser.add_argument("--cache-dir", default=ATLAS_CACHE_DIR)
+    parser.add_argument("--size", type=int, nargs="+", default=[TILE_SIZE], help="目标格子尺寸，可给多个")
+    args = parser.parse_args()
+
+    for size in args.size:
+        start = time.perf_counter()
+        count = atlas.build_atlas(args.assets, args.cache_dir, size)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{atlas.atlas_path(args.cache_dir, size)}: {count} images, {elapsed:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
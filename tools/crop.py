@@ -1,97 +1,292 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import cv2
 import numpy as np
-import os
 
-def sort_contours(cnts, method="left-to-right"):
-    # 初始化包围框列表
-    boundingBoxes = [cv2.boundingRect(c) for c in cnts]
-    (cnts, boundingBoxes) = zip(*sorted(zip(cnts, boundingBoxes),
-        key=lambda b:b[1][1], reverse=False)) # 先按Y轴（行）粗略排序
-
-    # 简单的分行逻辑
-    rows = []
-    current_row = []
-    if boundingBoxes:
-        last_y = boundingBoxes[0][1]
-        last_h = boundingBoxes[0][3]
-        
-        for (cnt, bbox) in zip(cnts, boundingBoxes):
-            x, y, w, h = bbox
-            # 如果当前物体的Y值与上一行差异超过物体高度的一半，则视为新的一行
-            if y > last_y + last_h / 2:
-                # 对当前行按X轴排序（从左到右）
-                current_row.sort(key=lambda z: z[1][0])
-                rows.extend(current_row)
-                current_row = []
-                last_y = y
-                last_h = h
-            current_row.append((cnt, bbox))
-        
-        # 添加最后一行
-        current_row.sort(key=lambda z: z[1][0])
-        rows.extend(current_row)
-
-    return [r[0] for r in rows]
-
-def crop_bowls(image_path):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rules import parse_levels
+
+# 批量模式：源图文件名决定输出
+#   item{id}.png / item{id}_sheet*.png  整张道具图，按行从左到右依次切成 1 级、2 级……
+#   item{id}_{lvl}.png / lv{n}.png      单个道具，保留面积达到 min_frac 的全部部件（多部件的图不会被拆掉）
+#   select.png                          选中框，由分散的角饰组成，不做物体检测，整张保留透明通道后补成正方形
+SHEET_PATTERN = re.compile(r"^item(\d+)(?:_sheet\w*)?\.(?:png|jpe?g)$", re.IGNORECASE)
+SINGLE_PATTERN = re.compile(r"^(item\d+_\d+|lv\d+)\.(?:png|jpe?g)$", re.IGNORECASE)
+FRAME_PATTERN = re.compile(r"^(select)\.(?:png|jpe?g)$", re.IGNORECASE)
+# 未指定 --out 时的输出目录；该目录中的图片已提交到仓库，只有显式给出 --out 或 --force 才会写入
+DEFAULT_OUT = "assets"
+MANIFEST_NAME = "crop_manifest.json"
+# 输出为正方形透明 PNG，边长 OUTPUT_SIZE；游戏按格子大小再缩放
+OUTPUT_SIZE = 256
+# 与 board 的紧凑编码一致，每种道具最多 15 级
+MAX_LEVEL = 15
+
+
+def find_sprites(img, threshold=240, min_frac=0.2):
+    # 连通域统计一次得到所有物体的包围框与面积，过滤全部用数组运算完成：
+    # 面积不到最大物体 min_frac 倍的视为噪点，不随图片分辨率变化
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    _, thresh = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY_INV)
+    if img.ndim == 3 and img.shape[2] == 4:
+        # 带透明通道时，透明像素一律当作背景
+        thresh[img[:, :, 3] == 0] = 0
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(thresh, connectivity=8)
+    stats = stats[1:]
+    if len(stats) == 0:
+        return labels, np.zeros((0, 5), dtype=np.int64)
+    area = stats[:, cv2.CC_STAT_AREA]
+    keep = area >= area.max() * min_frac
+    ids = np.flatnonzero(keep) + 1
+    boxes = np.column_stack([stats[keep, :4], ids])
+
+    # 分行：先按 y 排序，y 超过本行首个物体高度一半的起新行，行内按 x 排序
+    boxes = boxes[np.argsort(boxes[:, 1], kind="stable")]
+    row_of = np.zeros(len(boxes), dtype=np.int64)
+    row, top, height = 0, boxes[0, 1], boxes[0, 3]
+    for i in range(1, len(boxes)):
+        if boxes[i, 1] > top + height / 2:
+            row, top, height = row + 1, boxes[i, 1], boxes[i, 3]
+        row_of[i] = row
+    return labels, boxes[np.lexsort((boxes[:, 0], row_of))]
+
+
+def merge_boxes(boxes):
+    # 多个物体合成一个包围框 (x, y, w, h)
+    x0, y0 = boxes[:, 0].min(), boxes[:, 1].min()
+    x1, y1 = (boxes[:, 0] + boxes[:, 2]).max(), (boxes[:, 1] + boxes[:, 3]).max()
+    return np.array([x0, y0, x1 - x0, y1 - y0, boxes[0, 4]])
+
+
+def cut_sprite(img, labels, box, padding=5, size=OUTPUT_SIZE, ids=None):
+    # 按包围框外扩 padding 切出，透明通道取物体自身的连通域（ids 给出时取这些连通域的并集），再居中补成正方形并缩放
+    x, y, w, h, label = (int(v) for v in box)
+    H, W = labels.shape
+    x0, y0 = max(0, x - padding), max(0, y - padding)
+    x1, y1 = min(W, x + w + padding), min(H, y + h + padding)
+    crop = img[y0:y1, x0:x1]
+    if crop.ndim == 2:
+        crop = cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR)
+    region = labels[y0:y1, x0:x1]
+    mask = (np.isin(region, ids) if ids is not None else region == label).astype(np.uint8) * 255
+    if padding:
+        kernel = np.ones((3, 3), np.uint8)
+        mask = cv2.dilate(mask, kernel, iterations=max(1, padding // 2))
+    rgba = np.dstack([crop[:, :, :3], mask])
+    if crop.shape[2] == 4:
+        rgba[:, :, 3] = np.minimum(mask, crop[:, :, 3])
+    return fit_square(rgba, size)
+
+
+def fit_frame(img, size=OUTPUT_SIZE):
+    # 选中框：整张图原样保留（没有透明通道时视为不透明），只补成正方形并缩放
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if img.shape[2] == 4:
+        rgba = img
+    else:
+        rgba = np.dstack([img, np.full(img.shape[:2], 255, dtype=np.uint8)])
+    return fit_square(rgba, size)
+
+
+def fit_square(rgba, size):
+    side = max(rgba.shape[0], rgba.shape[1])
+    square = np.zeros((side, side, 4), dtype=np.uint8)
+    oy, ox = (side - rgba.shape[0]) // 2, (side - rgba.shape[1]) // 2
+    square[oy:oy + rgba.shape[0], ox:ox + rgba.shape[1]] = rgba
+    interp = cv2.INTER_AREA if side > size else cv2.INTER_CUBIC
+    return cv2.resize(square, (size, size), interpolation=interp)
+
+
+def file_hash(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def plan_outputs(name):
+    # 返回 ("sheet", item_id) / ("single", 输出文件名) / ("frame", 输出文件名) / None（跳过）
+    m = SHEET_PATTERN.match(name)
+    if m:
+        return "sheet", int(m.group(1))
+    m = SINGLE_PATTERN.match(name)
+    if m:
+        return "single", m.group(1).lower() + ".png"
+    m = FRAME_PATTERN.match(name)
+    if m:
+        return "frame", m.group(1).lower() + ".png"
+    return None
+
+
+def write_png(out_dir, name, image):
+    out_path = os.path.join(out_dir, name)
+    tmp = out_path + ".tmp.png"
+    cv2.imwrite(tmp, image)
+    os.replace(tmp, out_path)
+
+
+def process_source(job):
+    # 子进程：切一张源图，返回 (相对路径, 输出文件列表, 说明)
+    path, rel, out_dir, opts = job
+    kind, target = plan_outputs(os.path.basename(path))
+    img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        return rel, None, "cannot read image"
+    if kind == "frame":
+        write_png(out_dir, target, fit_frame(img, opts["size"]))
+        return rel, [target], "frame"
+    labels, boxes = find_sprites(img, opts["threshold"], opts["min_frac"])
+    if len(boxes) == 0:
+        return rel, None, "no sprites found"
+    if kind == "single":
+        # 一个道具可能由几个不相连的部分组成，全部保留
+        write_png(out_dir, target, cut_sprite(img, labels, merge_boxes(boxes), opts["padding"], opts["size"],
+                                              ids=boxes[:, 4]))
+        return rel, [target], f"1 sprite from {len(boxes)} parts" if len(boxes) > 1 else "1 sprite"
+    max_level = opts["max_levels"].get(str(target), MAX_LEVEL)
+    outputs = []
+    for lvl, box in enumerate(boxes[:max_level], 1):
+        name = f"item{target}_{lvl}.png"
+        write_png(out_dir, name, cut_sprite(img, labels, box, opts["padding"], opts["size"]))
+        outputs.append(name)
+    note = f"{len(outputs)} sprites"
+    if len(boxes) > len(outputs):
+        note += f" ({len(boxes) - len(outputs)} extra ignored)"
+    return rel, outputs, note
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def batch(args):
+    opts = {
+        "threshold": args.threshold,
+        "min_frac": args.min_frac,
+        "padding": args.padding,
+        "size": args.size,
+        "max_levels": {str(k): v for k, v in parse_levels(args.max_levels).items()},
+    }
+    # 切图参数也计入签名，参数变化后所有源图都会重切
+    signature = hashlib.blake2b(json.dumps(opts, sort_keys=True).encode(), digest_size=8).hexdigest()
+    # 没有显式给出 --out 时不覆盖仓库中的素材，只列出将要生成的文件
+    dry_run = args.out is None and not args.force
+    out_dir = args.out or DEFAULT_OUT
+    manifest_path = args.manifest or os.path.join(out_dir, ".cache", MANIFEST_NAME)
+    manifest = {} if args.force else load_manifest(manifest_path)
+
+    jobs, hashes, skipped = [], {}, 0
+    for root, _, files in os.walk(args.src):
+        for name in sorted(files):
+            if plan_outputs(name) is None:
+                continue
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, args.src)
+            digest = file_hash(path)
+            entry = manifest.get(rel)
+            if (entry and entry.get("hash") == digest and entry.get("params") == signature
+                    and all(os.path.isfile(os.path.join(out_dir, o)) for o in entry.get("outputs", []))):
+                skipped += 1
+                continue
+            hashes[rel] = digest
+            jobs.append((path, rel, out_dir, opts))
+
+    if dry_run:
+        for path, rel, _, _ in jobs:
+            kind, target = plan_outputs(os.path.basename(path))
+            print(f"would cut {rel} -> " + (f"item{target}_*.png" if kind == "sheet" else target))
+        print(f"{len(jobs)} sources to cut, {skipped} unchanged; nothing written. "
+              f"Pass --out DIR, or --force to overwrite {DEFAULT_OUT}/")
+        return 0
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    if args.workers == 1 or len(jobs) <= 1:
+        results = map(process_source, jobs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=args.workers)
+        results = pool.map(process_source, jobs)
+    failed = 0
+    for rel, outputs, note in results:
+        if outputs is None:
+            failed += 1
+            print(f"FAIL {rel}: {note}")
+            continue
+        manifest[rel] = {"hash": hashes[rel], "params": signature, "outputs": outputs}
+        print(f"ok   {rel}: {note}")
+    if pool is not None:
+        pool.shutdown()
+    save_manifest(manifest_path, manifest)
+    print(f"{len(jobs)} processed, {skipped} unchanged, {failed} failed in {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+
+def crop_bowls(image_path, max_items=14, min_frac=0.2):
     # 1. 读取图片
     img = cv2.imread(image_path)
     if img is None:
         print("错误：找不到图片文件")
         return
 
-    # 2. 预处理：转灰度 -> 二值化
-    # 这一步是为了让背景变黑，物体变白，方便轮廓检测
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    # 因为背景是浅色的，我们用阈值处理，把浅色背景过滤掉
-    # 240是一个阈值，可以根据实际情况微调
-    _, thresh = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY_INV)
-
-    # 3. 查找轮廓
-    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    # 4. 过滤噪点
-    valid_contours = []
-    for c in contours:
-        area = cv2.contourArea(c)
-        # 过滤掉太小的噪点，只保留碗的大小（根据图片分辨率大概估算）
-        if area > 5000: 
-            valid_contours.append(c)
-
-    # 5. 排序：确保顺序是 第一行(左->右) -> 第二行(左->右)
-    sorted_cnts = sort_contours(valid_contours)
-
-    # 6. 切割并保存
-    count = 0
-    # 我们只需要前6个（排除掉最后的问号，或者只取前6个）
-    max_items = 14 
-    
-    print(f"检测到 {len(sorted_cnts)} 个物体，正在输出前 {max_items} 个...")
-
-    for i, c in enumerate(sorted_cnts):
-        if count >= max_items:
-            break
-            
-        # 获取包围框
-        x, y, w, h = cv2.boundingRect(c)
-        
-        # 稍微向外扩一点点边距，防止切太紧
-        padding = 5
-        x = max(0, x - padding)
-        y = max(0, y - padding)
-        w += padding * 2
-        h += padding * 2
-        
-        # 切割
-        crop = img[y:y+h, x:x+w]
-        
-        # 保存为PNG，保留透明通道（如果原图有）或单纯保存为高质量PNG
+    # 2. 二值化并按连通域找出物体，按 第一行(左->右) -> 第二行(左->右) 排序
+    labels, boxes = find_sprites(img, min_frac=min_frac)
+
+    print(f"检测到 {len(boxes)} 个物体，正在输出前 {max_items} 个...")
+
+    # 3. 切割并保存（稍微向外扩一点点边距，防止切太紧）
+    padding = 5
+    H, W = img.shape[:2]
+    for count, (x, y, w, h, _) in enumerate(boxes[:max_items]):
+        x0, y0 = max(0, x - padding), max(0, y - padding)
+        crop = img[y0:min(H, y + h + padding), x0:min(W, x + w + padding)]
         output_name = f'rice_{count + 1}.png'
         cv2.imwrite(output_name, crop)
         print(f"已保存: {output_name}")
-        
-        count += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从素材图中切出道具图片")
+    parser.add_argument("image", nargs="?", default="source_pic/source3.png", help="单张模式的源图")
+    parser.add_argument("--max-items", type=int, default=14, help="单张模式最多输出的物体数")
+    parser.add_argument("--batch", action="store_true", help="批量处理 --src 下的所有源图，输出到 --out")
+    parser.add_argument("--src", default="source_pic")
+    parser.add_argument("--out", help=f"输出目录；不给出时只列出将要生成的文件，加 --force 才写入 {DEFAULT_OUT}/")
+    parser.add_argument("--manifest", help=f"增量清单路径，默认 <out>/.cache/{MANIFEST_NAME}")
+    parser.add_argument("--force", action="store_true", help=f"忽略清单，全部重切；未给出 --out 时写入 {DEFAULT_OUT}/")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="进程数，1 表示单进程")
+    parser.add_argument("--threshold", type=int, default=240, help="背景亮度阈值")
+    parser.add_argument("--min-frac", type=float, default=0.2, help="面积小于最大物体该比例的视为噪点")
+    parser.add_argument("--padding", type=int, default=5)
+    parser.add_argument("--size", type=int, default=OUTPUT_SIZE, help="输出图片边长")
+    parser.add_argument("--max-levels", default="", help="每种道具最多切出的等级数，例如 1:6,2:5")
+    args = parser.parse_args()
+
+    if args.batch:
+        sys.exit(batch(args))
+    crop_bowls(args.image, args.max_items, args.min_frac)
+
 
 if __name__ == "__main__":
-    # 请确保文件名与你上传的一致
-    crop_bowls('source_pic/source3.png')
\ No newline at end of file
+    main()
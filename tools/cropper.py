@@ -2,6 +2,81 @@ import sys
 import os
 import pygame
 
+# 窗口最大尺寸（不超过屏幕的 90%）与代理图最长边；超大图只在放大到超过代理精度时才读原图像素
+MAX_WINDOW = (1600, 1000)
+PROXY_SIZE = 2048
+ZOOM_STEP = 1.25
+MAX_ZOOM = 16.0
+
+
+class Viewport:
+    """原图坐标与窗口坐标的换算：窗口左上角对应原图 (x, y)，每个原图像素占 zoom 个窗口像素"""
+
+    def __init__(self, img_size, win_size):
+        self.img_w, self.img_h = img_size
+        self.win_w, self.win_h = win_size
+        self.fit()
+
+    def fit(self):
+        self.zoom = min(self.win_w / self.img_w, self.win_h / self.img_h)
+        self.x = (self.img_w - self.win_w / self.zoom) / 2
+        self.y = (self.img_h - self.win_h / self.zoom) / 2
+
+    def resize(self, win_size):
+        cx, cy = self.to_image(self.win_w / 2, self.win_h / 2)
+        self.win_w, self.win_h = win_size
+        self.x = cx - self.win_w / self.zoom / 2
+        self.y = cy - self.win_h / self.zoom / 2
+
+    def to_image(self, sx, sy):
+        return self.x + sx / self.zoom, self.y + sy / self.zoom
+
+    def to_screen(self, ix, iy):
+        return (ix - self.x) * self.zoom, (iy - self.y) * self.zoom
+
+    def zoom_at(self, sx, sy, factor):
+        # 以鼠标位置为中心缩放，最小缩到整图可见
+        ix, iy = self.to_image(sx, sy)
+        fit = min(self.win_w / self.img_w, self.win_h / self.img_h)
+        self.zoom = max(fit, min(MAX_ZOOM, self.zoom * factor))
+        self.x = ix - sx / self.zoom
+        self.y = iy - sy / self.zoom
+
+    def pan(self, dx, dy):
+        self.x -= dx / self.zoom
+        self.y -= dy / self.zoom
+
+    def state(self):
+        return self.x, self.y, self.zoom, self.win_w, self.win_h
+
+    def screen_rect(self, rect):
+        x0, y0 = self.to_screen(rect.x, rect.y)
+        x1, y1 = self.to_screen(rect.right, rect.bottom)
+        return pygame.Rect(round(x0), round(y0), max(1, round(x1 - x0)), max(1, round(y1 - y0)))
+
+
+def render_view(view, img, proxy, proxy_scale, win_size):
+    # 只缩放可见区域：缩小显示时取代理图，放大到超过代理精度时取原图
+    surf = pygame.Surface(win_size)
+    surf.fill((30, 30, 30))
+    if view.zoom <= proxy_scale:
+        src, scale = proxy, proxy_scale
+    else:
+        src, scale = img, 1.0
+    # 可见区域在源图上的范围（向外取整，再裁到源图内）
+    x0 = max(0, int(view.x * scale))
+    y0 = max(0, int(view.y * scale))
+    x1 = min(src.get_width(), int((view.x + view.win_w / view.zoom) * scale) + 1)
+    y1 = min(src.get_height(), int((view.y + view.win_h / view.zoom) * scale) + 1)
+    if x1 <= x0 or y1 <= y0:
+        return surf
+    part = src.subsurface((x0, y0, x1 - x0, y1 - y0))
+    sx, sy = view.to_screen(x0 / scale, y0 / scale)
+    size = (max(1, round((x1 - x0) / scale * view.zoom)), max(1, round((y1 - y0) / scale * view.zoom)))
+    surf.blit(pygame.transform.scale(part, size), (round(sx), round(sy)))
+    return surf
+
+
 def main():
     if len(sys.argv) < 2:
         print("usage: python tools/cropper.py <image_path> [item_id]")
@@ -21,69 +96,162 @@ def main():
         return
 
     pygame.init()
-    img = pygame.image.load(src_path).convert_alpha()
+    info = pygame.display.Info()
+    img = pygame.image.load(src_path)
     w, h = img.get_width(), img.get_height()
-    screen = pygame.display.set_mode((w, h))
-    
+    win_w = min(w, MAX_WINDOW[0], int(info.current_w * 0.9) if info.current_w > 0 else MAX_WINDOW[0])
+    win_h = min(h, MAX_WINDOW[1], int(info.current_h * 0.9) if info.current_h > 0 else MAX_WINDOW[1])
+    screen = pygame.display.set_mode((win_w, win_h), pygame.RESIZABLE)
+    img = img.convert_alpha()
+    # 代理图：最长边不超过 PROXY_SIZE，启动时缩放一次
+    proxy_scale = min(1.0, PROXY_SIZE / max(w, h))
+    if proxy_scale < 1.0:
+        proxy = pygame.transform.smoothscale(img, (max(1, round(w * proxy_scale)), max(1, round(h * proxy_scale))))
+    else:
+        proxy = img
+
     prefix_str = f"item{item_id}_" if item_id else "lv"
-    pygame.display.set_caption(f"选择区域: 1..6 保存为 {prefix_str}X.png | Esc 退出 | R 重置")
-    clock = pygame.time.Clock()
+    pygame.display.set_caption(f"选择区域: 1..9 加入队列 {prefix_str}X.png | Enter 保存 | Esc 退出")
     font = pygame.font.SysFont("arial", 18, bold=True)
+    tip = font.render("拖拽选择 | 滚轮缩放 右键拖动平移 F 适应 | 1..9 入队 Backspace 撤回 Enter 保存 | R 重置 | Esc 退出",
+                      True, (255, 255, 255))
+    labels = {}
+
+    view = Viewport((w, h), (win_w, win_h))
+    view_cache = None
+    view_state = None
+    overlay = pygame.Surface((win_w, win_h), pygame.SRCALPHA)
 
     selecting = False
+    panning = False
     start = None
-    rect = None
+    rect = None          # 当前选区，原图坐标
+    queue = []           # [(原图坐标 Rect, 等级)]
+    dirty = True
+
+    def out_name(lv):
+        return f"item{item_id}_{lv}.png" if item_id else f"lv{lv}.png"
+
+    def save_queue():
+        os.makedirs("assets", exist_ok=True)
+        for r, lv in queue:
+            out_path = os.path.join("assets", out_name(lv))
+            pygame.image.save(img.subsurface(r).copy(), out_path)
+            print("saved:", out_path)
+        queue.clear()
+
+    def image_rect(a, b):
+        # 两个窗口坐标点围成的选区，换算回原图坐标并裁到图内
+        ax, ay = view.to_image(*a)
+        bx, by = view.to_image(*b)
+        x0, x1 = sorted((ax, bx))
+        y0, y1 = sorted((ay, by))
+        r = pygame.Rect(round(x0), round(y0), round(x1 - x0), round(y1 - y0))
+        return r.clip(pygame.Rect(0, 0, w, h))
 
     running = True
     while running:
-        for event in pygame.event.get():
+        # 没有输入时阻塞等待，不再每帧重画
+        events = [pygame.event.wait()] + pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.VIDEORESIZE:
+                win_w, win_h = max(1, event.w), max(1, event.h)
+                screen = pygame.display.set_mode((win_w, win_h), pygame.RESIZABLE)
+                overlay = pygame.Surface((win_w, win_h), pygame.SRCALPHA)
+                view.resize((win_w, win_h))
+                dirty = True
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty = True
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
                 elif event.key == pygame.K_r:
                     rect = None
-                elif pygame.K_1 <= event.key <= pygame.K_6:
-                    if rect:
+                elif event.key == pygame.K_f:
+                    view.fit()
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    view.zoom_at(win_w / 2, win_h / 2, ZOOM_STEP)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    view.zoom_at(win_w / 2, win_h / 2, 1 / ZOOM_STEP)
+                elif event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
+                    step_x, step_y = win_w // 10, win_h // 10
+                    dx = {pygame.K_LEFT: step_x, pygame.K_RIGHT: -step_x}.get(event.key, 0)
+                    dy = {pygame.K_UP: step_y, pygame.K_DOWN: -step_y}.get(event.key, 0)
+                    view.pan(dx, dy)
+                elif pygame.K_1 <= event.key <= pygame.K_9:
+                    if rect and rect.w > 0 and rect.h > 0:
                         lv = event.key - pygame.K_0
-                        sub = img.subsurface(rect).copy()
-                        os.makedirs("assets", exist_ok=True)
-                        if item_id:
-                            out_name = f"item{item_id}_{lv}.png"
-                        else:
-                            out_name = f"lv{lv}.png"
-                        out_path = os.path.join("assets", out_name)
-                        pygame.image.save(sub, out_path)
-                        print("saved:", out_path)
-            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                selecting = True
-                start = event.pos
-                rect = pygame.Rect(start, (0, 0))
-            elif event.type == pygame.MOUSEMOTION and selecting:
-                x, y = event.pos
-                sx, sy = start
-                rect = pygame.Rect(min(sx, x), min(sy, y), abs(x - sx), abs(y - sy))
-            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                selecting = False
-
-        screen.fill((30, 30, 30))
-        screen.blit(img, (0, 0))
-        if rect and rect.w > 0 and rect.h > 0:
-            overlay = pygame.Surface((rect.w, rect.h), pygame.SRCALPHA)
-            overlay.fill((255, 255, 255, 50))
-            screen.blit(overlay, (rect.x, rect.y))
-            pygame.draw.rect(screen, (255, 215, 0), rect, width=2)
+                        queue[:] = [(r, l) for r, l in queue if l != lv]
+                        queue.append((rect, lv))
+                        print(f"queued: {out_name(lv)} {tuple(rect)}")
+                        rect = None
+                elif event.key == pygame.K_BACKSPACE:
+                    if queue:
+                        queue.pop()
+                elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER, pygame.K_s):
+                    save_queue()
+                dirty = True
+            elif event.type == pygame.MOUSEWHEEL:
+                mx, my = pygame.mouse.get_pos()
+                view.zoom_at(mx, my, ZOOM_STEP ** event.y)
+                dirty = True
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1:
+                    selecting = True
+                    start = event.pos
+                    rect = None
+                elif event.button in (2, 3):
+                    panning = True
+            elif event.type == pygame.MOUSEMOTION:
+                if selecting:
+                    rect = image_rect(start, event.pos)
+                    dirty = True
+                elif panning:
+                    view.pan(*event.rel)
+                    dirty = True
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1:
+                    selecting = False
+                elif event.button in (2, 3):
+                    panning = False
 
-        tip = "拖拽选择区域 | 按 1..6 保存为 lv1..lv6 | R 重置 | Esc 退出"
-        surf = font.render(tip, True, (255, 255, 255))
-        screen.blit(surf, (10, 10))
+        if not dirty:
+            continue
+        dirty = False
+        # 视口没变时复用上一次缩放好的画面，只重画选区和文字
+        if view.state() != view_state:
+            view_state = view.state()
+            view_cache = render_view(view, img, proxy, proxy_scale, (win_w, win_h))
+        screen.blit(view_cache, (0, 0))
 
+        overlay.fill((0, 0, 0, 0))
+        for r, lv in queue:
+            sr = view.screen_rect(r)
+            overlay.fill((120, 200, 255, 40), sr)
+            pygame.draw.rect(overlay, (120, 200, 255, 255), sr, width=2)
+        if rect and rect.w > 0 and rect.h > 0:
+            sr = view.screen_rect(rect)
+            overlay.fill((255, 255, 255, 50), sr)
+            pygame.draw.rect(overlay, (255, 215, 0, 255), sr, width=2)
+        screen.blit(overlay, (0, 0))
+        for r, lv in queue:
+            label = labels.get(lv)
+            if label is None:
+                label = labels[lv] = font.render(out_name(lv), True, (120, 200, 255))
+            screen.blit(label, view.screen_rect(r).move(4, 4))
+
+        screen.blit(tip, (10, 10))
+        status = font.render(
+            f"{view.zoom * 100:.0f}%  queued {len(queue)}" + (f"  sel {rect.w}x{rect.h}" if rect else ""),
+            True, (255, 255, 255))
+        screen.blit(status, (10, win_h - 28))
         pygame.display.flip()
-        clock.tick(60)
 
+    if queue:
+        print(f"discarded {len(queue)} unsaved crops")
     pygame.quit()
 
 if __name__ == "__main__":
     main()
-
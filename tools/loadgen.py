@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from protocol import BoardMirror, ProtocolError, parse_response
+from config import SERVER_HOST, SERVER_PORT
+
+
+def pick_move(mirror, rng):
+    # 在可合并的组里随机选一组，再随机选其中两个格子
+    cells = {}
+    groups = mirror.groups
+    for idx, code in enumerate(mirror.codes):
+        if code in groups:
+            cells.setdefault(code, []).append(idx)
+    if not cells:
+        return None
+    members = cells[rng.choice(sorted(cells))]
+    return rng.sample(members, 2)
+
+
+async def run_connection(host, port, sessions, deadline, rng, stats):
+    # 一个连接上同时推进 sessions 个会话：每轮为每个会话发一条请求，整批流水线发送后依次读取响应
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"".join(f"new {rng.getrandbits(63)}\n".encode() for _ in range(sessions)))
+    mirrors = {}
+    for _ in range(sessions):
+        sid, kind, fields = parse_response((await reader.readline()).decode())
+        mirror = mirrors[sid] = BoardMirror()
+        mirror.apply(kind, fields)
+    stats["sessions"] += sessions
+
+    latencies = stats["latencies"]
+    while time.perf_counter() < deadline:
+        batch = []
+        for sid, mirror in mirrors.items():
+            move = None if mirror.game_over else pick_move(mirror, rng)
+            if move is None:
+                batch.append(f"reset {sid}\n")
+                stats["resets"] += 1
+            else:
+                batch.append(f"merge {sid} {move[0]} {move[1]}\n")
+        sent = time.perf_counter()
+        writer.write("".join(batch).encode())
+        for _ in batch:
+            line = (await reader.readline()).decode()
+            latencies.append(time.perf_counter() - sent)
+            try:
+                sid, kind, fields = parse_response(line)
+            except ProtocolError:
+                stats["errors"] += 1
+                continue
+            mirrors[sid].apply(kind, fields)
+            if kind == "diff":
+                stats["moves"] += 1
+    writer.write(b"".join(f"close {sid}\n".encode() for sid in mirrors))
+    for _ in mirrors:
+        await reader.readline()
+    writer.close()
+
+
+async def run_client(host, port, connections, sessions, duration, seed):
+    rng = random.Random(seed)
+    stats = {"sessions": 0, "moves": 0, "resets": 0, "errors": 0, "latencies": []}
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[
+        run_connection(host, port, sessions, deadline, random.Random(rng.getrandbits(63)), stats)
+        for _ in range(connections)
+    ])
+    return stats
+
+
+def client_process(job):
+    host, port, connections, sessions, duration, seed = job
+    return asyncio.run(run_client(host, port, connections, sessions, duration, seed))
+
+
+async def server_info(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"info\n")
+    line = (await reader.readline()).decode()
+    writer.close()
+    return parse_response(line)[2]
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="会话服务的压测客户端")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--procs", type=int, default=1, help="压测进程数")
+    parser.add_argument("--connections", type=int, default=20, help="每个进程的连接数")
+    parser.add_argument("--sessions", type=int, default=500, help="每个连接的会话数")
+    parser.add_argument("--duration", type=float, default=10.0, help="压测时长（秒）")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    jobs = [
+        (args.host, args.port, args.connections, args.sessions, args.duration, rng.getrandbits(63))
+        for _ in range(args.procs)
+    ]
+    start = time.perf_counter()
+    if args.procs == 1:
+        results = [client_process(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=args.procs) as pool:
+            results = list(pool.map(client_process, jobs))
+    elapsed = time.perf_counter() - start
+
+    total = {key: sum(r[key] for r in results) for key in ("sessions", "moves", "resets", "errors")}
+    latencies = sorted(x for r in results for x in r["latencies"])
+    print(f"sessions: {total['sessions']}  time: {elapsed:.2f}s")
+    print(f"requests: {len(latencies)}  ({len(latencies) / elapsed:.0f}/s)  "
+          f"moves: {total['moves']}  ({total['moves'] / elapsed:.0f}/s)  "
+          f"resets: {total['resets']}  errors: {total['errors']}")
+    print("latency ms: " + "  ".join(
+        f"p{q} {percentile(latencies, q) * 1000:.2f}" for q in (50, 90, 99)
+    ) + f"  max {latencies[-1] * 1000 if latencies else 0:.2f}")
+    info = asyncio.run(server_info(args.host, args.port))
+    print("server: " + "  ".join(f"{k} {v}" for k, v in info.items()))
+
+
+if __name__ == "__main__":
+    main()
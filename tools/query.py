@@ -0,0 +1,126 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from results import CAUSES, ResultStore
+
+
+class ValueCounts:
+    """逐块累计一列整数的取值分布；内存只与不同取值的个数有关，可精确给出百分位"""
+
+    def __init__(self):
+        self.values = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, arr):
+        if not len(arr):
+            return
+        v, c = np.unique(arr, return_counts=True)
+        values, inverse = np.unique(np.concatenate([self.values, v.astype(np.int64)]), return_inverse=True)
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, c]),
+                                  minlength=len(values)).astype(np.int64)
+        self.values = values
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def mean(self):
+        return float((self.values * self.counts).sum() / self.total) if self.total else 0.0
+
+    def percentile(self, q):
+        # 与其余工具相同的取法：排序后第 int(q% * n) 个
+        if not self.total:
+            return 0
+        k = min(self.total - 1, int(q / 100 * self.total))
+        return int(self.values[np.searchsorted(np.cumsum(self.counts), k, side="right")])
+
+    def histogram(self, bins):
+        lo, hi = int(self.values[0]), int(self.values[-1])
+        edges = np.linspace(lo, hi + 1, bins + 1)
+        hist = np.bincount(np.searchsorted(edges, self.values, side="right") - 1, weights=self.counts,
+                           minlength=bins)[:bins].astype(np.int64)
+        return edges, hist
+
+
+def select_configs(store, ids, player):
+    configs = store.meta["configs"]
+    chosen = set(range(len(configs))) if not ids else set(ids)
+    if player:
+        chosen = {i for i in chosen if configs[i].get("player") == player}
+    return np.array(sorted(chosen), dtype=np.int64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从 results.py 的列式存储直接统计对局结果")
+    parser.add_argument("path", help="结果目录")
+    parser.add_argument("--config", type=int, action="append", help="只统计这些配置（可重复）")
+    parser.add_argument("--player", help="只统计该玩家类型的配置，例如 random / mcts / human")
+    parser.add_argument("--cause", choices=CAUSES, help="只统计该结束原因的对局")
+    parser.add_argument("--percentiles", default="50,90,99", help="输出的百分位")
+    parser.add_argument("--hist", choices=("score", "moves"), help="输出该列的直方图")
+    parser.add_argument("--bins", type=int, default=20)
+    parser.add_argument("--chunk", type=int, default=1 << 20, help="每次读入的行数")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = ResultStore(args.path)
+    configs = select_configs(store, args.config, args.player)
+    cause = CAUSES.index(args.cause) if args.cause else None
+    slots = store.item_slots
+
+    stats = {"score": ValueCounts(), "moves": ValueCounts()}
+    per_config = np.zeros(len(store.meta["configs"]), dtype=np.int64)
+    per_cause = np.zeros(len(CAUSES), dtype=np.int64)
+    levels = np.zeros((slots, 16), dtype=np.int64)
+    for chunk in store.chunks(("config", "cause", "score", "moves", "max_level"), args.chunk):
+        mask = np.isin(chunk["config"], configs)
+        if cause is not None:
+            mask &= chunk["cause"] == cause
+        if not mask.any():
+            continue
+        for name, counter in stats.items():
+            counter.add(chunk[name][mask])
+        per_config += np.bincount(chunk["config"][mask], minlength=len(per_config))
+        per_cause += np.bincount(chunk["cause"][mask], minlength=len(CAUSES))
+        # 每个道具槽位上各最高等级出现的局数
+        ml = chunk["max_level"][mask].astype(np.int64)
+        levels += np.bincount((np.arange(slots) * 16 + ml).ravel(), minlength=slots * 16).reshape(slots, 16)
+
+    total = stats["score"].total
+    print(f"{args.path}: {len(store)} games stored, {total} selected ({time.perf_counter() - start:.2f}s)")
+    for cid in np.flatnonzero(per_config).tolist():
+        c = store.meta["configs"][cid]
+        print(f"  config {cid}: {per_config[cid]} games  player={c.get('player', '-')}  "
+              f"{c['rows']}x{c['cols']}  items={c['items']}  max_levels={c['max_levels']}")
+    if not total:
+        return
+
+    qs = [float(q) for q in args.percentiles.split(",") if q]
+    for name, counter in stats.items():
+        parts = [f"mean {counter.mean():.1f}"]
+        parts += [f"p{q:g} {counter.percentile(q)}" for q in qs]
+        parts.append(f"max {int(counter.values[-1])}")
+        print(f"{name}: " + "  ".join(parts))
+    print("cause: " + "  ".join(f"{CAUSES[i]} {per_cause[i]}" for i in np.flatnonzero(per_cause).tolist()))
+    for item in range(slots):
+        row = levels[item]
+        if row[1:].any():
+            print(f"item {item} max level: " + "  ".join(
+                f"L{lvl} {row[lvl] / total * 100:.1f}%" for lvl in (np.flatnonzero(row[1:]) + 1).tolist()
+            ))
+
+    if args.hist:
+        edges, hist = stats[args.hist].histogram(args.bins)
+        peak = hist.max() or 1
+        print(f"{args.hist} histogram:")
+        for i, count in enumerate(hist.tolist()):
+            print(f"  {edges[i]:>10.0f} .. {edges[i + 1]:>10.0f}  {count:>10}  " + "#" * round(40 * count / peak))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from replay import Replay, ReplayError, apply_event, start_model
+from view import GameView
+from config import TILE_SIZE, MARGIN, HEADER, ANIM_SLIDE_MS, ANIM_POP_MS
+
+# 输出文件扩展名为这些时交给 ffmpeg 编码成视频；否则 .rgb 为原始 RGB24 帧，目录为逐帧 PNG
+VIDEO_EXTS = (".mp4", ".mkv", ".mov", ".webm", ".gif")
+
+# 时间轴：第 s 段显示执行完前 s 个事件后的局面（第 0 段为开局），每段 step_ms 毫秒、frames_per_step 帧；
+# 事件在段首执行，动画在段内播放。帧按段切块分给各进程，每块从开局快进到块首再逐帧渲染，
+# 段长不短于动画时长，所以每块的第一帧与顺序渲染的结果完全相同。
+
+
+def default_size(replay):
+    # 与游戏窗口的初始尺寸相同
+    width = replay.cols * TILE_SIZE + (replay.cols + 3) * MARGIN
+    height = HEADER + replay.rows * TILE_SIZE + (replay.rows + 2) * MARGIN
+    return width, height
+
+
+def render_chunk(job):
+    # 子进程：渲染第 first..last-1 段，整块写入 out（原始帧文件或 PNG 目录），返回帧数
+    path, first, last, opts, out = job
+    replay = Replay.load(path)
+    events = replay.events
+    model = start_model(replay)
+    surface = pygame.Surface(opts["size"])
+    view = GameView(replay.rows, replay.cols, surface=surface)
+    view.animator.enabled = opts["animate"]
+    fps, step_ms, per_step = opts["fps"], opts["step_ms"], opts["frames_per_step"]
+
+    # 快进到块首的前一个局面并整屏画一次，之后只做增量绘制
+    if first > 0:
+        for event in events[:first - 1]:
+            apply_event(model, event)
+        view.draw(model, now=0)
+    view.watch(model)
+
+    frame = first * per_step
+    raw = None if opts["png"] else open(out, "wb", buffering=1 << 22)
+    try:
+        for step in range(first, last):
+            if step > 0:
+                apply_event(model, events[step - 1])
+            for k in range(per_step):
+                view.draw(model, now=step * step_ms + k * 1000 // fps)
+                if raw is None:
+                    pygame.image.save(surface, os.path.join(out, f"frame_{frame:06d}.png"))
+                else:
+                    raw.write(pygame.image.tobytes(surface, "RGB"))
+                frame += 1
+    finally:
+        if raw is not None:
+            raw.close()
+    return (last - first) * per_step
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把回放文件无界面渲染成帧序列或视频，按进程池并行")
+    parser.add_argument("replay", help="回放文件（*.m2r）")
+    parser.add_argument("out", help="输出：*.rgb 原始 RGB24 帧、目录（逐帧 PNG）或 *.mp4 等视频（需要 ffmpeg）")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--step-ms", type=int, default=250, help="每个事件（点击）占用的时长，不短于动画时长")
+    parser.add_argument("--size", help="画面尺寸 WxH，默认与游戏窗口相同；布局按尺寸缩放")
+    parser.add_argument("--no-anim", action="store_true", help="不播放合成/生成动画")
+    parser.add_argument("--chunk", type=int, default=32, help="每个任务渲染的事件数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="进程数，1 表示单进程")
+    args = parser.parse_args()
+
+    try:
+        replay = Replay.load(args.replay)
+    except (OSError, ReplayError) as e:
+        print("cannot load replay:", e)
+        sys.exit(1)
+    if not args.no_anim and args.step_ms < max(ANIM_SLIDE_MS, ANIM_POP_MS):
+        parser.error(f"--step-ms must be at least {max(ANIM_SLIDE_MS, ANIM_POP_MS)} with animations on")
+    size = tuple(int(x) for x in args.size.lower().split("x")) if args.size else default_size(replay)
+    per_step = max(1, args.step_ms * args.fps // 1000)
+    opts = {
+        "size": size,
+        "fps": args.fps,
+        "step_ms": args.step_ms,
+        "frames_per_step": per_step,
+        "animate": not args.no_anim,
+        "png": not os.path.splitext(args.out)[1],
+    }
+    video = args.out.lower().endswith(VIDEO_EXTS)
+    if video and shutil.which("ffmpeg") is None:
+        print("ffmpeg not found; write raw frames to a .rgb file instead")
+        sys.exit(1)
+
+    steps = len(replay.events) + 1
+    bounds = list(range(0, steps, args.chunk)) + [steps]
+    if opts["png"]:
+        os.makedirs(args.out, exist_ok=True)
+        parts_dir = None
+        outs = [args.out] * (len(bounds) - 1)
+    else:
+        # 各进程先把自己的一块写成临时文件，主进程按顺序把块依次拼接到输出
+        parts_dir = tempfile.mkdtemp(prefix="render-", dir=os.path.dirname(os.path.abspath(args.out)))
+        outs = [os.path.join(parts_dir, f"{i:06d}.rgb") for i in range(len(bounds) - 1)]
+    jobs = [(args.replay, bounds[i], bounds[i + 1], opts, outs[i]) for i in range(len(bounds) - 1)]
+
+    if video:
+        sink = subprocess.Popen([
+            "ffmpeg", "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{size[0]}x{size[1]}", "-r", str(args.fps), "-i", "-", "-pix_fmt", "yuv420p", args.out,
+        ], stdin=subprocess.PIPE)
+        stream = sink.stdin
+    else:
+        sink = None
+        stream = None if opts["png"] else open(args.out, "wb")
+
+    start = time.perf_counter()
+    frames = 0
+    pool = None
+    try:
+        if args.workers == 1 or len(jobs) == 1:
+            results = map(render_chunk, jobs)
+        else:
+            pool = ProcessPoolExecutor(max_workers=args.workers)
+            results = pool.map(render_chunk, jobs)
+        # 结果按块顺序返回，前面的块完成后立即写出，不必等全部渲染完
+        for job, n in zip(jobs, results):
+            frames += n
+            if stream is not None:
+                with open(job[4], "rb") as f:
+                    shutil.copyfileobj(f, stream, 1 << 22)
+                os.remove(job[4])
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if stream is not None:
+            stream.close()
+        if sink is not None:
+            sink.wait()
+        if parts_dir is not None:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+
+    print(f"{frames} frames ({size[0]}x{size[1]}, {frames / args.fps:.1f}s at {args.fps} fps) "
+          f"in {elapsed:.2f}s ({frames / elapsed:.0f} frames/s)")
+    if not opts["png"] and not video:
+        print(f"ffmpeg -f rawvideo -pix_fmt rgb24 -s {size[0]}x{size[1]} -r {args.fps} -i {args.out} out.mp4")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay import Replay, ReplayError, verify
+
+
+def collect(paths):
+    # 参数可以是文件、目录或通配符
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(sorted(glob.glob(os.path.join(p, "**", "*.m2r"), recursive=True)))
+        elif any(ch in p for ch in "*?["):
+            files.extend(sorted(glob.glob(p, recursive=True)))
+        else:
+            files.append(p)
+    return files
+
+
+def check_file(path):
+    # 返回 (路径, 是否通过, 说明)
+    try:
+        rep = Replay.load(path)
+        ok, model = verify(rep)
+    except (OSError, ReplayError) as e:
+        return path, False, str(e)
+    if ok:
+        return path, True, f"score {model.score}"
+    return path, False, f"expected score {rep.score}, got {model.score}; digest match {model.digest() == rep.digest}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面全速重放并校验回放文件")
+    parser.add_argument("paths", nargs="+", help="回放文件、目录（递归查找 *.m2r）或通配符")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="进程数，1 表示单进程")
+    parser.add_argument("--chunksize", type=int, default=64)
+    parser.add_argument("-v", "--verbose", action="store_true", help="逐个打印结果")
+    args = parser.parse_args()
+
+    files = collect(args.paths)
+    if not files:
+        print("no replay files found")
+        return
+    start = time.perf_counter()
+    failed = 0
+    if args.workers == 1:
+        results = map(check_file, files)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=args.workers)
+        results = pool.map(check_file, files, chunksize=args.chunksize)
+    for path, ok, info in results:
+        if not ok:
+            failed += 1
+            print(f"FAIL {path}: {info}")
+        elif args.verbose:
+            print(f"ok   {path}: {info}")
+    if pool is not None:
+        pool.shutdown()
+    elapsed = time.perf_counter() - start
+    print(f"{len(files)} replays, {failed} failed, {elapsed:.2f}s ({len(files) / elapsed:.0f} files/s)")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from batch_model import BatchGameModel
+from results import ResultStore, record_batch
+from rules import ASSET_DIR, asset_rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量随机对局模拟")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=20000, help="每批同时模拟的局数")
+    parser.add_argument("--assets", default=ASSET_DIR, help="按该目录的素材检测道具与最高等级，与游戏一致")
+    parser.add_argument("--items", default="", help="道具列表，例如 1,2,3；默认按素材检测")
+    parser.add_argument("--max-levels", default="", help="覆盖检测到的最高等级，例如 1:6,2:5,3:8")
+    parser.add_argument("--max-moves", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--results", metavar="DIR", help="把每局结果追加到列式结果存储（tools/query.py 查询）")
+    args = parser.parse_args()
+
+    items, max_levels = asset_rules(args.assets, args.items, args.max_levels)
+    rng = np.random.default_rng(args.seed)
+    store = ResultStore(args.results, "a") if args.results else None
+
+    scores, moves = [], []
+    start = time.perf_counter()
+    done = 0
+    while done < args.games:
+        n = min(args.batch, args.games - done)
+        seed = int(rng.integers(2**63))
+        sim = BatchGameModel(n, items, max_levels, seed=seed)
+        res = sim.run(args.max_moves)
+        if store is not None:
+            record_batch(store, sim, seed)
+        scores.append(res["scores"])
+        moves.append(res["moves"])
+        done += n
+    if store is not None:
+        store.close()
+    elapsed = time.perf_counter() - start
+
+    scores = np.concatenate(scores)
+    moves = np.concatenate(moves)
+    print(f"games: {done}  time: {elapsed:.2f}s  ({done / elapsed:.0f} games/s)")
+    for name, arr in (("score", scores), ("moves", moves)):
+        p50, p90, p99 = np.percentile(arr, [50, 90, 99])
+        print(f"{name}: mean {arr.mean():.1f}  p50 {p50:.0f}  p90 {p90:.0f}  p99 {p99:.0f}  max {arr.max()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from batch_model import BatchGameModel
+from rules import ASSET_DIR, asset_rules
+from spawn import SpawnParams, FIELDS
+
+# 分数直方图的桶宽，用于合并各批次后再求分位数
+SCORE_BIN = 50
+
+
+def load_space(args):
+    # 参数空间：每个参数取值为列表（网格 / 随机挑选）或 {"min": a, "max": b}（仅随机搜索）
+    space = {}
+    if args.space:
+        with open(args.space, encoding="utf-8") as f:
+            space.update(json.load(f))
+    for spec in args.param:
+        key, _, value = spec.partition("=")
+        space[key] = json.loads(value)
+    unknown = set(space) - set(FIELDS)
+    if unknown:
+        raise SystemExit(f"unknown parameters: {sorted(unknown)} (expected {', '.join(FIELDS)})")
+    return space
+
+
+def grid_points(space):
+    keys = sorted(space)
+    for key in keys:
+        if not isinstance(space[key], list):
+            raise SystemExit(f"--mode grid needs a list of values for {key}")
+    for values in itertools.product(*(space[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def random_points(space, count, rng):
+    for _ in range(count):
+        point = {}
+        for key, spec in sorted(space.items()):
+            if isinstance(spec, list):
+                point[key] = rng.choice(spec)
+            elif isinstance(spec["min"], int) and isinstance(spec["max"], int):
+                point[key] = rng.randint(spec["min"], spec["max"])
+            else:
+                point[key] = rng.uniform(spec["min"], spec["max"])
+        if "level_rolls" in point:
+            point["level_rolls"] = sorted(point["level_rolls"])
+        yield point
+
+
+def run_batch(job):
+    # 在子进程中跑一批对局，只返回可以跨批次相加的统计量
+    point_id, params, seed, games, items, max_levels, max_moves = job
+    sim = BatchGameModel(games, items, max_levels, seed=seed, spawn_params=SpawnParams.from_dict(params))
+    res = sim.run(max_moves)
+    scores = res["scores"]
+    moves = res["moves"]
+    bins = np.bincount(scores // SCORE_BIN)
+    return point_id, {
+        "games": int(games),
+        "game_over": int(res["game_over"].sum()),
+        "score_sum": int(scores.sum()),
+        "score_sq": float((scores.astype(np.float64) ** 2).sum()),
+        "score_max": int(scores.max()),
+        "moves_sum": int(moves.sum()),
+        "moves_max": int(moves.max()),
+        "score_bins": {int(i): int(c) for i, c in enumerate(bins) if c},
+        "moves_bins": {int(m): int(c) for m, c in zip(*np.unique(moves, return_counts=True))},
+    }
+
+
+def merge_stats(acc, part):
+    if acc is None:
+        return part
+    for key in ("games", "game_over", "score_sum", "score_sq", "moves_sum"):
+        acc[key] += part[key]
+    acc["score_max"] = max(acc["score_max"], part["score_max"])
+    acc["moves_max"] = max(acc["moves_max"], part["moves_max"])
+    for key in ("score_bins", "moves_bins"):
+        for k, c in part[key].items():
+            acc[key][k] = acc[key].get(k, 0) + c
+    return acc
+
+
+def hist_percentile(bins, q, total):
+    target = q / 100 * total
+    seen = 0
+    for k in sorted(bins):
+        seen += bins[k]
+        if seen >= target:
+            return k
+    return max(bins)
+
+
+def summarize(point_id, params, acc, elapsed):
+    n = acc["games"]
+    mean = acc["score_sum"] / n
+    std = max(0.0, acc["score_sq"] / n - mean * mean) ** 0.5
+    return {
+        "point": point_id,
+        "params": SpawnParams.from_dict(params).to_dict(),
+        "games": n,
+        "game_over_rate": acc["game_over"] / n,
+        "score": {
+            "mean": mean,
+            "std": std,
+            "p10": hist_percentile(acc["score_bins"], 10, n) * SCORE_BIN,
+            "p50": hist_percentile(acc["score_bins"], 50, n) * SCORE_BIN,
+            "p90": hist_percentile(acc["score_bins"], 90, n) * SCORE_BIN,
+            "max": acc["score_max"],
+        },
+        "moves": {
+            "mean": acc["moves_sum"] / n,
+            "p10": hist_percentile(acc["moves_bins"], 10, n),
+            "p50": hist_percentile(acc["moves_bins"], 50, n),
+            "p90": hist_percentile(acc["moves_bins"], 90, n),
+            "max": acc["moves_max"],
+        },
+        "elapsed": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="道具生成参数的多进程扫描 / 随机搜索")
+    parser.add_argument("--space", help="参数空间 JSON 文件")
+    parser.add_argument("--param", action="append", default=[],
+                        help='单个参数的取值，例如 danger_empty=[3,4,5,6] 或 initial_fill={"min":0.2,"max":0.5}')
+    parser.add_argument("--mode", choices=["grid", "random"], default="grid")
+    parser.add_argument("--points", type=int, default=100, help="随机搜索的点数")
+    parser.add_argument("--games", type=int, default=20000, help="每个参数点的对局数")
+    parser.add_argument("--batch", type=int, default=5000, help="每个任务的对局数")
+    parser.add_argument("--assets", default=ASSET_DIR, help="按该目录的素材检测道具与最高等级，与游戏一致")
+    parser.add_argument("--items", default="", help="道具列表，例如 1,2,3；默认按素材检测")
+    parser.add_argument("--max-levels", default="", help="覆盖检测到的最高等级，例如 1:6,2:5,3:8")
+    parser.add_argument("--max-moves", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0, help="种子表与随机搜索的种子")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="进程数，1 表示单进程")
+    parser.add_argument("--out", default="tune.jsonl", help="每完成一个参数点追加一行结果")
+    args = parser.parse_args()
+
+    items, max_levels = asset_rules(args.assets, args.items, args.max_levels)
+    space = load_space(args)
+    rng = random.Random(args.seed)
+    if args.mode == "grid":
+        points = list(grid_points(space))
+    else:
+        points = list(random_points(space, args.points, rng))
+    # 提前校验所有参数点，避免跑到一半才报错
+    for point in points:
+        SpawnParams.from_dict(point)
+
+    # 所有参数点共用同一张种子表，点与点之间的差异不被随机噪声淹没
+    sizes = [args.batch] * (args.games // args.batch)
+    if args.games % args.batch:
+        sizes.append(args.games % args.batch)
+    seeds = [rng.getrandbits(63) for _ in sizes]
+
+    jobs = [
+        (pid, point, seed, size, items, max_levels, args.max_moves)
+        for pid, point in enumerate(points)
+        for seed, size in zip(seeds, sizes)
+    ]
+    pending = {pid: len(sizes) for pid in range(len(points))}
+    stats = {}
+    start = time.perf_counter()
+    print(f"{len(points)} points x {args.games} games, {len(jobs)} jobs", file=sys.stderr)
+
+    with open(args.out, "a", encoding="utf-8") as out:
+        def finish(pid, part):
+            stats[pid] = merge_stats(stats.get(pid), part)
+            pending[pid] -= 1
+            if pending[pid] == 0:
+                row = summarize(pid, points[pid], stats.pop(pid), time.perf_counter() - start)
+                out.write(json.dumps(row, sort_keys=True) + "\n")
+                out.flush()
+                done = len(points) - len([p for p in pending.values() if p])
+                print(f"[{done}/{len(points)}] {row['params']}  score {row['score']['mean']:.0f}  "
+                      f"moves {row['moves']['mean']:.1f}  game over {row['game_over_rate']:.3f}",
+                      file=sys.stderr)
+
+        if args.workers == 1:
+            for job in jobs:
+                finish(*run_batch(job))
+        else:
+            with ProcessPoolExecutor(max_workers=args.workers) as pool:
+                futures = [pool.submit(run_batch, job) for job in jobs]
+                for f in as_completed(futures):
+                    finish(*f.result())
+    elapsed = time.perf_counter() - start
+    print(f"done in {elapsed:.1f}s, results in {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,176 +1,506 @@
+import time
 import pygame
-import os
-import re
+from animation import Animator, ease_out, ease_out_back
+from assets import AssetLibrary, SurfaceCache
+from fonts import FontSource
+from profiler import Profiler, StartupTimer
 from config import *
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# 窗口最小时的格子边长，布局按窗口尺寸等比缩放但不小于它
+MIN_TILE_SIZE = 24
+EMPTY_KEY = (0, 0, False, None, False)
+
+
 class GameView:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("二合")
-        
-        self.font_big = pygame.font.SysFont("microsoftyahei", 28, bold=True)
-        self.font_med = pygame.font.SysFont("microsoftyahei", 22, bold=True)
-        self.font_small = pygame.font.SysFont("microsoftyahei", 18, bold=True)
-        
-        self.images = self.load_images(TILE_SIZE)
-        self.item_images = self.load_item_images(TILE_SIZE)
-        self.select_img = self.load_select_image(TILE_SIZE)
-
-    def load_images(self, size):
-        images = {}
-        for lv in range(1, 7):
-            path = os.path.join("assets", f"lv{lv}.png")
-            if os.path.isfile(path):
-                img = pygame.image.load(path).convert_alpha()
-                img = pygame.transform.smoothscale(img, (size - 8, size - 8))
-                images[lv] = img
-        return images
-
-    def load_item_images(self, size):
-        patterns = re.compile(r"^item(\d+)_(\d+)\.png$", re.IGNORECASE)
-        items = {}
-        if os.path.isdir("assets"):
-            for name in os.listdir("assets"):
-                m = patterns.match(name)
-                if m:
-                    item_id = int(m.group(1))
-                    lvl = int(m.group(2))
-                    path = os.path.join("assets", name)
-                    try:
-                        img = pygame.image.load(path).convert_alpha()
-                        img = pygame.transform.smoothscale(img, (size - 8, size - 8))
-                        items.setdefault(item_id, {})[lvl] = img
-                    except Exception:
-                        pass
-        return items
-
-    def load_select_image(self, size):
-        path = os.path.join("assets", "select.png")
-        if os.path.isfile(path):
-            try:
-                img = pygame.image.load(path).convert_alpha()
-                img = pygame.transform.smoothscale(img, (size, size))
-                return img
-            except Exception:
-                return None
-        return None
+    def __init__(self, rows=ROWS, cols=COLS, startup=None, surface=None):
+        # 初始窗口按 config 中的 TILE_SIZE/MARGIN/HEADER 计算，默认与 WIDTH/HEIGHT 相同；之后可自由缩放
+        # 给出 surface 时画到这块离屏 Surface 上，不创建窗口（无界面渲染回放）
+        self.rows = rows
+        self.cols = cols
+        width = cols * TILE_SIZE + (cols + 1) * MARGIN + 2 * MARGIN
+        height = HEADER + rows * TILE_SIZE + (rows + 1) * MARGIN + MARGIN
+
+        # 只初始化用到的显示与字体模块（pygame.init() 还会启动音频等子系统）
+        startup = startup or StartupTimer()
+        self.offscreen = surface is not None
+        if not self.offscreen:
+            pygame.display.init()
+        pygame.font.init()
+        startup.mark("pygame init")
+        if self.offscreen:
+            self.screen = surface
+            width, height = surface.get_size()
+        else:
+            self.screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
+            pygame.display.set_caption("二合")
+        startup.mark("window")
+
+        # 道具图片按需加载，启动时只扫描文件名
+        self.assets = AssetLibrary("assets", TILE_SIZE, ASSET_MEMORY_CAP, ATLAS_CACHE_DIR)
+        startup.mark("asset scan")
+
+        self.profiler = Profiler()
+        self.show_profiler = False
+        self._profiler_dirty = False
+        # 字体文件路径有磁盘缓存，字体对象在第一次绘制文字时才创建
+        self.fonts = FontSource()
+
+        # 预合成的格子图与文字渲染缓存，每个格子每帧只需一次 blit
+        self.tile_cache = SurfaceCache(TILE_CACHE_SIZE)
+        self.text_cache = SurfaceCache(TEXT_CACHE_SIZE)
+        # 合成/生成动画：由模型的格子变化事件驱动，见 watch()
+        self.animator = Animator()
+        self._sprite_rects = {}
+        self.layout(width, height)
+        startup.mark("layout")
+
+    def font(self, size):
+        # 按像素大小缓存字体，窗口来回缩放时不重复创建
+        return self.fonts.get(size)
+
+    @property
+    def font_big(self):
+        return self.font(self._font_sizes[0])
+
+    @property
+    def font_med(self):
+        return self.font(self._font_sizes[1])
+
+    @property
+    def font_small(self):
+        return self.font(self._font_sizes[2])
+
+    def layout(self, width, height):
+        # 按窗口尺寸重新计算格子、间距与标题栏，内容整体居中；所有缓存的画面随之失效
+        self.width = width
+        self.height = height
+        base_w = self.cols * TILE_SIZE + (self.cols + 3) * MARGIN
+        base_h = HEADER + self.rows * TILE_SIZE + (self.rows + 2) * MARGIN
+        scale = max(MIN_TILE_SIZE / TILE_SIZE, min(width / base_w, height / base_h))
+        self.scale = scale
+        self.tile = max(MIN_TILE_SIZE, round(TILE_SIZE * scale))
+        self.margin = max(2, round(MARGIN * scale))
+        self.header = round(HEADER * scale)
+        m = self.margin
+        content_w = self.cols * self.tile + (self.cols + 3) * m
+        content_h = self.header + self.rows * self.tile + (self.rows + 2) * m
+        self.origin = (max(0, (width - content_w) // 2), max(0, (height - content_h) // 2))
+        ox, oy = self.origin
+        self.content_rect = pygame.Rect(ox, oy, content_w, content_h)
+        self.grid_rect = pygame.Rect(ox + m, oy + self.header, content_w - 2 * m, content_h - self.header - m)
+
+        self._font_sizes = tuple(max(10, round(size * scale)) for size in (28, 22, 18))
+        self.assets.set_size(self.tile)
+
+        # 脏矩形渲染：静态背景缓存与上一帧各区域的状态
+        self.score_rect = pygame.Rect(ox + content_w - m - round(160 * scale), oy + m + round(16 * scale),
+                                      round(144 * scale), round(64 * scale))
+        self.profile_rect = pygame.Rect(ox + m + 8, oy + m + 6, 260, 86)
+        self._static = None
+        self._cell_states = {}
+        self._state_array = None
+        self._marked = ()
+        self._last_score = None
+        self._last_game_over = None
+        self._full_redraw = True
+        self._overlay = None
+        self._sprite_rects = {}
+        self.animator.tweens.clear()
+        step = self.tile + m
+        gx, gy = self.grid_rect.x + m, self.grid_rect.y + m
+        self._cell_rects = [
+            [pygame.Rect(gx + c * step, gy + r * step, self.tile, self.tile) for c in range(self.cols)]
+            for r in range(self.rows)
+        ]
+        self.tile_cache.clear()
+        self.text_cache.clear()
+        self.hint_overlays = []
+        for oc in HINT_COLORS:
+            overlay = pygame.Surface((self.tile, self.tile), pygame.SRCALPHA)
+            overlay.fill((oc[0], oc[1], oc[2], HINT_ALPHA))
+            self.hint_overlays.append(overlay)
+
+    def resize(self, width, height):
+        # VIDEORESIZE 时调用；图片从 mip 链重新缩放，不会重新解码
+        width, height = max(1, width), max(1, height)
+        if (width, height) == (self.width, self.height):
+            return
+        if self.offscreen:
+            self.screen = pygame.Surface((width, height))
+        else:
+            self.screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
+        self.layout(width, height)
+
+    def refresh_assets(self, keys):
+        # 热重载后丢掉用到这些图片的格子图，对应格子下一帧重绘
+        items, levels, select = set(), set(), False
+        for key in keys:
+            parts = key.split(":")
+            if parts[0] == "item":
+                items.add((int(parts[1]), int(parts[2])))
+            elif parts[0] == "lv":
+                levels.add(int(parts[1]))
+            else:
+                select = True
+
+        def affected(k):
+            item_id, level, _, _, selected = k
+            return (item_id, level) in items or (item_id and level in levels) or (select and selected)
+
+        for k in self.tile_cache.keys():
+            if affected(k):
+                self.tile_cache.pop(k)
+        for pos, k in list(self._cell_states.items()):
+            if affected(k):
+                del self._cell_states[pos]
+        self._state_array = None
+
+    def apply_config(self, values):
+        # 热重载的颜色、等级名称等配置：更新本模块从 config 导入的同名变量，并按当前窗口重新布局
+        globals().update(values)
+        self.layout(self.width, self.height)
 
     def get_available_items(self):
-        return sorted(self.item_images.keys())
+        return self.assets.available_items()
 
     def get_item_max_levels(self):
-        max_levels = {}
-        for item_id, levels in self.item_images.items():
-            if levels:
-                max_levels[item_id] = max(levels.keys())
-        return max_levels
+        return self.assets.item_max_levels()
+
+    def draw_rect(self, x, y, w, h, color, radius=8, surface=None):
+        surface = surface or self.screen
+        pygame.draw.rect(surface, color, pygame.Rect(x, y, w, h), border_radius=radius)
 
-    def draw_rect(self, x, y, w, h, color, radius=8):
-        pygame.draw.rect(self.screen, color, pygame.Rect(x, y, w, h), border_radius=radius)
+    def render_text(self, text, font, color):
+        # 文字渲染结果按 (文本, 字体, 颜色) 缓存
+        key = (text, id(font), color)
+        surf = self.text_cache.get(key)
+        if surf is None:
+            surf = self.text_cache.put(key, font.render(text, True, color))
+        return surf
 
-    def draw_text_center(self, text, font, color, rect):
-        surf = font.render(text, True, color)
+    def draw_text_center(self, text, font, color, rect, surface=None):
+        surface = surface or self.screen
+        surf = self.render_text(text, font, color)
         r = surf.get_rect(center=rect.center)
-        self.screen.blit(surf, r)
+        surface.blit(surf, r)
+
+    def watch(self, model):
+        # 订阅模型的格子变化以播放动画；换模型（读档等）时重新调用
+        self.animator.watch(model)
+        self._sprite_rects = {}
+
+    def is_animating(self):
+        # 有动画时控制器按帧率轮询，否则进入空闲等待；动画结束后还需一帧擦除最后的精灵
+        return bool(self.animator.tweens or self._sprite_rects)
+
+    def invalidate(self):
+        # 下一帧整屏重绘（窗口被遮挡后恢复等情况）
+        self._full_redraw = True
+
+    def cell_rect(self, r, c):
+        return self._cell_rects[r][c]
 
-    def draw(self, model):
+    def build_static(self):
+        # 背景、标题栏、分数底框和网格底板只绘制一次，之后按区域复制
         self.screen.fill(BG_COLOR)
+        ox, oy = self.origin
+        m = self.margin
         
         # Header Area
-        self.draw_rect(MARGIN, MARGIN, WIDTH - 2 * MARGIN, HEADER - MARGIN, GRID_BG, radius=12)
-        score_rect = pygame.Rect(WIDTH - MARGIN - 160, MARGIN + 16, 144, 64)
-        self.draw_rect(score_rect.x, score_rect.y, score_rect.w, score_rect.h, SCORE_BG, radius=8)
-        self.draw_text_center(str(model.score), self.font_med, TEXT_COLOR_LIGHT, score_rect)
+        self.draw_rect(ox + m, oy + m, self.content_rect.w - 2 * m, self.header - m, GRID_BG, radius=12)
+        self.draw_rect(self.score_rect.x, self.score_rect.y, self.score_rect.w, self.score_rect.h, SCORE_BG, radius=8)
         
         tip = "点击两个相同合成升级  按R重开"
         tip_surf = self.font_small.render(tip, True, TEXT_COLOR_LIGHT)
-        self.screen.blit(tip_surf, (MARGIN + 20, MARGIN + 30))
+        self.screen.blit(tip_surf, (ox + m + round(20 * self.scale), oy + m + round(30 * self.scale)))
 
         # Grid Area
-        grid_x = MARGIN
-        grid_y = HEADER
-        self.draw_rect(grid_x, grid_y, WIDTH - 2 * MARGIN, HEIGHT - HEADER - MARGIN, GRID_BG, radius=12)
-
-        for r in range(ROWS):
-            for c in range(COLS):
-                x = grid_x + MARGIN + c * (TILE_SIZE + MARGIN)
-                y = grid_y + MARGIN + r * (TILE_SIZE + MARGIN)
-                
-                v = model.grid[r][c]
-                if v and isinstance(v, tuple):
-                    item_id, level = v
-                    max_lvl = model.item_max_levels.get(item_id, 6)
-                    base_color = TILE_COLORS.get(1)
-                    color = base_color if level < max_lvl else MAXED_TILE_BG
-                else:
-                    lvl = v[1] if isinstance(v, tuple) else 0
-                    color = TILE_COLORS.get(1) if v else EMPTY_COLOR
-                
-                rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
-                self.draw_rect(x, y, TILE_SIZE, TILE_SIZE, color, radius=8)
-                
-                if v:
-                    if isinstance(v, tuple):
-                        item_id, level = v
-                        # Try item specific image -> level generic image -> text
-                        img = self.item_images.get(item_id, {}).get(level)
-                        if img is None:
-                            img = self.images.get(level)
-                        
-                        if img is not None:
-                            ix = x + (TILE_SIZE - img.get_width()) // 2
-                            iy = y + (TILE_SIZE - img.get_height()) // 2
-                            self.screen.blit(img, (ix, iy))
-                        else:
-                            name = LEVEL_NAMES.get(level, f"Lv{level}")
-                            color_text = TEXT_COLOR_DARK if level <= 2 else TEXT_COLOR_LIGHT
-                            self.draw_text_center(name, self.font_med, color_text, rect)
-
-                if v and isinstance(v, tuple):
-                    if (r, c) in getattr(model, 'hints', {}):
-                        idx = model.hints[(r, c)] % len(HINT_COLORS)
-                        overlay = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                        oc = HINT_COLORS[idx]
-                        overlay.fill((oc[0], oc[1], oc[2], HINT_ALPHA))
-                        self.screen.blit(overlay, (x, y))
-                
-                if (r, c) in model.selected:
-                    if self.select_img is not None:
-                        self.screen.blit(self.select_img, (x, y))
-                    else:
-                        pygame.draw.rect(self.screen, SELECTED_BORDER_COLOR, rect, width=4, border_radius=8)
-
-        # Game Over Overlay
-        if model.game_over:
-            overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-            overlay.fill(OVERLAY_COLOR)
-            self.screen.blit(overlay, (0, 0))
-            
-            msg_rect = pygame.Rect(0, 0, WIDTH, 120)
-            msg_rect.center = (WIDTH // 2, HEIGHT // 2 - 40)
-            self.draw_text_center("无可合成，游戏结束", self.font_big, TEXT_COLOR_DARK, msg_rect)
+        g = self.grid_rect
+        self.draw_rect(g.x, g.y, g.w, g.h, GRID_BG, radius=12)
+        self._static = self.screen.copy()
+
+    def tile_key(self, model, r, c):
+        # 决定格子外观的全部状态：(item, level, maxed, hint 颜色序号, selected)
+        selected = (r, c) in model.selected
+        v = model.grid[r][c]
+        if not v:
+            return 0, 0, False, None, selected
+        item_id, level = v
+        hint = model.hints.get((r, c))
+        if hint is not None:
+            hint %= len(HINT_COLORS)
+        return item_id, level, level >= model.item_max_levels.get(item_id, 6), hint, selected
+
+    def tile_surface(self, key):
+        surf = self.tile_cache.get(key)
+        if surf is None:
+            surf = self.tile_cache.put(key, self.build_tile(key))
+        return surf
+
+    def build_tile(self, key):
+        # 合成一个完整的格子图：底色、道具图/等级文字、提示色、选中框
+        item_id, level, maxed, hint, selected = key
+        size = self.tile
+        surf = pygame.Surface((size, size), 0, self.screen)
+        # 圆角外露出的部分与网格底板同色，因此格子图可以不带透明通道
+        surf.fill(GRID_BG)
+        rect = surf.get_rect()
+
+        if item_id:
+            color = MAXED_TILE_BG if maxed else TILE_COLORS.get(1)
+        else:
+            color = EMPTY_COLOR
+        self.draw_rect(0, 0, size, size, color, radius=8, surface=surf)
+
+        if item_id:
+            # Try item specific image -> level generic image -> text
+            img = self.assets.item_image(item_id, level)
+            if img is None:
+                img = self.assets.level_image(level)
             
-            tip_rect = pygame.Rect(0, 0, WIDTH, 60)
-            tip_rect.center = (WIDTH // 2, HEIGHT // 2 + 20)
-            self.draw_text_center("按 R 重开", self.font_med, TEXT_COLOR_DARK, tip_rect)
+            if img is not None:
+                ix = (size - img.get_width()) // 2
+                iy = (size - img.get_height()) // 2
+                surf.blit(img, (ix, iy))
+            else:
+                name = LEVEL_NAMES.get(level, f"Lv{level}")
+                color_text = TEXT_COLOR_DARK if level <= 2 else TEXT_COLOR_LIGHT
+                self.draw_text_center(name, self.font_med, color_text, rect, surface=surf)
+
+        if hint is not None:
+            surf.blit(self.hint_overlays[hint], (0, 0))
+        
+        if selected:
+            select_img = self.assets.select_image()
+            if select_img is not None:
+                surf.blit(select_img, (0, 0))
+            else:
+                pygame.draw.rect(surf, SELECTED_BORDER_COLOR, rect, width=4, border_radius=8)
+        return surf
+
+    def draw_score(self, model):
+        self.screen.blit(self._static, self.score_rect, self.score_rect)
+        self.draw_text_center(str(model.score), self.font_med, TEXT_COLOR_LIGHT, self.score_rect)
+        return self.score_rect
+
+    def draw_game_over(self):
+        if self._overlay is None:
+            self._overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+            self._overlay.fill(OVERLAY_COLOR)
+        self.screen.blit(self._overlay, (0, 0))
+        
+        cx, cy = self.content_rect.center
+        msg_rect = pygame.Rect(0, 0, self.width, round(120 * self.scale))
+        msg_rect.center = (cx, cy - round(40 * self.scale))
+        self.draw_text_center("无可合成，游戏结束", self.font_big, TEXT_COLOR_DARK, msg_rect)
+        
+        tip_rect = pygame.Rect(0, 0, self.width, round(60 * self.scale))
+        tip_rect.center = (cx, cy + round(20 * self.scale))
+        self.draw_text_center("按 R 重开", self.font_med, TEXT_COLOR_DARK, tip_rect)
+
+    def draw_profiler(self):
+        # 性能浮层：FPS、帧耗时 p99 与最慢的区段，画在标题栏左侧
+        rect = self.profile_rect
+        self.screen.blit(self._static, rect, rect)
+        if not self.show_profiler:
+            return rect
+        prof = self.profiler
+        name, mean = prof.slowest()
+        lines = [
+            f"FPS {prof.fps():.0f}  frame p99 {prof.percentile('frame', 99):.2f}ms",
+            f"slowest {name or '-'}",
+            f"  {mean:.3f}ms avg",
+        ]
+        self.draw_rect(rect.x, rect.y, rect.w, rect.h, SCORE_BG, radius=8)
+        y = rect.y + 6
+        for line in lines:
+            surf = self.font_small.render(line, True, TEXT_COLOR_LIGHT)
+            self.screen.blit(surf, (rect.x + 8, y))
+            y += surf.get_height() + 2
+        return rect
 
-        pygame.display.flip()
+    def toggle_profiler(self):
+        self.show_profiler = not self.show_profiler
+        self._profiler_dirty = True
+
+    def sprite(self, model, tween, now):
+        # 动画精灵在本帧的 (Surface, 位置)
+        t = tween.progress(now)
+        if tween.kind == "slide":
+            item_id, level = tween.value
+            key = item_id, level, level >= model.item_max_levels.get(item_id, 6), None, False
+            a, b = self.cell_rect(*tween.src), self.cell_rect(*tween.dst)
+            e = ease_out(t)
+            rect = pygame.Rect(round(a.x + (b.x - a.x) * e), round(a.y + (b.y - a.y) * e), a.w, a.h)
+            return self.tile_surface(key), rect
+        r, c = tween.dst
+        size = max(1, round(self.tile * ease_out_back(t)))
+        # 格子图的圆角外是网格底色，缩放后用色键去掉，避免盖住下面的空格
+        surf = pygame.transform.scale(self.tile_surface(self.tile_key(model, r, c)), (size, size))
+        surf.set_colorkey(GRID_BG)
+        return surf, surf.get_rect(center=self.cell_rect(r, c).center)
+
+    def cells_in(self, rect):
+        # 与 rect 相交的格子
+        m = self.margin
+        step = self.tile + m
+        gx, gy = self.grid_rect.x + m, self.grid_rect.y + m
+        c0 = max(0, (rect.x - gx) // step)
+        c1 = min(self.cols - 1, (rect.right - 1 - gx) // step)
+        r0 = max(0, (rect.y - gy) // step)
+        r1 = min(self.rows - 1, (rect.bottom - 1 - gy) // step)
+        return [
+            (r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)
+            if self._cell_rects[r][c].colliderect(rect)
+        ]
+
+    def changed_cells(self, model, popping):
+        # 可能需要重绘的格子。大棋盘的模型带有编码/提示数组时整体比较上一帧的数组，
+        # 只对变化的格子以及选中、弹出中的格子计算外观；否则逐格检查
+        codes = getattr(model, "code_array", None)
+        if codes is None or np is None:
+            self._state_array = None
+            return [(r, c) for r in range(self.rows) for c in range(self.cols)]
+        state = (codes.astype(np.int64) << 16) | (model.hint_array + 1)
+        prev, self._state_array = self._state_array, state
+        marked = set(model.selected) | set(popping)
+        cells = marked.union(self._marked)
+        self._marked = marked
+        if prev is None or len(prev) != len(state):
+            return [(r, c) for r in range(self.rows) for c in range(self.cols)]
+        cols = self.cols
+        cells.update(divmod(i, cols) for i in np.flatnonzero(state != prev).tolist())
+        return cells
+
+    def present(self, rects=None):
+        # 把本帧画好的区域提交到窗口；离屏渲染时不需要
+        if self.offscreen:
+            return
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def draw(self, model, now=None):
+        # 只重绘与上一帧相比发生变化的格子与动画经过的区域，返回本帧更新的区域列表
+        # now 为动画时钟（毫秒），离屏渲染时由调用方给出，保证每帧结果与渲染速度无关
+        start = time.perf_counter()
+        if now is None:
+            now = pygame.time.get_ticks()
+        prof = self.profiler
+        anim = self.animator
+        with prof.section("draw.background"):
+            if self._static is None:
+                self.build_static()
+
+        # 整屏重绘或结束时不播放动画，直接显示最终状态
+        full = self._full_redraw or model.game_over != self._last_game_over
+        anim.update(now)
+        if full or model.game_over:
+            anim.clear()
+        popping = anim.popping() if anim.tweens else ()
+
+        with prof.section("draw.tiles"):
+            dirty = []
+            for r, c in self.changed_cells(model, popping):
+                key = EMPTY_KEY if (r, c) in popping else self.tile_key(model, r, c)
+                if self._cell_states.get((r, c)) != key:
+                    self._cell_states[(r, c)] = key
+                    dirty.append((r, c))
+        score_changed = model.score != self._last_score
+        self._last_score = model.score
+        show_profiler = self.show_profiler or self._profiler_dirty
+        self._profiler_dirty = False
+
+        # 结束遮罩覆盖全屏，遮罩状态变化或遮罩下内容变化时整屏重绘
+        if model.game_over and (dirty or score_changed or show_profiler):
+            full = True
+        self._last_game_over = model.game_over
+
+        if full:
+            self._full_redraw = False
+            self._sprite_rects = {}
+            with prof.section("draw.background"):
+                self.screen.blit(self._static, (0, 0))
+            with prof.section("draw.tiles"):
+                self.screen.blits([
+                    (self.tile_surface(self._cell_states[(r, c)]), self.cell_rect(r, c))
+                    for r in range(self.rows) for c in range(self.cols)
+                ], doreturn=False)
+            with prof.section("draw.overlays"):
+                self.draw_score(model)
+                if self.show_profiler:
+                    self.draw_profiler()
+                if model.game_over:
+                    self.draw_game_over()
+            with prof.section("draw.flip"):
+                self.present()
+            return [self.screen.get_rect()]
+
+        with prof.section("draw.tiles"):
+            rects = [self.cell_rect(r, c) for r, c in dirty]
+            seq = [(self.tile_surface(self._cell_states[pos]), rect) for pos, rect in zip(dirty, rects)]
+            if anim.tweens or self._sprite_rects:
+                rects.extend(self.draw_sprites(model, now, seq))
+            # 本帧所有格子和精灵只经过一次 blits
+            self.screen.blits(seq, doreturn=False)
+        with prof.section("draw.overlays"):
+            if score_changed:
+                rects.append(self.draw_score(model))
+            if show_profiler:
+                rects.append(self.draw_profiler())
+        if rects:
+            with prof.section("draw.flip"):
+                self.present(rects)
+        # 超出帧预算时跳过剩余动画，下一帧直接画最终状态；离屏渲染不受帧预算限制
+        if anim.tweens and not self.offscreen and (time.perf_counter() - start) * 1000 > FRAME_BUDGET_MS:
+            anim.clear()
+        return rects
+
+    def draw_sprites(self, model, now, seq):
+        # 精灵本帧与上一帧覆盖的区域：先补背景，再补区域内的格子，最后叠上精灵，全部裁到区域内
+        sprites = {key: self.sprite(model, tw, now) for key, tw in self.animator.tweens.items()}
+        regions = []
+        for key, (_, rect) in sprites.items():
+            prev = self._sprite_rects.get(key)
+            regions.append(rect.union(prev) if prev else rect)
+        for key, prev in self._sprite_rects.items():
+            if key not in sprites:
+                regions.append(prev)
+        self._sprite_rects = {key: rect for key, (_, rect) in sprites.items()}
+
+        screen_rect = self.screen.get_rect()
+        regions = [region.clip(screen_rect) for region in regions]
+        for region in regions:
+            seq.append((self._static, region.topleft, region))
+            for r, c in self.cells_in(region):
+                cell = self._cell_rects[r][c]
+                part = cell.clip(region)
+                seq.append((self.tile_surface(self._cell_states[(r, c)]), part.topleft, part.move(-cell.x, -cell.y)))
+            for surf, rect in sprites.values():
+                part = rect.clip(region)
+                if part.w and part.h:
+                    seq.append((surf, part.topleft, part.move(-rect.x, -rect.y)))
+        return regions
 
     def cell_at(self, mx, my):
-        grid_x = MARGIN
-        grid_y = HEADER
-        if mx < grid_x or my < grid_y:
-            return None
-        rx = mx - grid_x - MARGIN
-        ry = my - grid_y - MARGIN
+        # 按当前布局把窗口坐标换算成格子；落在间距上返回 None
+        m = self.margin
+        rx = mx - self.grid_rect.x - m
+        ry = my - self.grid_rect.y - m
         if rx < 0 or ry < 0:
             return None
-        step = TILE_SIZE + MARGIN
+        step = self.tile + m
         c = rx // step
         r = ry // step
-        if r < 0 or c < 0 or r >= ROWS or c >= COLS:
+        if r >= self.rows or c >= self.cols:
             return None
-        if (rx - c * step) >= TILE_SIZE or (ry - r * step) >= TILE_SIZE:
+        if (rx - c * step) >= self.tile or (ry - r * step) >= self.tile:
             return None
         return int(r), int(c)